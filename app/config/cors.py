@@ -1,6 +1,8 @@
 # app/config/settings.py
 import os
 from typing import List
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
 
 # Outras configurações existentes...
 API_CONFIG = {
@@ -29,3 +31,16 @@ ALLOWED_ORIGINS: List[str] = [
     "https://localhost:3000",                      
     "https://localhost:5173",                     
 ]
+
+def setup_cors(app: FastAPI) -> FastAPI:
+    """Configurar CORS da aplicação"""
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=ALLOWED_ORIGINS,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        # Backoff do cliente em 429/503 (cabeçalho fora da lista segura do CORS)
+        expose_headers=["Retry-After"],
+    )
+    return app
@@ -0,0 +1,142 @@
+"""
+Configuração dos logs da aplicação
+
+- LOG_FORMAT=json: uma linha JSON compacta por registro, com o id da requisição
+  (e, no registro de acesso, rota, status, duração e etapas)
+- LOG_ASYNC=true: o event loop só enfileira o registro (QueueHandler); a formatação e a
+  escrita ficam numa thread (QueueListener), e um stdout lento não bloqueia as requisições
+- LOG_SAMPLE_RATE: fração das requisições bem-sucedidas cujos logs INFO são mantidos;
+  avisos, erros e registros fora de requisições são sempre mantidos
+"""
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+from .settings import LOG_LEVEL, LOG_FORMAT, LOG_ASYNC
+from ..services.request_context import request_info
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+class JsonFormatter(logging.Formatter):
+    """Registro como uma linha JSON (campos extras do registro de acesso em `fields`)"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage()
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id is not None:
+            entry["request_id"] = request_id
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, separators=(",", ":"), default=str)
+
+class RequestContextFilter(logging.Filter):
+    """
+    Anotar o registro com o id da requisição e descartar os INFO das requisições fora da
+    amostra. Roda na thread que emite o registro, onde o contexto da requisição existe
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        info = request_info.get()
+        if info is not None:
+            record.request_id = info["request_id"]
+            if record.levelno < logging.WARNING and not info["sampled"]:
+                return False
+        return True
+
+class DeferredQueueHandler(QueueHandler):
+    """QueueHandler que só resolve a mensagem e a exceção; o formatter roda no listener"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            # O traceback prende os frames da requisição: formatado já, só nos erros
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+class BatchingQueueListener(QueueListener):
+    """
+    QueueListener que escreve em lotes: depois do primeiro registro, espera `interval`
+    segundos e escreve tudo o que chegou. Acordar a thread a cada registro disputaria o
+    GIL com o event loop a cada requisição
+    """
+
+    def __init__(self, queue, *handlers, interval: float = 0.05, respect_handler_level: bool = False):
+        super().__init__(queue, *handlers, respect_handler_level=respect_handler_level)
+        self.interval = interval
+
+    def _monitor(self):
+        while True:
+            batch = [self.dequeue(True)]
+            time.sleep(self.interval)
+            try:
+                while True:
+                    batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                pass
+            for record in batch:
+                if record is self._sentinel:
+                    return
+                self.handle(record)
+
+class AsyncLogging:
+    """Fila e thread de escrita dos logs, recriadas no processo filho depois de um fork"""
+
+    def __init__(self, handler: logging.Handler):
+        self.handler = handler
+        self.queue_handler = DeferredQueueHandler(queue.SimpleQueue())
+        self.listener: Optional[QueueListener] = None
+
+    def start(self):
+        self.listener = BatchingQueueListener(self.queue_handler.queue, self.handler, respect_handler_level=True)
+        self.listener.start()
+
+    def restart_after_fork(self):
+        """A thread do listener não sobrevive ao fork (workers do gunicorn com preload)"""
+        self.queue_handler.queue = queue.SimpleQueue()
+        self.start()
+
+    def stop(self):
+        """Escrever o que ainda estiver na fila"""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+def setup_logging(level: str = LOG_LEVEL, log_format: str = LOG_FORMAT, use_queue: bool = LOG_ASYNC,
+                  stream=None) -> Optional[AsyncLogging]:
+    """Configurar o logger raiz (substitui os handlers existentes; stream padrão: stderr)"""
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(JsonFormatter() if log_format == "json" else logging.Formatter(TEXT_FORMAT))
+
+    async_logging = None
+    front = handler
+    if use_queue:
+        async_logging = AsyncLogging(handler)
+        async_logging.start()
+        os.register_at_fork(after_in_child=async_logging.restart_after_fork)
+        atexit.register(async_logging.stop)
+        front = async_logging.queue_handler
+    front.addFilter(RequestContextFilter())
+
+    root = logging.getLogger()
+    root.handlers = [front]
+    root.setLevel(level)
+    return async_logging
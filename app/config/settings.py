@@ -7,6 +7,9 @@ from dotenv import load_dotenv
 # Carregar variáveis de ambiente
 load_dotenv()
 
+# Diretório raiz do projeto
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 # Configurações da API
 API_CONFIG = {
     "title": "EmailSmart - Classificador Inteligente de Emails",
@@ -18,14 +21,168 @@ API_CONFIG = {
     
 }
 
+# Bundle de recursos de NLP gerado no build (python nltk_setup.py)
+NLP_BUNDLE_PATH = os.getenv("NLP_BUNDLE_PATH", os.path.join(BASE_DIR, "nlp_bundle.pickle"))
+
+# Artefato JSON de pesos da classificação (vazio: pesos de app/models/constants.py)
+SCORING_WEIGHTS_PATH = os.getenv("SCORING_WEIGHTS_PATH", "")
+
+# Memoização de radicais (PorterStemmer) no pré-processamento
+STEM_CACHE_SIZE = int(os.getenv("STEM_CACHE_SIZE", "50000"))
+
+# Memoização das contagens de palavras-chave: só textos de até KEYWORD_CACHE_MAX_CHARS
+# caracteres entram no cache (textos de arquivos grandes são contados sem memoização)
+KEYWORD_CACHE_SIZE = int(os.getenv("KEYWORD_CACHE_SIZE", "64"))
+KEYWORD_CACHE_MAX_CHARS = int(os.getenv("KEYWORD_CACHE_MAX_CHARS", "20000"))
+
 # Configuração OpenAI
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "").strip()
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
 OPENAI_MAX_TOKENS = int(os.getenv("OPENAI_MAX_TOKENS", "250"))
 OPENAI_TIMEOUT = int(os.getenv("OPENAI_TIMEOUT", "15"))
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "").strip() or None
+
+# Prompt da geração: orçamento de tokens (análise + email + instruções) e tokenizer local.
+# O tiktoken só é usado se a codificação já estiver em TOKENIZER_CACHE_DIR (python nltk_setup.py);
+# caso contrário os tokens são estimados, sem acesso à rede
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "400"))
+PROMPT_TOKENIZER_ENCODING = os.getenv("PROMPT_TOKENIZER_ENCODING", "").strip()  # vazio: a do OPENAI_MODEL
+TOKENIZER_CACHE_DIR = os.getenv("TOKENIZER_CACHE_DIR", os.path.join(BASE_DIR, "tokenizer_cache"))
+# Só os primeiros PROMPT_TOKEN_BUDGET x PROMPT_INPUT_CHARS_PER_TOKEN caracteres do email são
+# limpos e compactados (o resto de um arquivo grande não cabe no prompt de qualquer forma)
+PROMPT_INPUT_CHARS_PER_TOKEN = int(os.getenv("PROMPT_INPUT_CHARS_PER_TOKEN", "32"))
+
+# Prazo total por requisição (extração + classificação + geração), em segundos (0 desativa).
+# Pode ser definido por requisição no cabeçalho X-Request-Deadline, até REQUEST_DEADLINE_MAX
+REQUEST_DEADLINE = float(os.getenv("REQUEST_DEADLINE", "8"))
+REQUEST_DEADLINE_MAX = float(os.getenv("REQUEST_DEADLINE_MAX", "60"))
+# Guardar no cache de respostas a resposta da OpenAI que chegar depois do prazo
+DEADLINE_CACHE_LATE_RESPONSES = os.getenv("DEADLINE_CACHE_LATE_RESPONSES", "true").lower() == "true"
+
+# Circuit breaker da OpenAI: abre quando a taxa de falhas na janela passa do limite
+# (com pelo menos OPENAI_CIRCUIT_MIN_CALLS chamadas), espera OPENAI_CIRCUIT_OPEN_SECONDS
+# e fecha depois de OPENAI_CIRCUIT_HALF_OPEN_CALLS chamadas de teste bem-sucedidas
+OPENAI_CIRCUIT_ENABLED = os.getenv("OPENAI_CIRCUIT_ENABLED", "true").lower() == "true"
+OPENAI_CIRCUIT_WINDOW = float(os.getenv("OPENAI_CIRCUIT_WINDOW", "60"))
+OPENAI_CIRCUIT_MIN_CALLS = int(os.getenv("OPENAI_CIRCUIT_MIN_CALLS", "10"))
+OPENAI_CIRCUIT_FAILURE_RATE = float(os.getenv("OPENAI_CIRCUIT_FAILURE_RATE", "0.5"))
+OPENAI_CIRCUIT_OPEN_SECONDS = float(os.getenv("OPENAI_CIRCUIT_OPEN_SECONDS", "30"))
+OPENAI_CIRCUIT_HALF_OPEN_CALLS = int(os.getenv("OPENAI_CIRCUIT_HALF_OPEN_CALLS", "3"))
+
+# Pool de conexões HTTP compartilhado pelos clientes OpenAI
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "100"))
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "20"))
+OPENAI_KEEPALIVE_EXPIRY = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "30"))
+
+# Controle de admissão das chamadas à OpenAI (por processo): até ADMISSION_MAX_CONCURRENT
+# chamadas simultâneas (0 desativa) e ADMISSION_MAX_QUEUE esperando por até
+# ADMISSION_QUEUE_TIMEOUT segundos. Com a fila cheia, ADMISSION_POLICY "reject" responde
+# 503 com Retry-After e "degrade" usa a resposta de template
+ADMISSION_MAX_CONCURRENT = int(os.getenv("ADMISSION_MAX_CONCURRENT", "32"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "64"))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "5"))
+ADMISSION_POLICY = os.getenv("ADMISSION_POLICY", "degrade").lower()
+
+# Limite por cliente nas rotas de processamento (token bucket, 429 com Retry-After):
+# RATE_LIMIT_PER_MINUTE requisições por minuto (0 desativa), rajadas de até RATE_LIMIT_BURST.
+# O cliente é o valor de RATE_LIMIT_CLIENT_HEADER (ex.: X-API-Key) ou, sem ele, o IP
+RATE_LIMIT_PER_MINUTE = float(os.getenv("RATE_LIMIT_PER_MINUTE", "0"))
+RATE_LIMIT_BURST = int(os.getenv("RATE_LIMIT_BURST", "20"))
+RATE_LIMIT_CLIENT_HEADER = os.getenv("RATE_LIMIT_CLIENT_HEADER", "").strip()
+RATE_LIMIT_MAX_CLIENTS = int(os.getenv("RATE_LIMIT_MAX_CLIENTS", "10000"))
+
+# Cache de respostas geradas (backend "memory" ou "sqlite")
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory").lower()
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1024"))
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "86400"))
+RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH", "response_cache.sqlite3")
+RESPONSE_CACHE_EVICT_EVERY = int(os.getenv("RESPONSE_CACHE_EVICT_EVERY", "64"))  # inserções entre limpezas (SQLite)
+
+# Processamento em lote (/process-emails)
+BATCH_MAX_EMAILS = int(os.getenv("BATCH_MAX_EMAILS", "100"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
 
 # Configurações de arquivo
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(64 * 1024)))
+UPLOAD_SPOOL_THRESHOLD = int(os.getenv("UPLOAD_SPOOL_THRESHOLD", str(1024 * 1024)))
+MIME_SNIFF_BYTES = int(os.getenv("MIME_SNIFF_BYTES", str(64 * 1024)))
+
+# Extração de DOCX em streaming: máximo de caracteres lidos do documento (0 = sem limite)
+DOCX_MAX_CHARS = int(os.getenv("DOCX_MAX_CHARS", "0"))
+
+# Classificação incremental do texto extraído de arquivos (páginas ou blocos de texto).
+# Com parada antecipada (opcional: pode mudar a categoria de documentos longos em relação
+# à classificação do texto inteiro), depois de STREAM_CLASSIFY_MIN_CHARS a classificação termina
+# quando a categoria e a confiança (até STREAM_CLASSIFY_TOLERANCE) se mantêm por
+# STREAM_CLASSIFY_STABLE_CHUNKS trechos seguidos
+STREAM_CLASSIFY_CHUNK_CHARS = int(os.getenv("STREAM_CLASSIFY_CHUNK_CHARS", str(64 * 1024)))
+STREAM_CLASSIFY_EARLY_STOP = os.getenv("STREAM_CLASSIFY_EARLY_STOP", "false").lower() == "true"
+STREAM_CLASSIFY_MIN_CHARS = int(os.getenv("STREAM_CLASSIFY_MIN_CHARS", "20000"))
+STREAM_CLASSIFY_STABLE_CHUNKS = int(os.getenv("STREAM_CLASSIFY_STABLE_CHUNKS", "4"))
+STREAM_CLASSIFY_TOLERANCE = float(os.getenv("STREAM_CLASSIFY_TOLERANCE", "0.02"))
+
+# Cache de extração de arquivos, indexado pelo SHA-256 do conteúdo
+# (camada em disco desativada se EXTRACTION_CACHE_PATH estiver vazio)
+EXTRACTION_CACHE_ENABLED = os.getenv("EXTRACTION_CACHE_ENABLED", "true").lower() == "true"
+EXTRACTION_CACHE_MEMORY_BYTES = int(os.getenv("EXTRACTION_CACHE_MEMORY_BYTES", str(64 * 1024 * 1024)))
+EXTRACTION_CACHE_PATH = os.getenv("EXTRACTION_CACHE_PATH", "").strip()
+EXTRACTION_CACHE_DISK_BYTES = int(os.getenv("EXTRACTION_CACHE_DISK_BYTES", str(512 * 1024 * 1024)))
+
+# Extração de PDF em pool de processos (0 workers = extração no próprio processo).
+# Sob o gunicorn, sem valor definido, cada worker usa max(1, núcleos // workers) (gunicorn.conf.py)
+PDF_POOL_WORKERS = int(os.getenv("PDF_POOL_WORKERS", str(min(4, os.cpu_count() or 1))))
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "16"))
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "32"))
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "500"))
+PDF_EXTRACTION_TIMEOUT = float(os.getenv("PDF_EXTRACTION_TIMEOUT", "60"))
+
+# Jobs assíncronos de arquivos (POST /jobs/process-file, GET /jobs/{job_id}), em SQLite.
+# JOBS_WORKERS por processo; JOBS_MAX_PENDING limita os jobs na fila ou em execução
+JOBS_ENABLED = os.getenv("JOBS_ENABLED", "true").lower() == "true"
+JOBS_DB_PATH = os.getenv("JOBS_DB_PATH", "jobs.sqlite3")
+JOBS_WORKERS = int(os.getenv("JOBS_WORKERS", "2"))
+JOBS_MAX_PENDING = int(os.getenv("JOBS_MAX_PENDING", "100"))
+JOBS_RETENTION = int(os.getenv("JOBS_RETENTION", "86400"))  # segundos, contados da conclusão
+JOBS_LEASE_SECONDS = int(os.getenv("JOBS_LEASE_SECONDS", "600"))  # reserva sem renovação (processo caído) volta à fila
+JOBS_MAX_ATTEMPTS = int(os.getenv("JOBS_MAX_ATTEMPTS", "3"))
+JOBS_POLL_INTERVAL = float(os.getenv("JOBS_POLL_INTERVAL", "1"))
+
+# Logs (ver app/config/logging_setup.py)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")  # text ou json (uma linha JSON por registro)
+LOG_ASYNC = os.getenv("LOG_ASYNC", "false").lower() == "true"  # formatar e escrever numa thread à parte
+# Fração das requisições bem-sucedidas com logs INFO (erros e avisos são sempre registrados)
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "1"))
+
+# Métricas Prometheus em /metrics (com vários workers, defina PROMETHEUS_MULTIPROC_DIR)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+# Profiling sob demanda (ver app/middleware/profiling_middleware.py): com ele ativo, toda
+# resposta traz Server-Timing por etapa, e as requisições com o cabeçalho PROFILING_HEADER
+# (ou sorteadas por PROFILING_SAMPLE_RATE) têm o perfil gravado em PROFILING_DIR
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+PROFILING_HEADER = os.getenv("PROFILING_HEADER", "X-Profile")
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN", "")  # se definido, o cabeçalho precisa trazer este valor
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+PROFILING_MODE = os.getenv("PROFILING_MODE", "sampling")  # sampling (pilhas colapsadas) ou cprofile (pstats)
+PROFILING_INTERVAL = float(os.getenv("PROFILING_INTERVAL", "0.005"))
+PROFILING_DIR = os.getenv("PROFILING_DIR", "profiles")
+PROFILING_MAX_FILES = int(os.getenv("PROFILING_MAX_FILES", "100"))
+
+# Servidor de produção (gunicorn com workers uvicorn, ver gunicorn.conf.py)
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "0"))  # 0 = um worker por núcleo disponível
+SERVER_PRELOAD = os.getenv("SERVER_PRELOAD", "true").lower() == "true"
+SERVER_MAX_REQUESTS = int(os.getenv("SERVER_MAX_REQUESTS", "1000"))
+SERVER_MAX_REQUESTS_JITTER = int(os.getenv("SERVER_MAX_REQUESTS_JITTER", "100"))
+SERVER_TIMEOUT = int(os.getenv("SERVER_TIMEOUT", "120"))
+SERVER_GRACEFUL_TIMEOUT = int(os.getenv("SERVER_GRACEFUL_TIMEOUT", "30"))
+SERVER_KEEPALIVE = int(os.getenv("SERVER_KEEPALIVE", "5"))
+
+# Aquecimento na inicialização: /ready responde 503 até um email, um PDF e um DOCX
+# mínimos passarem pelo pipeline (ver app/services/warmup.py)
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
 
 # Configurações do servidor
 HOST = os.getenv("HOST", "127.0.0.1")
@@ -2,47 +2,88 @@
 """
 Ponto de entrada principal da aplicação EmailSmart
 """
+import time
+_import_started = time.perf_counter()
+
 import logging
 from fastapi import FastAPI
-from app.config.settings import API_CONFIG
+from app.config.settings import API_CONFIG, MAX_FILE_SIZE, METRICS_ENABLED, JOBS_ENABLED, PROFILING_ENABLED
 from app.config.cors import setup_cors
-from app.middleware.logging_middleware import logging_middleware
-from app.routes import email_routes, file_routes, utility_routes
-import nltk
-nltk.download('stopwords')
-nltk.download('punkt')
-
-# Configurar logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+from app.config.logging_setup import setup_logging
+from app.middleware.logging_middleware import LoggingMiddleware
+from app.middleware.upload_limit_middleware import UploadSizeLimitMiddleware
+from app.middleware.metrics_middleware import MetricsMiddleware
+from app.middleware.deadline_middleware import DeadlineMiddleware
+from app.middleware.rate_limit_middleware import RateLimitMiddleware
+from app.middleware.profiling_middleware import ProfilingMiddleware
+from app.routes import email_routes, file_routes, stream_routes, utility_routes, job_routes
+from app.services.openai_service import openai_service
+from app.services.pdf_extractor import pdf_extractor
+from app.services.job_queue import job_queue
+from app.services.admission import client_rate_limiter
+from app.services.warmup import warmup
+
+# Configurar logging (texto ou JSON, síncrono ou numa thread à parte)
+setup_logging()
 logger = logging.getLogger(__name__)
 
 # Criar aplicação FastAPI
 app = FastAPI(**API_CONFIG)
 
-# Configurar CORS
-app = setup_cors(app)
+# Limitar uploads enquanto o corpo ainda está sendo recebido
+app.add_middleware(UploadSizeLimitMiddleware, max_file_size=MAX_FILE_SIZE)
+
+# Iniciar o prazo de latência na chegada da requisição (antes do upload)
+app.add_middleware(DeadlineMiddleware)
+
+# Limite por cliente, antes do upload e do prazo (requisição recusada não consome nada)
+if client_rate_limiter.enabled:
+    app.add_middleware(RateLimitMiddleware, limiter=client_rate_limiter)
 
-# Adicionar middleware de logging
-app.middleware("http")(logging_middleware)
+# Server-Timing por etapa e perfil das requisições marcadas (sem custo quando desativado)
+if PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
+# Métricas por rota (mede também as rejeições acima)
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+# Log de acesso (id da requisição e amostragem valem para todos os middlewares internos)
+app.add_middleware(LoggingMiddleware)
+
+# Configurar CORS (middleware mais externo: respostas recusadas nos middlewares acima,
+# como 413, 400 do prazo e 429, também levam os cabeçalhos CORS)
+app = setup_cors(app)
 
 # Registrar rotas
 app.include_router(email_routes.router, prefix="")
 app.include_router(file_routes.router, prefix="")
+app.include_router(stream_routes.router, prefix="")
 app.include_router(utility_routes.router, prefix="")
+if JOBS_ENABLED:
+    app.include_router(job_routes.router, prefix="")
+
+# Bibliotecas pesadas ficam para o aquecimento (ver app/services/warmup.py)
+warmup.set_import_time(time.perf_counter() - _import_started)
 
 @app.on_event("startup")
 async def startup_event():
     """Evento de inicialização da aplicação"""
     logger.info("Iniciando EmailSmart API")
     logger.info(f"📖 Documentação disponível em: http://localhost:8000/docs")
+    if JOBS_ENABLED:
+        await job_queue.start()
+    # Em segundo plano: /ready responde 503 até terminar
+    warmup.start()
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Evento de desligamento da aplicação"""
     logger.info("🛑 Desligando EmailSmart API")
+    if JOBS_ENABLED:
+        await job_queue.stop()
+    await openai_service.close()
+    pdf_extractor.shutdown()
 
 if __name__ == "__main__":
     import uvicorn
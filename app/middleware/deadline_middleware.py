@@ -0,0 +1,33 @@
+"""
+Middleware para iniciar o prazo de latência assim que a requisição chega
+"""
+import logging
+from fastapi.responses import JSONResponse
+from ..services.deadline import Deadline, DEADLINE_HEADER, parse_budget
+
+logger = logging.getLogger(__name__)
+
+class DeadlineMiddleware:
+    """
+    Criar o Deadline da requisição antes da leitura do corpo, para que o upload,
+    a extração e a classificação também consumam o orçamento
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.header = DEADLINE_HEADER.lower().encode("latin-1")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        header_value = next((value for name, value in scope["headers"] if name == self.header), None)
+        try:
+            budget = parse_budget(header_value.decode("latin-1") if header_value is not None else None)
+        except ValueError as e:
+            logger.warning(f"Cabeçalho {DEADLINE_HEADER} inválido: {header_value!r}")
+            response = JSONResponse(status_code=400, content={"detail": f"Cabeçalho {DEADLINE_HEADER} inválido: {e}"})
+            return await response(scope, receive, send)
+
+        scope.setdefault("state", {})["deadline"] = Deadline(budget)
+        await self.app(scope, receive, send)
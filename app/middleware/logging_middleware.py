@@ -2,15 +2,65 @@
 Middleware para logging de requisições
 """
 import logging
-from fastapi import Request
+import random
+import time
+from ..services.request_context import collect_stages, request_id_for, request_info
+from ..config.settings import LOG_FORMAT, LOG_SAMPLE_RATE
 
 logger = logging.getLogger(__name__)
 
-async def logging_middleware(request: Request, call_next):
-    """Middleware para log de requisições e respostas"""
-    logger.info(f"Requisição: {request.method} {request.url}")
-    
-    response = await call_next(request)
-    
-    logger.info(f"Resposta: {response.status_code}")
-    return response
\ No newline at end of file
+class LoggingMiddleware:
+    """
+    Um registro de acesso por requisição, ao final: método, caminho, rota, status e
+    duração (e, nos logs JSON, a duração de cada etapa). Requisições bem-sucedidas fora
+    da amostra (LOG_SAMPLE_RATE) não geram logs INFO; as com erro são sempre registradas
+    """
+
+    def __init__(self, app, sample_rate: float = LOG_SAMPLE_RATE, with_stages: bool = LOG_FORMAT == "json"):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.with_stages = with_stages
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        request_id = request_id_for(scope)
+        sampled = self.sample_rate >= 1 or random.random() < self.sample_rate
+        context_token = request_info.set({"request_id": request_id, "sampled": sampled})
+        status = 500
+
+        async def logging_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        stages = None
+        start = time.perf_counter()
+        try:
+            if self.with_stages:
+                with collect_stages() as stages:
+                    await self.app(scope, receive, logging_send)
+            else:
+                await self.app(scope, receive, logging_send)
+        finally:
+            self._log(scope, status, time.perf_counter() - start, stages, sampled)
+            request_info.reset(context_token)
+
+    def _log(self, scope, status: int, seconds: float, stages, sampled: bool):
+        level = logging.ERROR if status >= 500 else logging.WARNING if status >= 400 else logging.INFO
+        if level == logging.INFO and not (sampled and logger.isEnabledFor(logging.INFO)):
+            return
+        route = scope.get("route")
+        fields = {
+            "method": scope["method"],
+            "path": scope["path"],
+            "route": getattr(route, "path", None),
+            "status": status,
+            "duration_ms": round(seconds * 1000, 1)
+        }
+        if stages:
+            fields["stages"] = {stage: round(value * 1000, 1) for stage, value in stages.items()}
+        logger.log(level, f"{scope['method']} {scope['path']} {status} {seconds * 1000:.1f}ms",
+                   extra={"fields": fields})
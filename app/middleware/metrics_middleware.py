@@ -0,0 +1,54 @@
+"""
+Middleware para métricas de requisições (contagem por rota e status, duração e em andamento)
+"""
+import time
+from ..services.metrics import REQUEST_SECONDS, REQUESTS_TOTAL, REQUESTS_IN_FLIGHT
+
+class MetricsMiddleware:
+    """
+    Medir cada requisição HTTP. A rota é o caminho registrado no app (ou "other"),
+    para que URLs arbitrárias não criem séries novas
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.routes = None
+        self.templated = []
+
+    def _route(self, scope) -> str:
+        if self.routes is None:
+            routes = scope["app"].routes
+            self.routes = frozenset(route.path for route in routes)
+            # Rotas com parâmetros ("/jobs/{job_id}") são rotuladas pelo modelo do caminho
+            self.templated = [route for route in routes if "{" in route.path]
+        path = scope["path"]
+        if path in self.routes:
+            return path
+        for route in self.templated:
+            if route.path_regex.match(path):
+                return route.path
+        return "other"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        route = self._route(scope)
+        method = scope["method"]
+        status = 500
+
+        async def tracking_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_flight = REQUESTS_IN_FLIGHT.labels(route)
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, tracking_send)
+        finally:
+            in_flight.dec()
+            REQUEST_SECONDS.labels(route, method).observe(time.perf_counter() - start)
+            REQUESTS_TOTAL.labels(route, method, str(status)).inc()
@@ -0,0 +1,73 @@
+"""
+Middleware de profiling sob demanda: Server-Timing por etapa em todas as respostas, e
+perfil gravado das requisições marcadas pelo cabeçalho PROFILING_HEADER ou sorteadas
+"""
+import asyncio
+import hmac
+import logging
+import random
+import time
+from ..services.profiler import RequestProfiler, request_profiler
+from ..services.request_context import collect_stages, request_id_for
+from ..config.settings import PROFILING_HEADER, PROFILING_TOKEN, PROFILING_SAMPLE_RATE
+
+logger = logging.getLogger(__name__)
+
+def server_timing(stages: dict, total_seconds: float) -> bytes:
+    """Cabeçalho Server-Timing com a duração de cada etapa e do app até a resposta (ms)"""
+    entries = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in stages.items()]
+    entries.append(f"app;dur={total_seconds * 1000:.1f}")
+    return ", ".join(entries).encode("latin-1")
+
+class ProfilingMiddleware:
+    """
+    Acumular a duração das etapas (extração, classificação, prompt, OpenAI) de cada
+    requisição e devolvê-las em Server-Timing, com o X-Request-ID. Etapas que terminam
+    depois do início da resposta (streams) não entram no cabeçalho
+    """
+
+    def __init__(self, app, profiler: RequestProfiler = request_profiler, header: str = PROFILING_HEADER,
+                 token: str = PROFILING_TOKEN, sample_rate: float = PROFILING_SAMPLE_RATE):
+        self.app = app
+        self.profiler = profiler
+        self.header = header.lower().encode("latin-1")
+        self.token = token
+        self.sample_rate = sample_rate
+
+    def _header(self, scope, name: bytes):
+        value = next((value for header, value in scope["headers"] if header == name), None)
+        return value.decode("latin-1") if value is not None else None
+
+    def _wants_profile(self, scope) -> bool:
+        value = self._header(scope, self.header)
+        if value is not None:
+            if self.token:
+                return hmac.compare_digest(value.encode("latin-1"), self.token.encode("latin-1"))
+            return value.strip().lower() not in ("", "0", "false")
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        request_id = request_id_for(scope)
+        profiler = self.profiler.start() if self._wants_profile(scope) else None
+        start = time.perf_counter()
+
+        with collect_stages() as stages:
+            async def timing_send(message):
+                if message["type"] == "http.response.start":
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-request-id", request_id.encode("latin-1")))
+                    headers.append((b"server-timing", server_timing(stages, time.perf_counter() - start)))
+                    if profiler is not None:
+                        headers.append((b"x-profile-id", request_id.encode("latin-1")))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            try:
+                await self.app(scope, receive, timing_send)
+            finally:
+                if profiler is not None:
+                    self.profiler.stop(profiler)
+                    await asyncio.to_thread(self.profiler.save, profiler, request_id)
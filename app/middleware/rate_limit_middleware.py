@@ -0,0 +1,47 @@
+"""
+Middleware para limitar as requisições de processamento por cliente (token bucket)
+"""
+import logging
+from fastapi.responses import JSONResponse
+from ..services.admission import TokenBucketLimiter, AdmissionRejected
+from ..services.metrics import record_shed
+from ..config.settings import RATE_LIMIT_CLIENT_HEADER
+
+logger = logging.getLogger(__name__)
+
+# Rotas que chegam à OpenAI (ou à fila de jobs)
+LIMITED_PATH_PREFIXES = ("/process-", "/jobs/process-file")
+
+class RateLimitMiddleware:
+    """
+    Recusar com 429 e Retry-After, antes da leitura do corpo, as requisições de
+    processamento de um cliente acima do seu limite
+    """
+
+    def __init__(self, app, limiter: TokenBucketLimiter, client_header: str = RATE_LIMIT_CLIENT_HEADER):
+        self.app = app
+        self.limiter = limiter
+        self.header = client_header.lower().encode("latin-1") if client_header else None
+
+    def _client(self, scope) -> str:
+        if self.header is not None:
+            value = next((value for name, value in scope["headers"] if name == self.header), None)
+            if value:
+                return value.decode("latin-1")
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(LIMITED_PATH_PREFIXES):
+            return await self.app(scope, receive, send)
+
+        client = self._client(scope)
+        wait = self.limiter.take(client)
+        if wait > 0:
+            record_shed("rate_limited")
+            rejected = AdmissionRejected("rate_limited", wait, status_code=429)
+            logger.warning(f"Limite de requisições excedido por {client}")
+            response = JSONResponse(status_code=429, content={"detail": rejected.detail}, headers=rejected.headers)
+            return await response(scope, receive, send)
+
+        await self.app(scope, receive, send)
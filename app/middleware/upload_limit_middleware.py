@@ -0,0 +1,65 @@
+"""
+Middleware para limitar o tamanho do corpo de uploads
+"""
+import logging
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+# Margem para os cabeçalhos e delimitadores do multipart
+MULTIPART_OVERHEAD = 64 * 1024
+
+class UploadSizeLimitMiddleware:
+    """
+    Rejeitar com 413 uploads multipart acima do limite enquanto o corpo ainda
+    está sendo recebido, antes que o parser do formulário o armazene
+    """
+
+    def __init__(self, app, max_file_size: int):
+        self.app = app
+        self.max_body_size = max_file_size + MULTIPART_OVERHEAD
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        headers = dict(scope["headers"])
+        if not headers.get(b"content-type", b"").startswith(b"multipart/form-data"):
+            return await self.app(scope, receive, send)
+
+        content_length = headers.get(b"content-length")
+        if content_length and content_length.isdigit() and int(content_length) > self.max_body_size:
+            logger.warning(f"Upload rejeitado pelo Content-Length: {int(content_length)} bytes")
+            return await self._reject(scope, receive, send)
+
+        received = 0
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_size:
+                    raise HTTPException(status_code=413, detail="Arquivo muito grande")
+            return message
+
+        async def tracking_send(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except HTTPException as e:
+            if e.status_code != 413 or response_started:
+                raise
+            logger.warning(f"Upload abortado após {received} bytes")
+            await self._reject(scope, receive, send)
+
+    @staticmethod
+    async def _reject(scope, receive, send):
+        response = JSONResponse(status_code=413, content={"detail": "Arquivo muito grande"})
+        await response(scope, receive, send)
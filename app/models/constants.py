@@ -27,9 +27,43 @@ UNPRODUCTIVE_KEYWORDS = [
     'descanso', 'diversão', 'lazer'
 ]
 
+# Stopwords manuais (fallback absoluto quando o NLTK não está disponível)
+MANUAL_STOPWORDS = {
+    'a', 'ao', 'aos', 'aquela', 'aquelas', 'aquele', 'aqueles', 'aquilo', 'as', 'até', 
+    'com', 'como', 'da', 'das', 'de', 'dela', 'delas', 'dele', 'deles', 'depois', 
+    'do', 'dos', 'e', 'ela', 'elas', 'ele', 'eles', 'em', 'entre', 'era', 'eram', 
+    'é', 'essa', 'essas', 'esse', 'esses', 'esta', 'estas', 'este', 'estes', 'eu', 
+    'foi', 'foram', 'há', 'isso', 'isto', 'já', 'lhe', 'lhes', 'mais', 'mas', 'me', 
+    'mesmo', 'meu', 'meus', 'minha', 'minhas', 'muito', 'na', 'nas', 'no', 'nos', 
+    'nós', 'nossa', 'nossas', 'nosso', 'nossos', 'num', 'numa', 'o', 'os', 'ou', 
+    'para', 'pela', 'pelas', 'pelo', 'pelos', 'por', 'quando', 'que', 'quem', 'se', 
+    'sem', 'seu', 'seus', 'só', 'sua', 'suas', 'também', 'te', 'tem', 'têm', 'teu', 
+    'teus', 'tu', 'tua', 'tuas', 'um', 'uma', 'você', 'vocês', 'vos', 'para', 'é',
+    'ser', 'estar', 'tem', 'ter', 'foi', 'são', 'como', 'mas', 'já', 'ou', 'se',
+    'não', 'sim', 'também', 'muito', 'pouco', 'mais', 'menos', 'bem', 'mal', 'agora',
+    'depois', 'antes', 'sempre', 'nunca', 'hoje', 'ontem', 'amanhã'
+}
+
 # Pesos para palavras-chave
 KEYWORD_WEIGHTS = {
     'reunião': 2.0, 'projeto': 1.8, 'prazo': 1.7, 'entreg': 1.6,
     'trabalho': 1.5, 'urgente': 1.8, 'contrato': 1.7, 'cliente': 1.6,
     'fest': 1.8, 'festa': 1.8, 'social': 1.5, 'pessoal': 1.4
+}
+
+# Peso das palavras-chave sem peso específico em KEYWORD_WEIGHTS
+DEFAULT_KEYWORD_WEIGHTS = {'produtivo': 1.2, 'improdutivo': 1.0}
+
+# Limiares da razão produtivo / (produtivo + improdutivo) na classificação
+RATIO_THRESHOLDS = {'produtivo': 0.6, 'neutro': 0.4, 'improdutivo': 0.3}
+
+# Termos usados na análise de contexto e nas respostas de fallback
+CONTEXT_KEYWORDS = {
+    'produtivo_implicito': ['reunião', 'projeto', 'relatório', 'prazo', 'entreg'],
+    'solicitacao': ['solicit', 'pedido', 'requer'],
+    'problema': ['problema', 'erro', 'bug'],
+    'duvida': ['dúvida', 'pergunta'],
+    'resposta_solicitacao': ['solicit', 'pedido'],
+    'resposta_problema': ['problema', 'erro'],
+    'agradecimento': ['agradec', 'obrigad']
 }
\ No newline at end of file
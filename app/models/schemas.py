@@ -1,18 +1,28 @@
 """
 Schemas Pydantic para validação de dados
 """
+from datetime import datetime
 from pydantic import BaseModel, Field
 from typing import Optional
+from ..config.settings import BATCH_MAX_EMAILS
+
+# Limites do texto de um email (no lote, verificados por item)
+EMAIL_MIN_LENGTH = 5
+EMAIL_MAX_LENGTH = 10000
 
 class EmailRequest(BaseModel):
     """Schema para requisição de processamento de email"""
     email: str = Field(
         ..., 
-        min_length=5, 
-        max_length=10000, 
+        min_length=EMAIL_MIN_LENGTH, 
+        max_length=EMAIL_MAX_LENGTH, 
         description="Conteúdo do email para classificação"
     )
 
+class BatchEmailItem(BaseModel):
+    """Schema de um email do lote (tamanho verificado por item, sem invalidar o lote)"""
+    email: str = Field(..., description="Conteúdo do email para classificação")
+
 class EmailResponse(BaseModel):
     """Schema para resposta da classificação de email"""
     category: str = Field(description="Categoria: Produtivo ou Improdutivo")
@@ -27,6 +37,42 @@ class EmailResponse(BaseModel):
         default=None, 
         description="Informações do arquivo processado"
     )
+    fallback: bool = Field(
+        default=False,
+        description="Resposta de template (OpenAI indisponível ou prazo esgotado)"
+    )
+
+class BatchEmailRequest(BaseModel):
+    """Schema para requisição de processamento de emails em lote"""
+    emails: list[BatchEmailItem] = Field(
+        ...,
+        min_length=1,
+        max_length=BATCH_MAX_EMAILS,
+        description="Emails para classificação"
+    )
+    classify_only: bool = Field(
+        default=False,
+        description="Apenas classificar, sem gerar respostas"
+    )
+
+class BatchEmailResult(BaseModel):
+    """Schema para o resultado de um email do lote"""
+    index: int = Field(description="Posição do email na requisição")
+    success: bool
+    category: Optional[str] = None
+    confidence: Optional[float] = Field(default=None, ge=0.0, le=1.0)
+    response: Optional[str] = None
+    email_preview: Optional[str] = None
+    processed_keywords: Optional[list[str]] = None
+    fallback: Optional[bool] = None
+    error: Optional[str] = None
+
+class BatchEmailResponse(BaseModel):
+    """Schema para resposta do processamento em lote"""
+    results: list[BatchEmailResult]
+    total: int
+    succeeded: int
+    failed: int
 
 class HealthCheckResponse(BaseModel):
     """Schema para health check"""
@@ -34,6 +80,8 @@ class HealthCheckResponse(BaseModel):
     openai_configured: bool
     nltk_ready: bool
     file_processing: str
+    openai_circuit: Optional[dict] = None
+    admission: Optional[dict] = None
     timestamp: str
 
 class OpenAITestResponse(BaseModel):
@@ -42,4 +90,24 @@ class OpenAITestResponse(BaseModel):
     message: Optional[str] = None
     response: Optional[str] = None
     openai_configured: bool
-    model: Optional[str] = None
\ No newline at end of file
+    model: Optional[str] = None
+    circuit: Optional[dict] = None
+
+class JobCreatedResponse(BaseModel):
+    """Schema para resposta da criação de job de arquivo"""
+    job_id: str
+    status: str
+    status_url: str = Field(description="Endpoint para consultar o status e o resultado")
+
+class JobStatusResponse(BaseModel):
+    """Schema para resposta da consulta de job"""
+    job_id: str
+    status: str = Field(description="queued, running, done ou failed")
+    filename: str
+    size_bytes: int
+    attempts: int
+    result: Optional[EmailResponse] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
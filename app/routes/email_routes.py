@@ -1,16 +1,22 @@
 """
 Rotas para processamento de emails via texto
 """
-from fastapi import APIRouter, HTTPException
-from ..models.schemas import EmailRequest, EmailResponse
+from fastapi import APIRouter, Depends, HTTPException
+from ..models.schemas import (
+    EmailRequest, EmailResponse, BatchEmailRequest, BatchEmailResponse, BatchEmailResult,
+    EMAIL_MIN_LENGTH, EMAIL_MAX_LENGTH
+)
 from ..services.email_processor import email_processor
+from ..services.deadline import Deadline, request_deadline
+from ..config.settings import BATCH_CONCURRENCY
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter(tags=["Email Processing"])
 
 @router.post("/process-email", response_model=EmailResponse)
-async def process_email(request: EmailRequest):
+async def process_email(request: EmailRequest, deadline: Deadline = Depends(request_deadline)):
     """
     Processar e classificar email enviado como texto
     """
@@ -21,7 +27,9 @@ async def process_email(request: EmailRequest):
             raise HTTPException(status_code=422, detail="Texto muito curto")
         
         category, confidence, keywords = email_processor.classify_email(email_text)
-        response_text = email_processor.generate_response(email_text, category, keywords)
+        response_text, fallback = await email_processor.generate_response_async(
+            email_text, category, keywords, deadline
+        )
         
         email_preview = email_text[:100] + '...' if len(email_text) > 100 else email_text
         
@@ -32,11 +40,82 @@ async def process_email(request: EmailRequest):
             confidence=round(confidence, 2),
             response=response_text,
             email_preview=email_preview,
-            processed_keywords=keywords[:10] if keywords else None
+            processed_keywords=keywords[:10] if keywords else None,
+            fallback=fallback
         )
         
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Erro no processamento: {e}")
-        raise HTTPException(status_code=500, detail="Erro interno no processamento")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Erro interno no processamento")
+
+@router.post("/process-emails", response_model=BatchEmailResponse)
+async def process_emails(request: BatchEmailRequest, deadline: Deadline = Depends(request_deadline)):
+    """
+    Processar e classificar um lote de emails, com erros reportados por item
+    """
+    email_texts = [item.email.strip() for item in request.emails]
+    errors = {}
+    for index, item in enumerate(request.emails):
+        if len(email_texts[index]) < EMAIL_MIN_LENGTH:
+            errors[index] = "Texto muito curto"
+        elif len(item.email) > EMAIL_MAX_LENGTH:
+            errors[index] = f"Texto muito longo (máximo {EMAIL_MAX_LENGTH} caracteres)"
+    valid_indexes = [i for i in range(len(email_texts)) if i not in errors]
+    
+    classifications = dict(zip(
+        valid_indexes,
+        email_processor.classify_emails([email_texts[i] for i in valid_indexes])
+    ))
+    
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+    
+    async def process_item(index: int) -> BatchEmailResult:
+        if index in errors:
+            return BatchEmailResult(index=index, success=False, error=errors[index])
+        
+        email_text = email_texts[index]
+        category, confidence, keywords = classifications[index]
+        response_text = None
+        fallback = None
+        
+        if not request.classify_only:
+            async with semaphore:
+                # Sobrecarga afeta só o item (resposta de template), não o lote inteiro
+                response_text, fallback = await email_processor.generate_response_async(
+                    email_text, category, keywords, deadline, overload_policy="degrade"
+                )
+        
+        return BatchEmailResult(
+            index=index,
+            success=True,
+            category=category,
+            confidence=round(confidence, 2),
+            response=response_text,
+            email_preview=email_text[:100] + '...' if len(email_text) > 100 else email_text,
+            processed_keywords=keywords[:10] if keywords else None,
+            fallback=fallback
+        )
+    
+    outcomes = await asyncio.gather(
+        *(process_item(i) for i in range(len(email_texts))),
+        return_exceptions=True
+    )
+    
+    results = []
+    for index, outcome in enumerate(outcomes):
+        if isinstance(outcome, Exception):
+            logger.error(f"Erro no processamento do item {index}: {outcome}")
+            outcome = BatchEmailResult(index=index, success=False, error="Erro interno no processamento")
+        results.append(outcome)
+    
+    succeeded = sum(1 for result in results if result.success)
+    logger.info(f"Lote processado - {succeeded}/{len(results)} emails")
+    
+    return BatchEmailResponse(
+        results=results,
+        total=len(results),
+        succeeded=succeeded,
+        failed=len(results) - succeeded
+    )
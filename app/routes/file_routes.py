@@ -1,19 +1,55 @@
 """
 Rotas para processamento de emails via upload de arquivo
 """
-from fastapi import APIRouter, HTTPException, File, UploadFile
+from fastapi import APIRouter, Depends, HTTPException, File, UploadFile
 from ..models.schemas import EmailResponse
 from ..services.email_processor import email_processor
 from ..services.file_processor import FileProcessor
-from ..config.settings import MAX_FILE_SIZE
+from ..services.deadline import Deadline, request_deadline
+from ..services.metrics import track_stage
+from ..config.settings import MAX_FILE_SIZE, UPLOAD_CHUNK_SIZE, UPLOAD_SPOOL_THRESHOLD
+from tempfile import SpooledTemporaryFile
+import asyncio
+import hashlib
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter(tags=["File Processing"])
 file_processor = FileProcessor()
 
+async def read_upload(file: UploadFile) -> tuple[SpooledTemporaryFile, int, str]:
+    """
+    Ler o arquivo enviado em blocos para um spool (memória até o limite, depois disco),
+    abortando assim que o tamanho máximo for ultrapassado. Retorna também o SHA-256
+    do conteúdo, calculado durante a leitura
+    """
+    if not file.filename:
+        raise HTTPException(status_code=400, detail="Nome do arquivo não fornecido")
+    
+    spool = SpooledTemporaryFile(max_size=UPLOAD_SPOOL_THRESHOLD)
+    digest = hashlib.sha256()
+    size = 0
+    
+    try:
+        with track_stage("upload_read"):
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > MAX_FILE_SIZE:
+                    raise HTTPException(status_code=413, detail="Arquivo muito grande")
+                spool.write(chunk)
+                digest.update(chunk)
+        
+        if size == 0:
+            raise HTTPException(status_code=400, detail="Arquivo vazio")
+    except BaseException:
+        spool.close()
+        raise
+    
+    spool.seek(0)
+    return spool, size, digest.hexdigest()
+
 @router.post("/process-file", response_model=EmailResponse)
-async def process_file_email(file: UploadFile = File(...)):
+async def process_file_email(file: UploadFile = File(...), deadline: Deadline = Depends(request_deadline)):
     """
     Processar e classificar email a partir de upload de arquivo
     """
@@ -21,37 +57,41 @@ async def process_file_email(file: UploadFile = File(...)):
     confidence = 0.5
     keywords = []
     extracted_text = ""
+    extracted_chars = 0
     detected_type = "unknown"
-    file_content = b""
+    file_size = 0
+    cache_hit = False
     
     try:
-        if not file.filename:
-            raise HTTPException(status_code=400, detail="Nome do arquivo não fornecido")
+        spool, file_size, content_hash = await read_upload(file)
         
-        file_content = await file.read()
+        # Classificação incremental, alimentada durante a extração
+        classifier = email_processor.stream_classifier()
+        try:
+            # Só o início do texto (a janela da geração) volta da extração
+            extracted_text, detected_type, cache_hit, extracted_chars = await asyncio.to_thread(
+                file_processor.process_file_cached, spool, file.filename, content_hash, classifier.feed
+            )
+        finally:
+            spool.close()
         
-        if len(file_content) > MAX_FILE_SIZE:
-            raise HTTPException(status_code=413, detail="Arquivo muito grande")
-        
-        if len(file_content) == 0:
-            raise HTTPException(status_code=400, detail="Arquivo vazio")
-        
-        extracted_text, detected_type = file_processor.process_file(file_content, file.filename)
-        
-        if extracted_text and len(extracted_text.strip()) >= 5:
-            category, confidence, keywords = email_processor.classify_email(extracted_text)
-            response_text = email_processor.generate_response(extracted_text, category, keywords)
+        if extracted_chars >= 5:
+            category, confidence, keywords = classifier.finish()
+            response_text, fallback = await email_processor.generate_response_async(
+                extracted_text, category, keywords, deadline
+            )
         else:
-            response_text = email_processor.generate_response("", category)
+            response_text, fallback = await email_processor.generate_response_async("", category)
         
         email_preview = extracted_text[:100] + '...' if len(extracted_text) > 100 else extracted_text
         
         file_info = {
             "filename": file.filename,
-            "size_bytes": len(file_content),
+            "size_bytes": file_size,
             "detected_type": detected_type,
-            "extracted_chars": len(extracted_text),
-            "success": bool(extracted_text and len(extracted_text) >= 5)
+            "extracted_chars": extracted_chars,
+            "success": bool(extracted_text and len(extracted_text) >= 5),
+            "cache_hit": cache_hit
         }
         
         logger.info(f"Arquivo processado - {file.filename} -> {category}")
@@ -62,7 +102,8 @@ async def process_file_email(file: UploadFile = File(...)):
             response=response_text,
             email_preview=email_preview,
             processed_keywords=keywords[:10] if keywords else None,
-            file_info=file_info
+            file_info=file_info,
+            fallback=fallback
         )
         
     except HTTPException:
@@ -70,7 +111,9 @@ async def process_file_email(file: UploadFile = File(...)):
     except Exception as e:
         logger.error(f"Erro no processamento de arquivo: {e}")
         
-        response_text = email_processor.generate_response(extracted_text, category, keywords)
+        response_text, fallback = await email_processor.generate_response_async(
+            extracted_text, category, keywords, deadline
+        )
         
         return EmailResponse(
             category=category,
@@ -80,10 +123,11 @@ async def process_file_email(file: UploadFile = File(...)):
             processed_keywords=keywords,
             file_info={
                 "filename": file.filename if file else "unknown",
-                "size_bytes": len(file_content),
+                "size_bytes": file_size,
                 "detected_type": detected_type,
-                "extracted_chars": len(extracted_text) if extracted_text else 0,
+                "extracted_chars": extracted_chars,
                 "success": False,
                 "error": str(e)
-            }
+            },
+            fallback=fallback
         )
\ No newline at end of file
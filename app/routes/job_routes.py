@@ -0,0 +1,62 @@
+"""
+Rotas de jobs assíncronos para arquivos grandes (enfileirar e consultar)
+"""
+from fastapi import APIRouter, HTTPException, File, UploadFile
+from datetime import datetime
+from ..models.schemas import JobCreatedResponse, JobStatusResponse
+from ..services.job_queue import job_queue, job_store, QueueFullError
+from .file_routes import read_upload
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter(tags=["Jobs"])
+
+def _timestamp(value):
+    return datetime.fromtimestamp(value) if value is not None else None
+
+@router.post("/jobs/process-file", response_model=JobCreatedResponse, status_code=202)
+async def create_file_job(file: UploadFile = File(...)):
+    """
+    Enfileirar um arquivo para processamento em background (mesmo resultado de /process-file)
+    """
+    spool, file_size, content_hash = await read_upload(file)
+    try:
+        content = spool.read()
+    finally:
+        spool.close()
+    
+    try:
+        job_id = await job_queue.submit(file.filename, content, content_hash)
+    except QueueFullError as e:
+        logger.warning(f"Job recusado - {file.filename}: {e}")
+        raise HTTPException(
+            status_code=503,
+            detail="Fila de processamento cheia, tente novamente em instantes",
+            headers={"Retry-After": "30"}
+        )
+    
+    logger.info(f"Job {job_id} enfileirado - {file.filename} ({file_size} bytes)")
+    return JobCreatedResponse(job_id=job_id, status="queued", status_url=f"/jobs/{job_id}")
+
+@router.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_file_job(job_id: str):
+    """
+    Consultar o status de um job e, quando concluído, o resultado
+    """
+    job = await asyncio.to_thread(job_store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado (inexistente ou expirado)")
+    
+    return JobStatusResponse(
+        job_id=job["id"],
+        status=job["status"],
+        filename=job["filename"],
+        size_bytes=job["size"],
+        attempts=job["attempts"],
+        result=job["result"],
+        error=job["error"],
+        created_at=_timestamp(job["created_at"]),
+        started_at=_timestamp(job["started_at"]),
+        finished_at=_timestamp(job["finished_at"])
+    )
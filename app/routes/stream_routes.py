@@ -0,0 +1,115 @@
+"""
+Rotas de processamento com resposta em streaming (Server-Sent Events)
+"""
+import asyncio
+import json
+import logging
+from typing import AsyncIterator, Optional
+from fastapi import APIRouter, HTTPException, File, UploadFile
+from fastapi.responses import StreamingResponse
+from ..models.schemas import EmailRequest
+from ..services.email_processor import email_processor
+from ..services.admission import llm_admission
+from ..config.settings import ADMISSION_POLICY
+from .file_routes import file_processor, read_upload
+
+logger = logging.getLogger(__name__)
+router = APIRouter(tags=["Streaming"])
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no"
+}
+
+def check_admission():
+    """
+    Com a política "reject", recusar com 503 antes de abrir o stream se a fila de
+    admissão já estiver cheia (depois do status enviado, só resta a resposta de template)
+    """
+    if ADMISSION_POLICY == "reject":
+        llm_admission.check()
+
+def format_sse(event: str, data: dict) -> str:
+    """Formatar um evento Server-Sent Events"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+async def stream_email_events(email_text: str, file_info: Optional[dict] = None,
+                              classification: Optional[tuple] = None) -> AsyncIterator[str]:
+    """Classificação como primeiro evento (calculada aqui se não vier pronta), seguida dos trechos da resposta"""
+    category, confidence, keywords = classification or email_processor.classify_email(email_text)
+
+    classification = {
+        "category": category,
+        "confidence": round(confidence, 2),
+        "processed_keywords": keywords[:10] if keywords else None,
+        "email_preview": email_text[:100] + '...' if len(email_text) > 100 else email_text
+    }
+    if file_info is not None:
+        classification["file_info"] = file_info
+    yield format_sse("classification", classification)
+
+    chunks = []
+    try:
+        async for chunk in email_processor.stream_response(email_text, category, keywords):
+            chunks.append(chunk)
+            yield format_sse("token", {"text": chunk})
+    except Exception as e:
+        logger.error(f"Erro no streaming da resposta: {e}")
+        yield format_sse("error", {"detail": "Erro interno no processamento"})
+        return
+
+    yield format_sse("done", {"response": "".join(chunks).strip()})
+    logger.info(f"Email processado (stream) - {category} ({confidence:.2f})")
+
+@router.post("/process-email/stream")
+async def process_email_stream(request: EmailRequest):
+    """
+    Processar email enviado como texto, com a resposta transmitida via SSE
+    """
+    email_text = request.email.strip()
+
+    if len(email_text) < 5:
+        raise HTTPException(status_code=422, detail="Texto muito curto")
+    check_admission()
+
+    return StreamingResponse(
+        stream_email_events(email_text),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
+@router.post("/process-file/stream")
+async def process_file_stream(file: UploadFile = File(...)):
+    """
+    Processar arquivo enviado, com a resposta transmitida via SSE
+    """
+    check_admission()
+    spool, file_size, content_hash = await read_upload(file)
+
+    classifier = email_processor.stream_classifier()
+    try:
+        extracted_text, detected_type, cache_hit, extracted_chars = await asyncio.to_thread(
+            file_processor.process_file_cached, spool, file.filename, content_hash, classifier.feed
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro no processamento de arquivo: {e}")
+        raise HTTPException(status_code=422, detail="Não foi possível extrair texto do arquivo")
+    finally:
+        spool.close()
+
+    file_info = {
+        "filename": file.filename,
+        "size_bytes": file_size,
+        "detected_type": detected_type,
+        "extracted_chars": extracted_chars,
+        "success": True,
+        "cache_hit": cache_hit
+    }
+
+    return StreamingResponse(
+        stream_email_events(extracted_text, file_info, classifier.finish()),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
@@ -1,12 +1,19 @@
 """
 Rotas utilitárias e de informação
 """
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Response
+from fastapi.responses import JSONResponse
 from datetime import datetime
 from ..models.schemas import HealthCheckResponse, OpenAITestResponse
 from ..services.openai_service import openai_service
+from ..services.admission import llm_admission
+from ..services.response_cache import response_cache
+from ..services.extraction_cache import extraction_cache
+from ..services.metrics import render_metrics
+from ..services.email_processor import email_processor
+from ..services.warmup import warmup
 from ..models.constants import ALLOWED_FILE_TYPES
-from ..config.settings import MAX_FILE_SIZE
+from ..config.settings import MAX_FILE_SIZE, METRICS_ENABLED
 import logging
 
 logger = logging.getLogger(__name__)
@@ -23,39 +30,62 @@ async def root():
         "endpoints": {
             "docs": "/docs",
             "process_email": "/process-email",
+            "process_emails": "/process-emails",
             "process_file": "/process-file",
+            "process_email_stream": "/process-email/stream",
+            "process_file_stream": "/process-file/stream",
+            "process_file_job": "/jobs/process-file",
+            "job_status": "/jobs/{job_id}",
             "health": "/health",
-            "test_openai": "/test-openai"
+            "ready": "/ready",
+            "test_openai": "/test-openai",
+            "cache_stats": "/cache-stats",
+            "metrics": "/metrics"
         }
     }
 
 @router.get("/health", response_model=HealthCheckResponse)
 async def health_check():
-    """Health check da aplicação"""
+    """Health check da aplicação (degraded com o circuito da OpenAI aberto ou a fila de admissão cheia)"""
+    circuit = openai_service.circuit_status()
+    healthy = circuit["state"] in ("closed", "disabled") and not llm_admission.saturated()
     return {
-        "status": "healthy",
+        "status": "healthy" if healthy else "degraded",
         "openai_configured": openai_service.is_configured(),
-        "nltk_ready": True,
+        "nltk_ready": email_processor.nlp_ready,
         "file_processing": "enabled",
+        "openai_circuit": circuit,
+        "admission": llm_admission.snapshot(),
         "timestamp": datetime.utcnow().isoformat() + "Z"
     }
 
+@router.get("/ready")
+async def readiness():
+    """Readiness probe: 503 até o aquecimento deste worker terminar, com os tempos de importação e aquecimento"""
+    status = warmup.snapshot()
+    if not warmup.ready:
+        return JSONResponse(status_code=503, content=status)
+    return status
+
 @router.get("/test-openai", response_model=OpenAITestResponse)
 async def test_openai():
     """Testar conexão com OpenAI"""
     try:
-        result = openai_service.test_connection()
+        result = await openai_service.test_connection_async()
         return {
             "status": result["status"],
+            "message": result.get("message"),
             "response": result.get("response"),
             "openai_configured": openai_service.is_configured(),
-            "model": result.get("model")
+            "model": result.get("model"),
+            "circuit": openai_service.circuit_status()
         }
     except Exception as e:
         return {
             "status": "error",
             "message": str(e),
-            "openai_configured": openai_service.is_configured()
+            "openai_configured": openai_service.is_configured(),
+            "circuit": openai_service.circuit_status()
         }
 
 @router.get("/supported-formats")
@@ -65,4 +95,20 @@ async def get_supported_formats():
         "supported_formats": ALLOWED_FILE_TYPES,
         "max_file_size_mb": MAX_FILE_SIZE / 1024 / 1024,
         "description": "Formatos suportados para upload de arquivo"
-    }
\ No newline at end of file
+    }
+
+@router.get("/cache-stats")
+async def get_cache_stats():
+    """Estatísticas dos caches de respostas geradas e de extração de arquivos"""
+    return {
+        "responses": response_cache.stats(),
+        "extractions": extraction_cache.stats()
+    }
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Métricas no formato Prometheus"""
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Métricas desativadas")
+    content, content_type = render_metrics()
+    return Response(content=content, media_type=content_type)
@@ -0,0 +1,175 @@
+"""
+Controle de admissão: limite de chamadas simultâneas à OpenAI com fila de espera
+limitada, e limite de requisições por cliente (token bucket)
+"""
+import asyncio
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Optional
+from fastapi import HTTPException
+from .metrics import record_admission, record_shed
+from ..config.settings import (
+    ADMISSION_MAX_CONCURRENT, ADMISSION_MAX_QUEUE, ADMISSION_QUEUE_TIMEOUT,
+    RATE_LIMIT_PER_MINUTE, RATE_LIMIT_BURST, RATE_LIMIT_MAX_CLIENTS
+)
+
+logger = logging.getLogger(__name__)
+
+class AdmissionRejected(HTTPException):
+    """Requisição recusada por sobrecarga (503) ou por limite do cliente (429), com Retry-After"""
+
+    def __init__(self, reason: str, retry_after: float, status_code: int = 503):
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+        detail = "Limite de requisições excedido" if status_code == 429 else "Serviço sobrecarregado, tente novamente"
+        super().__init__(status_code=status_code, detail=detail, headers={"Retry-After": str(self.retry_after)})
+
+class ConcurrencyLimiter:
+    """
+    Até max_concurrent chamadas ao mesmo tempo; as excedentes esperam em ordem de
+    chegada, com no máximo max_queue na fila e por até queue_timeout segundos. Sem
+    espaço na fila a chamada é recusada na hora, para que as admitidas mantenham a
+    latência estável em vez de a fila crescer sem limite
+    """
+
+    def __init__(self, name: str, max_concurrent: int = ADMISSION_MAX_CONCURRENT,
+                 max_queue: int = ADMISSION_MAX_QUEUE, queue_timeout: float = ADMISSION_QUEUE_TIMEOUT):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self._waiters = deque()
+        # Média móvel da duração de uma chamada, para estimar o Retry-After
+        self._hold_seconds = 1.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_concurrent > 0
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def retry_after(self) -> float:
+        """Tempo estimado até a fila atual ser atendida"""
+        return self._hold_seconds * (self.queued / max(1, self.max_concurrent) + 1)
+
+    def saturated(self) -> bool:
+        """Fila cheia: uma nova chamada seria recusada agora"""
+        return self.enabled and self.active >= self.max_concurrent and self.queued >= self.max_queue
+
+    def _reject(self, reason: str) -> AdmissionRejected:
+        record_shed(reason)
+        logger.warning(f"Admissão {self.name}: chamada recusada ({reason}, {self.active} em andamento, "
+                       f"{self.queued} na fila)")
+        return AdmissionRejected(reason, self.retry_after())
+
+    def check(self):
+        """Recusar já, antes de começar o trabalho, se a fila estiver cheia"""
+        if self.saturated():
+            raise self._reject("queue_full")
+
+    async def acquire(self, timeout: Optional[float] = None):
+        """Ocupar uma vaga, esperando na fila se preciso (AdmissionRejected se não houver)"""
+        if not self.enabled:
+            return
+        if self.active < self.max_concurrent and not self._waiters:
+            self.active += 1
+            record_admission(self.active, self.queued)
+            return
+        if self.queued >= self.max_queue:
+            raise self._reject("queue_full")
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        record_admission(self.active, self.queued)
+        wait = self.queue_timeout if timeout is None else min(timeout, self.queue_timeout)
+        try:
+            # A vaga é repassada por release(), sem passar por active
+            await asyncio.wait_for(future, wait)
+        except asyncio.TimeoutError:
+            raise self._reject("queue_timeout")
+        except BaseException:
+            if future.done() and not future.cancelled():
+                # Vaga recebida junto com o cancelamento: passa para o próximo
+                self.release()
+            raise
+        finally:
+            if future in self._waiters:
+                self._waiters.remove(future)
+            record_admission(self.active, self.queued)
+
+    def release(self):
+        """Liberar a vaga (para o primeiro da fila, se houver)"""
+        if not self.enabled:
+            return
+        while self._waiters:
+            future = self._waiters.popleft()
+            if not future.done():
+                future.set_result(None)
+                record_admission(self.active, self.queued)
+                return
+        self.active -= 1
+        record_admission(self.active, self.queued)
+
+    @asynccontextmanager
+    async def slot(self, timeout: Optional[float] = None):
+        """Executar o bloco ocupando uma vaga"""
+        await self.acquire(timeout)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self._hold_seconds = 0.8 * self._hold_seconds + 0.2 * (time.monotonic() - start)
+            self.release()
+
+    def snapshot(self) -> dict:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "queued": self.queued
+        }
+
+class TokenBucketLimiter:
+    """
+    Token bucket por cliente: rate_per_minute fichas por minuto, acumulando até burst.
+    Os clientes menos recentes são esquecidos acima de max_clients
+    """
+
+    def __init__(self, rate_per_minute: float = RATE_LIMIT_PER_MINUTE, burst: int = RATE_LIMIT_BURST,
+                 max_clients: int = RATE_LIMIT_MAX_CLIENTS):
+        self.rate = rate_per_minute / 60
+        self.burst = max(1, burst)
+        self.max_clients = max_clients
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def take(self, client: str) -> float:
+        """Consumir uma ficha do cliente. Retorna 0 se permitido, ou os segundos até a próxima ficha"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(client, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated_at) * self.rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / self.rate
+            self._buckets[client] = (tokens, now)
+            while len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        return wait
+
+# Instâncias globais
+llm_admission = ConcurrencyLimiter("openai")
+client_rate_limiter = TokenBucketLimiter()
@@ -0,0 +1,130 @@
+"""
+Circuit breaker para chamadas a serviços externos (taxa de falhas em janela deslizante)
+"""
+import logging
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+class CircuitOpenError(Exception):
+    """Chamada recusada sem tentativa: o circuito está aberto"""
+
+class CircuitBreaker:
+    """
+    Fechado: as chamadas passam e os resultados entram na janela deslizante.
+    Aberto: as chamadas são recusadas até o fim do intervalo de espera.
+    Meio aberto: algumas chamadas de teste passam; se todas derem certo o circuito
+    fecha, e qualquer falha o abre novamente
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, window_seconds: float = 60, min_calls: int = 10,
+                 failure_rate: float = 0.5, open_seconds: float = 30, half_open_calls: int = 3,
+                 on_state_change=None):
+        self.name = name
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self.on_state_change = on_state_change
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self._events = deque()
+        self._failures = 0
+        self._trials = 0
+        self._trial_successes = 0
+        self._lock = threading.Lock()
+
+    def _set_state(self, state: str):
+        if state == self.state:
+            return
+        log = logger.warning if state == self.OPEN else logger.info
+        log(f"Circuito {self.name}: {self.state} -> {state}")
+        self.state = state
+        if self.on_state_change is not None:
+            self.on_state_change(state)
+
+    def _prune(self, now: float):
+        """Descartar eventos fora da janela"""
+        while self._events and self._events[0][0] < now - self.window_seconds:
+            _, failed = self._events.popleft()
+            self._failures -= failed
+
+    def _open(self, now: float):
+        self.opened_at = now
+        self._trials = 0
+        self._trial_successes = 0
+        self._set_state(self.OPEN)
+
+    def allow(self) -> bool:
+        """Verificar se uma chamada pode ser feita agora (reserva uma vaga de teste se meio aberto)"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.open_seconds:
+                    return False
+                self._set_state(self.HALF_OPEN)
+
+            if self._trials >= self.half_open_calls:
+                return False
+            self._trials += 1
+            return True
+
+    def record_success(self):
+        with self._lock:
+            now = time.monotonic()
+            if self.state == self.HALF_OPEN:
+                self._trial_successes += 1
+                if self._trial_successes >= self.half_open_calls:
+                    self._events.clear()
+                    self._failures = 0
+                    self._set_state(self.CLOSED)
+                return
+
+            self._prune(now)
+            self._events.append((now, 0))
+
+    def record_failure(self):
+        with self._lock:
+            now = time.monotonic()
+            if self.state == self.HALF_OPEN:
+                self._open(now)
+                return
+
+            self._prune(now)
+            self._events.append((now, 1))
+            self._failures += 1
+            if (self.state == self.CLOSED and len(self._events) >= self.min_calls
+                    and self._failures / len(self._events) >= self.failure_rate):
+                self._open(now)
+
+    def release(self):
+        """Devolver a vaga de uma chamada de teste interrompida sem resultado"""
+        with self._lock:
+            if self.state == self.HALF_OPEN and self._trials > self._trial_successes:
+                self._trials -= 1
+
+    def snapshot(self) -> dict:
+        """Estado atual para health checks e diagnóstico"""
+        with self._lock:
+            now = time.monotonic()
+            self._prune(now)
+            calls = len(self._events)
+            retry_in: Optional[float] = None
+            if self.state == self.OPEN:
+                retry_in = round(max(0.0, self.opened_at + self.open_seconds - now), 1)
+            return {
+                "state": self.state,
+                "window_calls": calls,
+                "window_failure_rate": round(self._failures / calls, 4) if calls else 0.0,
+                "retry_in_seconds": retry_in
+            }
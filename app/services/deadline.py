@@ -0,0 +1,46 @@
+"""
+Prazo de latência por requisição, contado desde a chegada da requisição
+"""
+import time
+from typing import Optional
+from fastapi import Request
+from ..config.settings import REQUEST_DEADLINE, REQUEST_DEADLINE_MAX
+
+DEADLINE_HEADER = "X-Request-Deadline"
+
+class Deadline:
+    """Prazo absoluto (relógio monotônico); sem orçamento, nunca expira"""
+
+    def __init__(self, budget: Optional[float]):
+        self.budget = budget
+        self.expires_at = time.monotonic() + budget if budget else None
+
+    def remaining(self) -> Optional[float]:
+        """Segundos restantes (None se não há prazo)"""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+def parse_budget(header_value: Optional[str]) -> Optional[float]:
+    """Orçamento em segundos a partir do cabeçalho (ou o padrão global)"""
+    if header_value is None:
+        return REQUEST_DEADLINE or None
+
+    try:
+        budget = float(header_value)
+    except ValueError:
+        raise ValueError(f"{DEADLINE_HEADER} deve ser um número de segundos")
+    if not 0 < budget <= REQUEST_DEADLINE_MAX:
+        raise ValueError(f"{DEADLINE_HEADER} deve estar entre 0 e {REQUEST_DEADLINE_MAX:g} segundos")
+    return budget
+
+def request_deadline(request: Request) -> Deadline:
+    """Dependência das rotas: prazo criado pelo DeadlineMiddleware na chegada da requisição"""
+    deadline = getattr(request.state, "deadline", None)
+    if deadline is None:
+        deadline = Deadline(parse_budget(request.headers.get(DEADLINE_HEADER)))
+    return deadline
@@ -0,0 +1,83 @@
+"""
+Extração de texto de DOCX em streaming: word/document.xml é descomprimido e
+analisado aos poucos (iterparse), sem carregar o XML inteiro na memória
+"""
+import logging
+import zipfile
+from typing import BinaryIO, Iterator
+from xml.etree.ElementTree import iterparse
+from ..config.settings import DOCX_MAX_CHARS, STREAM_CLASSIFY_CHUNK_CHARS
+
+logger = logging.getLogger(__name__)
+
+DOCUMENT_PART = "word/document.xml"
+W_NAMESPACE = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+TEXT_TAG = f"{W_NAMESPACE}t"
+PARAGRAPH_TAG = f"{W_NAMESPACE}p"
+TAB_TAG = f"{W_NAMESPACE}tab"
+BREAK_TAGS = (f"{W_NAMESPACE}br", f"{W_NAMESPACE}cr")
+
+class DocxExtractor:
+    """
+    Texto do corpo do documento com a mesma formatação do docx2txt (parágrafos
+    separados por linha em branco, tabulações e quebras de linha), sem cabeçalhos,
+    rodapés e imagens. Cada elemento é descartado assim que termina, então a memória
+    não cresce com o tamanho do documento. Com max_chars, a leitura para assim que
+    o limite de caracteres é atingido
+    """
+
+    def __init__(self, max_chars: int = DOCX_MAX_CHARS):
+        self.max_chars = max_chars
+
+    def iter_text(self, source: BinaryIO, chunk_chars: int = STREAM_CLASSIFY_CHUNK_CHARS) -> Iterator[str]:
+        """Texto do documento em blocos de cerca de chunk_chars caracteres, à medida que é lido"""
+        source.seek(0)
+        buffer = []
+        buffered = 0
+        written = 0
+        limit = self.max_chars or None
+
+        with zipfile.ZipFile(source) as archive, archive.open(DOCUMENT_PART) as document:
+            stack = []
+            for event, element in iterparse(document, events=("start", "end")):
+                if event == "start":
+                    stack.append(element)
+                    tag = element.tag
+                    if tag == PARAGRAPH_TAG:
+                        piece = "\n\n"
+                    elif tag == TAB_TAG:
+                        piece = "\t"
+                    elif tag in BREAK_TAGS:
+                        piece = "\n"
+                    else:
+                        continue
+                else:
+                    stack.pop()
+                    text = element.text if element.tag == TEXT_TAG else None
+                    # Elemento concluído: sai da árvore (o pai só guarda o filho atual)
+                    element.clear()
+                    if stack:
+                        stack[-1].remove(element)
+                    if not text:
+                        continue
+                    piece = text
+
+                if limit is not None and written + len(piece) >= limit:
+                    buffer.append(piece[:limit - written])
+                    logger.info(f"Extração de DOCX interrompida em {limit} caracteres")
+                    break
+                buffer.append(piece)
+                buffered += len(piece)
+                written += len(piece)
+                if buffered >= chunk_chars:
+                    yield "".join(buffer)
+                    buffer, buffered = [], 0
+
+        if buffer:
+            yield "".join(buffer)
+
+    def extract(self, source: BinaryIO) -> str:
+        return "".join(self.iter_text(source)).strip()
+
+# Instância global
+docx_extractor = DocxExtractor()
@@ -2,73 +2,123 @@
 Serviço principal para processamento e classificação de emails
 """
 import re
+import time
 import logging
-import nltk
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-from nltk.stem import PorterStemmer
+from functools import cached_property, lru_cache
+from typing import AsyncIterator, Optional
 from .openai_service import openai_service
-from ..models.constants import PRODUCTIVE_KEYWORDS, UNPRODUCTIVE_KEYWORDS, KEYWORD_WEIGHTS
+from .circuit_breaker import CircuitOpenError
+from .admission import AdmissionRejected, llm_admission
+from .keyword_matcher import keyword_matcher
+from .scoring_engine import scoring_engine
+from .stream_classifier import StreamClassifier, iter_chunks
+from .prompt_builder import prompt_builder
+from .response_cache import response_cache
+from .metrics import track_stage, observe_stage, record_fallback
+from .deadline import Deadline
+from .single_flight import SingleFlight
+from .nlp_resources import load_nlp_bundle, load_nltk_stopwords, keyword_lexicon, punkt_available
+from ..models.constants import CONTEXT_KEYWORDS
+from ..config.settings import STEM_CACHE_SIZE, DEADLINE_CACHE_LATE_RESPONSES, ADMISSION_POLICY
 
 logger = logging.getLogger(__name__)
 
+# Caracteres removidos antes da tokenização
+NON_LETTER_PATTERN = re.compile(r'[^a-zA-Záàâãéèêíïóôõöúçñ\s]')
+
+# Contrações que o word_tokenize (Treebank) separa em texto sem pontuação
+CONTRACTIONS_PATTERN = re.compile(
+    r'(?i)\b(can(?=not\b)|gim(?=me\b)|gon(?=na\b)|got(?=ta\b)|lem(?=me\b)|wan(?=na\b))'
+)
+
 class EmailProcessor:
     """Processador de emails para classificação e geração de respostas"""
     
     def __init__(self):
-        self.stemmer = PorterStemmer()
-        self.stop_words = self._load_stopwords()
+        self._stemmer = None
+        self.stem = lru_cache(maxsize=STEM_CACHE_SIZE)(self._stem_word)
+        # Chamadas à OpenAI em andamento, por chave do cache de respostas
+        self.in_flight = SingleFlight("generate_response")
+    
+    # Recursos de NLP carregados no primeiro uso (ou no aquecimento), e não na importação:
+    # sem o bundle, o fallback importa o NLTK e pode tentar baixar os dados
+    @cached_property
+    def nlp_bundle(self):
+        return load_nlp_bundle()
+    
+    @cached_property
+    def stop_words(self):
+        return self._load_stopwords()
+    
+    @cached_property
+    def keywords(self):
+        return self.nlp_bundle["keywords"] if self.nlp_bundle else keyword_lexicon()
+    
+    @cached_property
+    def has_punkt(self) -> bool:
+        """Resolvido uma vez por processo, e não a cada email"""
+        return self._ensure_punkt()
+    
+    def load_nlp_resources(self):
+        """Carregar já os recursos de NLP (aquecimento)"""
+        return self.stop_words, self.keywords, self.has_punkt
+    
+    @property
+    def nlp_ready(self) -> bool:
+        """Recursos de NLP carregados (bundle ou NLTK/fallback manual)"""
+        return all(name in self.__dict__ for name in ("stop_words", "keywords", "has_punkt"))
+    
+    @property
+    def stemmer(self):
+        """PorterStemmer carregado sob demanda (o NLTK não é importado na inicialização)"""
+        if self._stemmer is None:
+            from nltk.stem import PorterStemmer
+            self._stemmer = PorterStemmer()
+        return self._stemmer
     
     def _load_stopwords(self):
-        """Carregar stopwords com fallback robusto"""
+        """Carregar stopwords do bundle pré-compilado, com fallback para o NLTK"""
+        if self.nlp_bundle is not None:
+            return self.nlp_bundle["stopwords"]
+        
+        stop_words, _ = load_nltk_stopwords()
+        return stop_words
+    
+    def _ensure_punkt(self) -> bool:
+        """Garante que o tokenizer punkt está disponível"""
+        if self.nlp_bundle is not None:
+            return self.nlp_bundle["punkt_available"]
+        return punkt_available()
+    
+    def _stem_word(self, word: str) -> str:
+        """Radical de uma palavra (memoizado em self.stem)"""
+        return self.stemmer.stem(word)
+    
+    def _filter_tokens(self, text: str) -> list[str]:
+        """Tokenizar texto já normalizado e remover stopwords e palavras curtas"""
+        if self.has_punkt:
+            # Equivalente ao word_tokenize para texto só com letras e espaços
+            text = CONTRACTIONS_PATTERN.sub(r'\1 ', text)
+        stop_words = self.stop_words
+        return [word for word in text.split() if len(word) > 2 and word not in stop_words]
+    
+    def extract_keywords(self, text: str) -> list[str]:
+        """Extrair palavras-chave sem stemming (caminho rápido da classificação)"""
+        keywords = []
+        
         try:
-            # Tenta baixar stopwords se não estiverem disponíveis
-            try:
-                nltk.data.find('corpora/stopwords')
-            except LookupError:
-                nltk.download('stopwords', quiet=True)
+            if not text or not isinstance(text, str):
+                return keywords
+            
+            text = NON_LETTER_PATTERN.sub(' ', text.lower())
+            keywords = [word for word in self._filter_tokens(text) if word in self.keywords]
             
-            # Tenta português primeiro
-            return set(stopwords.words('portuguese'))
         except Exception as e:
-            logger.warning(f"Stopwords português não disponíveis: {e}")
-            try:
-                # Fallback para inglês
-                return set(stopwords.words('english'))
-            except Exception as e2:
-                logger.warning(f"Stopwords inglês não disponíveis: {e2}")
-                # Fallback manual se tudo falhar
-                return self._get_manual_stopwords()
-    
-    def _get_manual_stopwords(self):
-        """Stopwords manuais como fallback absoluto"""
-        portuguese_stopwords = {
-            'a', 'ao', 'aos', 'aquela', 'aquelas', 'aquele', 'aqueles', 'aquilo', 'as', 'até', 
-            'com', 'como', 'da', 'das', 'de', 'dela', 'delas', 'dele', 'deles', 'depois', 
-            'do', 'dos', 'e', 'ela', 'elas', 'ele', 'eles', 'em', 'entre', 'era', 'eram', 
-            'é', 'essa', 'essas', 'esse', 'esses', 'esta', 'estas', 'este', 'estes', 'eu', 
-            'foi', 'foram', 'há', 'isso', 'isto', 'já', 'lhe', 'lhes', 'mais', 'mas', 'me', 
-            'mesmo', 'meu', 'meus', 'minha', 'minhas', 'muito', 'na', 'nas', 'no', 'nos', 
-            'nós', 'nossa', 'nossas', 'nosso', 'nossos', 'num', 'numa', 'o', 'os', 'ou', 
-            'para', 'pela', 'pelas', 'pelo', 'pelos', 'por', 'quando', 'que', 'quem', 'se', 
-            'sem', 'seu', 'seus', 'só', 'sua', 'suas', 'também', 'te', 'tem', 'têm', 'teu', 
-            'teus', 'tu', 'tua', 'tuas', 'um', 'uma', 'você', 'vocês', 'vos', 'para', 'é',
-            'ser', 'estar', 'tem', 'ter', 'foi', 'são', 'como', 'mas', 'já', 'ou', 'se',
-            'não', 'sim', 'também', 'muito', 'pouco', 'mais', 'menos', 'bem', 'mal', 'agora',
-            'depois', 'antes', 'sempre', 'nunca', 'hoje', 'ontem', 'amanhã'
-        }
-        logger.info("Usando stopwords manuais - NLTK não disponível")
-        return portuguese_stopwords
-    
-    def _ensure_punkt(self):
-        """Garante que o tokenizer punkt está disponível"""
-        try:
-            nltk.data.find('tokenizers/punkt')
-        except LookupError:
-            try:
-                nltk.download('punkt', quiet=True)
-            except Exception as e:
-                logger.warning(f"Punkt tokenizer não disponível: {e}")
+            logger.error(f"Erro na extração de palavras-chave: {e}")
+            if text:
+                keywords = [word for word in text.lower().split() if word in self.keywords]
+        
+        return keywords
     
     def preprocess_text(self, text: str) -> tuple[str, list[str]]:
         """Pré-processar texto e extrair palavras-chave"""
@@ -79,31 +129,16 @@ class EmailProcessor:
             if not text or not isinstance(text, str):
                 return processed_text, keywords
             
-            # Garante que o punkt está disponível
-            self._ensure_punkt()
-            
-            text = text.lower()
-            text = re.sub(r'[^a-zA-Záàâãéèêíïóôõöúçñ\s]', ' ', text)
-            
-            # Tenta tokenização com fallback
-            try:
-                tokens = word_tokenize(text)
-            except Exception as tokenize_error:
-                logger.warning(f"Tokenização falhou, usando split simples: {tokenize_error}")
-                tokens = text.split()
-            
-            filtered_tokens = [
-                word for word in tokens 
-                if word not in self.stop_words and len(word) > 2
-            ]
+            text = NON_LETTER_PATTERN.sub(' ', text.lower())
+            filtered_tokens = self._filter_tokens(text)
             
             keywords = [
                 word for word in filtered_tokens 
-                if word in PRODUCTIVE_KEYWORDS or word in UNPRODUCTIVE_KEYWORDS
+                if word in self.keywords
             ]
             
-            stemmed_tokens = [self.stemmer.stem(word) for word in filtered_tokens]
-            processed_text = ' '.join(stemmed_tokens)
+            stem = self.stem
+            processed_text = ' '.join([stem(word) for word in filtered_tokens])
             
         except Exception as e:
             logger.error(f"Erro no pré-processamento: {e}")
@@ -112,12 +147,13 @@ class EmailProcessor:
                 text_lower = text.lower()
                 keywords = [
                     word for word in text_lower.split() 
-                    if word in PRODUCTIVE_KEYWORDS or word in UNPRODUCTIVE_KEYWORDS
+                    if word in self.keywords
                 ]
                 processed_text = text_lower
         
         return processed_text, keywords
     
+    @track_stage("classify_email")
     def classify_email(self, email_text: str) -> tuple[str, float, list[str]]:
         """Classificar email em Produtivo/Improdutivo"""
         category = "Improdutivo"
@@ -128,40 +164,8 @@ class EmailProcessor:
             if not email_text or len(email_text.strip()) < 5:
                 return category, confidence, keywords
             
-            _, keywords = self.preprocess_text(email_text)
-            email_lower = email_text.lower()
-            
-            productive_score = 0
-            unproductive_score = 0
-            
-            for word in PRODUCTIVE_KEYWORDS:
-                count = email_lower.count(word)
-                weight = KEYWORD_WEIGHTS.get(word, 1.2)
-                productive_score += count * weight
-            
-            for word in UNPRODUCTIVE_KEYWORDS:
-                count = email_lower.count(word)
-                weight = KEYWORD_WEIGHTS.get(word, 1.0)
-                unproductive_score += count * weight
-            
-            total_score = productive_score + unproductive_score
-            
-            if total_score == 0:
-                if any(word in email_lower for word in ['reunião', 'projeto', 'relatório', 'prazo', 'entreg']):
-                    category, confidence = "Produtivo", 0.6
-                else:
-                    category, confidence = "Improdutivo", 0.55
-            else:
-                ratio = productive_score / total_score
-                
-                if ratio > 0.6:
-                    category, confidence = "Produtivo", min(0.95, 0.7 + (ratio - 0.6) * 2)
-                elif ratio > 0.4:
-                    category, confidence = "Produtivo", 0.6 + (ratio - 0.4) * 0.5
-                elif ratio > 0.3:
-                    category, confidence = "Improdutivo", 0.55
-                else:
-                    category, confidence = "Improdutivo", min(0.95, 0.7 + (0.3 - ratio) * 2)
+            keywords = self.extract_keywords(email_text)
+            category, confidence = scoring_engine.predict_one(email_text)
             
             return category, confidence, keywords
             
@@ -169,16 +173,56 @@ class EmailProcessor:
             logger.error(f"Erro na classificação: {e}")
             return category, confidence, keywords
     
+    def stream_classifier(self, **options) -> StreamClassifier:
+        """Classificador incremental para um texto recebido em trechos (ver StreamClassifier)"""
+        return StreamClassifier(keyword_extractor=self.extract_keywords, **options)
+    
+    def classify_stream(self, chunks, **options) -> tuple[str, float, list[str]]:
+        """Classificar um texto (ou seus trechos) de forma incremental, com parada antecipada"""
+        if isinstance(chunks, str):
+            chunks = iter_chunks(chunks)
+        return self.stream_classifier(**options).classify(chunks)
+    
+    @track_stage("classify_batch")
+    def classify_emails(self, email_texts: list[str]) -> list[tuple[str, float, list[str]]]:
+        """Classificar um lote de emails, pontuando o lote inteiro de uma vez"""
+        results = [("Improdutivo", 0.5, []) for _ in email_texts]
+        valid_indexes = [
+            i for i, email_text in enumerate(email_texts)
+            if isinstance(email_text, str) and len(email_text.strip()) >= 5
+        ]
+        
+        try:
+            predictions = scoring_engine.predict([email_texts[i] for i in valid_indexes])
+            for i, (category, confidence) in zip(valid_indexes, predictions):
+                results[i] = (category, confidence, self.extract_keywords(email_texts[i]))
+            return results
+            
+        except Exception as e:
+            logger.error(f"Erro na classificação em lote: {e}")
+            return [self.classify_email(email_text) for email_text in email_texts]
+    
     def generate_response(self, email_text: str, category: str, keywords: list[str] = None) -> str:
         """Gerar resposta automática"""
-        if not email_text or len(email_text.strip()) < 5:
+        email_text = prompt_builder.window(email_text or "")
+        if len(email_text.strip()) < 5:
             return self._get_fallback_response(category)
         
         try:
             if openai_service.is_configured():
-                prompt = self._build_contextual_prompt(email_text, category, keywords)
                 system_prompt = self._get_system_prompt(category)
-                return openai_service.generate_response(prompt, system_prompt)
+                cache_key = response_cache.make_key(email_text, category, system_prompt)
+                cached_response = response_cache.get(cache_key)
+                if cached_response is not None:
+                    return cached_response
+                
+                prompt = self._build_contextual_prompt(email_text, category, keywords)
+                start = time.perf_counter()
+                response = openai_service.generate_response(prompt, system_prompt)
+                elapsed = time.perf_counter() - start
+                observe_stage("generate_response_llm", elapsed)
+                response_cache.set(cache_key, response, elapsed)
+                return response
             else:
                 return self._get_contextual_fallback_response(email_text, category, keywords)
                 
@@ -186,6 +230,135 @@ class EmailProcessor:
             logger.error(f"Erro na geração de resposta: {e}")
             return self._get_contextual_fallback_response(email_text, category, keywords)
     
+    async def generate_response_async(self, email_text: str, category: str, keywords: list[str] = None,
+                                      deadline: Optional[Deadline] = None,
+                                      overload_policy: Optional[str] = None) -> tuple[str, bool]:
+        """
+        Gerar resposta automática sem bloquear o event loop, dentro do prazo da requisição.
+        Retorna (resposta, fallback), com fallback=True quando a resposta é de template.
+        Sem vaga no controle de admissão, a política "reject" (padrão: ADMISSION_POLICY)
+        propaga AdmissionRejected (503). Só o início de textos longos (a janela do prompt)
+        é usado na chave do cache, no prompt e na resposta de template
+        """
+        email_text = prompt_builder.window(email_text or "")
+        if len(email_text.strip()) < 5:
+            record_fallback("short_text")
+            return self._get_fallback_response(category), True
+        
+        try:
+            if openai_service.is_configured():
+                system_prompt = self._get_system_prompt(category)
+                cache_key = response_cache.make_key(email_text, category, system_prompt)
+                cached_response = await response_cache.get_async(cache_key)
+                if cached_response is not None:
+                    return cached_response, False
+                
+                prompt = self._build_contextual_prompt(email_text, category, keywords)
+                response = await self._generate_within_deadline(prompt, system_prompt, cache_key, deadline)
+                if response is not None:
+                    return response, False
+                
+                if deadline is not None and deadline.budget:
+                    logger.warning(f"Prazo de {deadline.budget:g}s esgotado - usando resposta de template")
+                    record_fallback("deadline")
+                else:
+                    # Sem prazo, só chega aqui se a chamada compartilhada foi cancelada
+                    logger.warning("Chamada à OpenAI cancelada - usando resposta de template")
+                    record_fallback("cancelled")
+            else:
+                record_fallback("not_configured")
+            return self._get_contextual_fallback_response(email_text, category, keywords), True
+                
+        except AdmissionRejected:
+            if (overload_policy or ADMISSION_POLICY) == "reject":
+                raise
+            record_fallback("overload")
+            return self._get_contextual_fallback_response(email_text, category, keywords), True
+        except CircuitOpenError:
+            record_fallback("circuit_open")
+            return self._get_contextual_fallback_response(email_text, category, keywords), True
+        except Exception as e:
+            logger.error(f"Erro na geração de resposta: {e}")
+            record_fallback("openai_error")
+            return self._get_contextual_fallback_response(email_text, category, keywords), True
+    
+    async def _generate_llm(self, prompt: str, system_prompt: str, cache_key: str) -> str:
+        """Chamar a OpenAI (com vaga no controle de admissão) e guardar a resposta no cache"""
+        start = time.perf_counter()
+        async with llm_admission.slot():
+            observe_stage("admission_wait", time.perf_counter() - start)
+            start = time.perf_counter()
+            response = await openai_service.generate_response_async(prompt, system_prompt)
+        elapsed = time.perf_counter() - start
+        observe_stage("generate_response_llm", elapsed)
+        await response_cache.set_async(cache_key, response, elapsed)
+        return response
+    
+    async def _generate_within_deadline(self, prompt: str, system_prompt: str, cache_key: str,
+                                        deadline: Optional[Deadline]) -> Optional[str]:
+        """
+        Resposta da OpenAI, ou None se o prazo acabar antes dela. Requisições idênticas
+        simultâneas (mesma chave do cache) compartilham uma única chamada
+        """
+        remaining = deadline.remaining() if deadline is not None else None
+        if remaining == 0 and not DEADLINE_CACHE_LATE_RESPONSES and not self.in_flight.running(cache_key):
+            return None
+        
+        task = await self.in_flight.wait(
+            cache_key,
+            lambda: self._generate_llm(prompt, system_prompt, cache_key),
+            timeout=remaining
+        )
+        if task.done():
+            return None if task.cancelled() else task.result()
+        
+        # Com DEADLINE_CACHE_LATE_RESPONSES a chamada continua e a resposta vai para o cache
+        if not DEADLINE_CACHE_LATE_RESPONSES:
+            self.in_flight.abandon(cache_key, task)
+        return None
+    
+    async def stream_response(self, email_text: str, category: str, keywords: list[str] = None) -> AsyncIterator[str]:
+        """Gerar resposta automática em trechos, à medida que a OpenAI responde"""
+        email_text = prompt_builder.window(email_text or "")
+        if len(email_text.strip()) < 5:
+            yield self._get_fallback_response(category)
+            return
+        
+        if not openai_service.is_configured():
+            yield self._get_contextual_fallback_response(email_text, category, keywords)
+            return
+        
+        system_prompt = self._get_system_prompt(category)
+        cache_key = response_cache.make_key(email_text, category, system_prompt)
+        cached_response = await response_cache.get_async(cache_key)
+        if cached_response is not None:
+            yield cached_response
+            return
+        
+        prompt = self._build_contextual_prompt(email_text, category, keywords)
+        chunks = []
+        
+        try:
+            async with llm_admission.slot():
+                start = time.perf_counter()
+                async for chunk in openai_service.stream_response_async(prompt, system_prompt):
+                    chunks.append(chunk)
+                    yield chunk
+        except AdmissionRejected:
+            # O status já foi enviado: sem vaga, a resposta é a de template
+            record_fallback("overload")
+            yield self._get_contextual_fallback_response(email_text, category, keywords)
+            return
+        except Exception as e:
+            logger.error(f"Erro no streaming de resposta: {e}")
+            if not chunks:
+                yield self._get_contextual_fallback_response(email_text, category, keywords)
+            return
+        
+        elapsed = time.perf_counter() - start
+        observe_stage("generate_response_llm", elapsed)
+        await response_cache.set_async(cache_key, "".join(chunks).strip(), elapsed)
+    
     def _get_system_prompt(self, category: str) -> str:
         """Obter prompt do sistema baseado na categoria"""
         if category == "Produtivo":
@@ -194,35 +367,22 @@ class EmailProcessor:
             return "Você é um assistente pessoal educado. Responda emails pessoais de forma amigável."
     
     def _build_contextual_prompt(self, email_text: str, category: str, keywords: list[str]) -> str:
-        """Construir prompt contextualizado"""
+        """Construir prompt contextualizado (dentro do orçamento de tokens)"""
         context = self._analyze_email_context(email_text, keywords)
-        
-        if category == "Produtivo":
-            return f"""
-            ANÁLISE: {context}
-            EMAIL: "{email_text[:1000]}"
-            INSTRUÇÕES: Gere resposta profissional baseada no contexto.
-            RESPOSTA:
-            """
-        else:
-            return f"""
-            ANÁLISE: {context}
-            EMAIL: "{email_text[:1000]}"
-            INSTRUÇÕES: Gere resposta amigável baseada no contexto.
-            RESPOSTA:
-            """
+        tone = "profissional" if category == "Produtivo" else "amigável"
+        return prompt_builder.build(email_text, context, tone)
     
     def _analyze_email_context(self, email_text: str, keywords: list[str]) -> str:
         """Analisar contexto do email"""
-        email_lower = email_text.lower()
+        counts = keyword_matcher.count(email_text.lower())
         context_elements = []
         
         # Detecção de tipo (implementação simplificada)
-        if any(word in email_lower for word in ['solicit', 'pedido', 'requer']):
+        if keyword_matcher.has_any(counts, CONTEXT_KEYWORDS['solicitacao']):
             context_elements.append("Solicitação")
-        elif any(word in email_lower for word in ['problema', 'erro', 'bug']):
+        elif keyword_matcher.has_any(counts, CONTEXT_KEYWORDS['problema']):
             context_elements.append("Problema")
-        elif any(word in email_lower for word in ['dúvida', 'pergunta']):
+        elif keyword_matcher.has_any(counts, CONTEXT_KEYWORDS['duvida']):
             context_elements.append("Dúvida")
         
         if keywords:
@@ -230,19 +390,20 @@ class EmailProcessor:
         
         return " | ".join(context_elements) if context_elements else "Mensagem geral"
     
+    @track_stage("generate_response_fallback")
     def _get_contextual_fallback_response(self, email_text: str, category: str, keywords: list[str]) -> str:
         """Resposta fallback contextualizada"""
-        email_lower = email_text.lower()
+        counts = keyword_matcher.count(email_text.lower())
         
         if category == "Produtivo":
-            if any(word in email_lower for word in ['solicit', 'pedido']):
+            if keyword_matcher.has_any(counts, CONTEXT_KEYWORDS['resposta_solicitacao']):
                 return "Agradecemos sua solicitação. Nossa equipe analisará e retornará em breve."
-            elif any(word in email_lower for word in ['problema', 'erro']):
+            elif keyword_matcher.has_any(counts, CONTEXT_KEYWORDS['resposta_problema']):
                 return "Lamentamos pelo problema. Nossa equipe técnica está trabalhando na solução."
             else:
                 return "Agradecemos seu contato. Retornaremos em breve com uma resposta."
         else:
-            if any(word in email_lower for word in ['agradec', 'obrigad']):
+            if keyword_matcher.has_any(counts, CONTEXT_KEYWORDS['agradecimento']):
                 return "Ficamos felizes com seu agradecimento! É um prazer ajudar."
             else:
                 return "Agradecemos seu contato! Ficamos felizes em receber sua mensagem."
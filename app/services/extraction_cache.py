@@ -0,0 +1,262 @@
+"""
+Cache de extração de texto de arquivos, endereçado pelo conteúdo (SHA-256)
+
+As entradas guardam o texto em UTF-8 comprimido com zlib (nas duas camadas), gravado
+e lido em trechos: o texto inteiro nunca fica descomprimido em memória
+"""
+import codecs
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from contextlib import closing
+from typing import Iterator, Optional
+from ..config.settings import (
+    EXTRACTION_CACHE_ENABLED, EXTRACTION_CACHE_MEMORY_BYTES,
+    EXTRACTION_CACHE_PATH, EXTRACTION_CACHE_DISK_BYTES, STREAM_CLASSIFY_CHUNK_CHARS
+)
+
+logger = logging.getLogger(__name__)
+
+def iter_compressed_text(data: bytes, chunk_size: int = STREAM_CLASSIFY_CHUNK_CHARS) -> Iterator[str]:
+    """Trechos do texto de uma entrada do cache, descomprimidos aos poucos"""
+    decompressor = zlib.decompressobj()
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    view = memoryview(data)
+    for start in range(0, len(view), chunk_size):
+        pending = view[start:start + chunk_size]
+        while pending:
+            text = decoder.decode(decompressor.decompress(pending, chunk_size))
+            pending = decompressor.unconsumed_tail
+            if text:
+                yield text
+    text = decoder.decode(decompressor.flush(), True)
+    if text:
+        yield text
+
+class MemoryExtractionTier:
+    """Camada em memória com despejo LRU limitado pelo tamanho total das entradas"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, content_hash: str) -> Optional[tuple[bytes, str]]:
+        with self._lock:
+            entry = self._entries.get(content_hash)
+            if entry is None:
+                return None
+            self._entries.move_to_end(content_hash)
+            compressed, mime_type, _ = entry
+            return compressed, mime_type
+
+    def set(self, content_hash: str, compressed: bytes, mime_type: str):
+        size = len(compressed)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(content_hash, None)
+            if previous is not None:
+                self.total_bytes -= previous[2]
+            self._entries[content_hash] = (compressed, mime_type, size)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+
+    def size(self) -> int:
+        return len(self._entries)
+
+class SQLiteExtractionTier:
+    """
+    Camada em disco (SQLite, texto comprimido) com despejo pelo tamanho total.
+
+    O tamanho total é mantido num contador do processo, que só é recalculado com
+    SUM(size) na abertura da conexão e a cada sync_every inserções, para incluir o
+    que os outros workers gravaram (o arquivo pode passar do limite até lá)
+    """
+
+    def __init__(self, path: str, max_bytes: int, sync_every: int = 64):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.sync_every = max(1, sync_every)
+        self._lock = threading.Lock()
+        self._pid = None
+        self._connection = None
+        self._total_bytes = 0
+        self._inserts = 0
+        # Cada processo abre a sua conexão no primeiro uso (ver SQLiteCacheBackend)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS extractions ("
+                "hash TEXT PRIMARY KEY, mime_type TEXT NOT NULL, text BLOB NOT NULL, "
+                "size INTEGER NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS extractions_accessed_at ON extractions (accessed_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        """Conexão do processo atual"""
+        if self._pid != os.getpid():
+            self._connection = self._connect()
+            self._pid = os.getpid()
+            self._sync_total()
+        return self._connection
+
+    def _sync_total(self):
+        """Recalcular o tamanho total a partir da tabela"""
+        self._total_bytes = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM extractions").fetchone()[0]
+        self._inserts = 0
+
+    def get(self, content_hash: str) -> Optional[tuple[bytes, str]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT text, mime_type FROM extractions WHERE hash = ?", (content_hash,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE extractions SET accessed_at = ? WHERE hash = ?", (time.time(), content_hash)
+            )
+        compressed, mime_type = row
+        return compressed, mime_type
+
+    def set(self, content_hash: str, compressed: bytes, mime_type: str):
+        if len(compressed) > self.max_bytes:
+            return
+
+        with self._lock:
+            conn = self._conn
+            replaced = conn.execute("SELECT size FROM extractions WHERE hash = ?", (content_hash,)).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO extractions (hash, mime_type, text, size, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (content_hash, mime_type, compressed, len(compressed), time.time())
+            )
+            self._total_bytes += len(compressed) - (replaced[0] if replaced else 0)
+            self._inserts += 1
+            if self._inserts >= self.sync_every:
+                self._sync_total()
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Remover as entradas menos acessadas até caber no limite"""
+        # Antes de apagar, incluir o que os outros processos gravaram
+        self._sync_total()
+        total = self._total_bytes
+        if total <= self.max_bytes:
+            return
+
+        evicted = []
+        for content_hash, size in self._conn.execute(
+            "SELECT hash, size FROM extractions ORDER BY accessed_at"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            evicted.append((content_hash,))
+            total -= size
+        self._conn.executemany("DELETE FROM extractions WHERE hash = ?", evicted)
+        self._total_bytes = total
+
+    def size(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM extractions").fetchone()[0]
+
+class ExtractionCache:
+    """Cache de texto extraído (comprimido) e tipo MIME, em memória e opcionalmente em disco"""
+
+    def __init__(self, memory: MemoryExtractionTier, disk: Optional[SQLiteExtractionTier] = None,
+                 enabled: bool = True):
+        self.memory = memory
+        self.disk = disk
+        self.enabled = enabled
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @property
+    def max_entry_bytes(self) -> int:
+        """Maior entrada que alguma das camadas aceita"""
+        return max(self.memory.max_bytes, self.disk.max_bytes if self.disk is not None else 0)
+
+    def get(self, content_hash: str) -> Optional[tuple[bytes, str]]:
+        """Buscar (texto comprimido, tipo MIME) pelo hash do conteúdo (ver iter_compressed_text)"""
+        if not self.enabled or not content_hash:
+            return None
+
+        entry = self.memory.get(content_hash)
+        if entry is not None:
+            self.memory_hits += 1
+            return entry
+
+        if self.disk is not None:
+            try:
+                entry = self.disk.get(content_hash)
+            except Exception as e:
+                logger.warning(f"Falha ao ler cache de extração em disco: {e}")
+                entry = None
+            if entry is not None:
+                self.disk_hits += 1
+                self.memory.set(content_hash, *entry)
+                return entry
+
+        self.misses += 1
+        return None
+
+    def set(self, content_hash: str, compressed: bytes, mime_type: str):
+        """Armazenar o resultado de uma extração (texto em UTF-8 comprimido com zlib)"""
+        if not self.enabled or not content_hash:
+            return
+
+        self.memory.set(content_hash, compressed, mime_type)
+        if self.disk is not None:
+            try:
+                self.disk.set(content_hash, compressed, mime_type)
+            except Exception as e:
+                logger.warning(f"Falha ao gravar cache de extração em disco: {e}")
+
+    def stats(self) -> dict:
+        """Contadores do cache (por processo)"""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "memory_entries": self.memory.size(),
+            "memory_bytes": self.memory.total_bytes,
+            "max_memory_bytes": self.memory.max_bytes,
+            "disk_entries": self.disk.size() if self.disk is not None else None,
+            "max_disk_bytes": self.disk.max_bytes if self.disk is not None else None,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0
+        }
+
+def _create_extraction_cache() -> ExtractionCache:
+    """Criar cache conforme configuração (camada em disco opcional)"""
+    disk = None
+    if EXTRACTION_CACHE_PATH:
+        try:
+            disk = SQLiteExtractionTier(EXTRACTION_CACHE_PATH, EXTRACTION_CACHE_DISK_BYTES)
+            logger.info(f"Cache de extração em disco: {EXTRACTION_CACHE_PATH}")
+        except Exception as e:
+            logger.warning(f"Cache de extração em disco indisponível: {e}")
+
+    return ExtractionCache(
+        MemoryExtractionTier(EXTRACTION_CACHE_MEMORY_BYTES),
+        disk,
+        enabled=EXTRACTION_CACHE_ENABLED
+    )
+
+# Instância global do cache
+extraction_cache = _create_extraction_cache()
@@ -1,84 +1,178 @@
 """
 Serviço para processamento de arquivos
 """
+import codecs
 import logging
+import zlib
 from fastapi import HTTPException
 from io import BytesIO
-import PyPDF2
-import pdfplumber
-import docx2txt
-import magic
+from typing import BinaryIO, Callable, Iterable, Iterator, Optional, Union
+from .pdf_extractor import pdf_extractor
+from .docx_extractor import docx_extractor
+from .extraction_cache import extraction_cache, iter_compressed_text
+from .prompt_builder import prompt_builder
+from .metrics import track_stage, track_extraction
 from ..models.constants import ALLOWED_FILE_TYPES
+from ..config.settings import MIME_SNIFF_BYTES, STREAM_CLASSIFY_CHUNK_CHARS
 
 logger = logging.getLogger(__name__)
 
+# Recebe cada trecho extraído; retornar False encerra o repasse (ex.: StreamClassifier.feed)
+ChunkConsumer = Callable[[str], Optional[bool]]
+
+DOCX_TYPES = ('application/vnd.openxmlformats-officedocument.wordprocessingml.document', 'application/msword')
+
+class TextCollector:
+    """
+    Destino dos trechos extraídos: repassa cada um a on_chunk à medida que chegam e guarda
+    só o início do texto (max_chars; padrão: a janela que a geração usa, mais um caractere
+    para o corte no mesmo espaço). Com compress, o texto inteiro fica comprimido para o
+    cache de extração, até compress_limit bytes
+    """
+
+    def __init__(self, on_chunk: Optional[ChunkConsumer] = None, max_chars: Optional[int] = None,
+                 compress: bool = False, compress_limit: Optional[int] = None):
+        self.on_chunk = on_chunk
+        self.max_chars = max_chars if max_chars is not None else prompt_builder.input_chars + 1
+        self.strip = False  # texto final sem os espaços das pontas (DOCX)
+        self.chars = 0
+        self._parts = []
+        self._kept = 0
+        # Posição do primeiro e depois do último caractere que não é espaço
+        self._content_start = None
+        self._content_end = 0
+        self._compressor = zlib.compressobj(1) if compress else None
+        self._compressed = []
+        self._compressed_size = 0
+        self.compress_limit = compress_limit
+
+    def add(self, chunk: str):
+        """Receber um trecho extraído"""
+        if not chunk:
+            return
+        if self.on_chunk is not None and self.on_chunk(chunk) is False:
+            self.on_chunk = None
+        if not chunk.isspace():
+            if self._content_start is None:
+                self._content_start = self.chars + len(chunk) - len(chunk.lstrip())
+            self._content_end = self.chars + len(chunk.rstrip())
+        # Com strip, a janela começa no primeiro caractere que não é espaço
+        kept_from = self.chars if not self.strip else self._content_start
+        if kept_from is not None and self._kept < self.max_chars:
+            part = chunk[max(0, kept_from - self.chars):][:self.max_chars - self._kept]
+            self._parts.append(part)
+            self._kept += len(part)
+        self.chars += len(chunk)
+
+        if self._compressor is not None:
+            data = self._compressor.compress(chunk.encode("utf-8"))
+            self._compressed.append(data)
+            self._compressed_size += len(data)
+            if self.compress_limit is not None and self._compressed_size > self.compress_limit:
+                # Grande demais para o cache: não vale continuar comprimindo
+                self._compressor = None
+                self._compressed = None
+
+    def extend(self, chunks: Iterable[str]) -> "TextCollector":
+        for chunk in chunks:
+            self.add(chunk)
+        return self
+
+    @property
+    def content_chars(self) -> int:
+        """Tamanho do texto inteiro sem os espaços das pontas (len(texto.strip()))"""
+        return 0 if self._content_start is None else self._content_end - self._content_start
+
+    @property
+    def length(self) -> int:
+        """Tamanho do texto final inteiro"""
+        return self.content_chars if self.strip else self.chars
+
+    def text(self) -> str:
+        """Início do texto final (até max_chars caracteres)"""
+        text = "".join(self._parts)
+        if self.strip:
+            # A janela já começa no conteúdo; falta só o fim, se o texto inteiro coube nela
+            return text[:self._content_end - self._content_start] if self._content_start is not None else ""
+        return text
+
+    def compressed(self) -> Optional[bytes]:
+        """Texto inteiro comprimido (None se não foi comprimido)"""
+        if self._compressor is None:
+            return None
+        self._compressed.append(self._compressor.flush())
+        self._compressor = None
+        return b"".join(self._compressed)
+
 class FileProcessor:
     """Processador de arquivos para extração de texto"""
     
     @staticmethod
-    def extract_text_from_pdf(file_content: bytes) -> str:
-        """Extrair texto de PDF usando múltiplas abordagens"""
-        text = ""
-        
-        # Tentar pdfplumber primeiro (mais preciso)
-        try:
-            with pdfplumber.open(BytesIO(file_content)) as pdf:
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
-            if text.strip():
-                logger.info("Texto extraído com pdfplumber")
-                return text
-        except Exception as e:
-            logger.warning(f"pdfplumber falhou: {e}")
-        
-        # Fallback para PyPDF2
-        try:
-            pdf_reader = PyPDF2.PdfReader(BytesIO(file_content))
-            for page in pdf_reader.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
-            if text.strip():
-                logger.info("Texto extraído com PyPDF2")
-                return text
-        except Exception as e:
-            logger.warning(f"PyPDF2 falhou: {e}")
-        
-        raise Exception("Não foi possível extrair texto do PDF")
+    def extract_text_from_pdf(source: BinaryIO, collector: Optional[TextCollector] = None) -> str:
+        """Extrair texto de PDF usando múltiplas abordagens (pool de processos por páginas)"""
+        collector = collector if collector is not None else TextCollector()
+        return collector.extend(pdf_extractor.extract_pages(source)).text()
     
     @staticmethod
-    def extract_text_from_docx(file_content: bytes) -> str:
-        """Extrair texto de arquivos DOCX"""
+    def extract_text_from_docx(source: BinaryIO, collector: Optional[TextCollector] = None) -> str:
+        """Extrair texto de arquivos DOCX (corpo do documento, em streaming)"""
+        collector = collector if collector is not None else TextCollector()
+        collector.strip = True
         try:
-            text = docx2txt.process(BytesIO(file_content))
-            if not text.strip():
+            collector.extend(docx_extractor.iter_text(source))
+            if not collector.content_chars:
                 raise Exception("Documento DOCX vazio")
-            return text
+            return collector.text()
         except Exception as e:
             raise Exception(f"Erro ao processar DOCX: {e}")
     
     @staticmethod
-    def extract_text_from_txt(file_content: bytes) -> str:
+    def detect_txt_encoding(source: BinaryIO, chunk_size: int = STREAM_CLASSIFY_CHUNK_CHARS) -> str:
+        """UTF-8 se o arquivo inteiro for UTF-8 válido; senão latin-1 (aceita qualquer byte)"""
+        source.seek(0)
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        try:
+            while chunk := source.read(chunk_size):
+                decoder.decode(chunk)
+            decoder.decode(b"", True)
+        except UnicodeDecodeError:
+            logger.info("TXT não está em UTF-8, decodificando como latin-1")
+            return "latin-1"
+        return "utf-8"
+    
+    @classmethod
+    def iter_text_from_txt(cls, source: BinaryIO, chunk_size: int = STREAM_CLASSIFY_CHUNK_CHARS) -> Iterator[str]:
+        """
+        Decodificar arquivo TXT em blocos, com um único encoding para o arquivo inteiro
+        (validado numa passada anterior, sem guardar o texto)
+        """
+        decoder = codecs.getincrementaldecoder(cls.detect_txt_encoding(source, chunk_size))()
+        source.seek(0)
+        while True:
+            chunk = source.read(chunk_size)
+            final = not chunk
+            text = decoder.decode(chunk, final)
+            if text:
+                yield text
+            if final:
+                return
+    
+    @classmethod
+    def extract_text_from_txt(cls, source: BinaryIO, collector: Optional[TextCollector] = None) -> str:
         """Extrair texto de arquivos TXT com detecção de encoding"""
-        encodings = ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']
-        
-        for encoding in encodings:
-            try:
-                text = file_content.decode(encoding)
-                if text.strip():
-                    return text
-            except UnicodeDecodeError:
-                continue
+        collector = collector if collector is not None else TextCollector()
+        collector.extend(cls.iter_text_from_txt(source))
+        if collector.content_chars:
+            return collector.text()
         
         raise Exception("Não foi possível decodificar o arquivo")
     
     @staticmethod
     def detect_file_type(file_content: bytes) -> str:
-        """Detectar tipo MIME do arquivo"""
+        """Detectar tipo MIME do arquivo a partir dos bytes iniciais (libmagic carregada no primeiro uso)"""
         try:
-            mime_type = magic.from_buffer(file_content, mime=True)
+            import magic
+            mime_type = magic.from_buffer(file_content[:MIME_SNIFF_BYTES], mime=True)
             return mime_type
         except:
             # Fallback para detecção básica
@@ -90,9 +184,22 @@ class FileProcessor:
                 return 'text/plain'
     
     @classmethod
-    def process_file(cls, file_content: bytes, filename: str) -> tuple[str, str]:
-        """Processar arquivo e extrair texto"""
-        mime_type = cls.detect_file_type(file_content)
+    def process_file(cls, source: Union[bytes, BinaryIO], filename: str,
+                     on_chunk: Optional[ChunkConsumer] = None,
+                     collector: Optional[TextCollector] = None) -> tuple[str, str, int]:
+        """
+        Processar arquivo (bytes ou arquivo em spool) e extrair texto. Os trechos
+        (páginas, blocos decodificados) são repassados a on_chunk durante a extração.
+        Retorna o início do texto (a janela usada na geração), o tipo MIME e o tamanho
+        do texto inteiro, que não é mantido em memória
+        """
+        if isinstance(source, (bytes, bytearray)):
+            source = BytesIO(source)
+        collector = collector if collector is not None else TextCollector(on_chunk)
+        
+        source.seek(0)
+        with track_stage("detect_file_type"):
+            mime_type = cls.detect_file_type(source.read(MIME_SNIFF_BYTES))
         logger.info(f"Tipo detectado: {mime_type} para {filename}")
         
         if mime_type not in ALLOWED_FILE_TYPES:
@@ -102,16 +209,42 @@ class FileProcessor:
             )
         
         # Extrair texto baseado no tipo
-        if mime_type == 'application/pdf':
-            text = cls.extract_text_from_pdf(file_content)
-        elif mime_type in ['application/vnd.openxmlformats-officedocument.wordprocessingml.document', 'application/msword']:
-            text = cls.extract_text_from_docx(file_content)
-        elif mime_type == 'text/plain':
-            text = cls.extract_text_from_txt(file_content)
-        else:
-            raise HTTPException(status_code=400, detail=f"Processamento não implementado para: {mime_type}")
+        with track_extraction(mime_type):
+            if mime_type == 'application/pdf':
+                text = cls.extract_text_from_pdf(source, collector)
+            elif mime_type in DOCX_TYPES:
+                text = cls.extract_text_from_docx(source, collector)
+            elif mime_type == 'text/plain':
+                text = cls.extract_text_from_txt(source, collector)
+            else:
+                raise HTTPException(status_code=400, detail=f"Processamento não implementado para: {mime_type}")
         
-        if not text or len(text.strip()) < 5:
+        if collector.content_chars < 5:
             raise HTTPException(status_code=400, detail="Arquivo não contém texto suficiente")
         
-        return text, mime_type
\ No newline at end of file
+        return text, mime_type, collector.length
+    
+    @classmethod
+    def process_file_cached(cls, source: Union[bytes, BinaryIO], filename: str, content_hash: str,
+                            on_chunk: Optional[ChunkConsumer] = None) -> tuple[str, str, bool, int]:
+        """
+        Processar arquivo consultando antes o cache de extração (SHA-256 do conteúdo).
+        Retorna (início do texto, tipo MIME, acerto no cache, tamanho do texto inteiro)
+        """
+        cached = extraction_cache.get(content_hash)
+        if cached is not None:
+            compressed, mime_type = cached
+            logger.info(f"Extração em cache: {mime_type} para {filename}")
+            collector = TextCollector(on_chunk)
+            collector.strip = mime_type in DOCX_TYPES
+            collector.extend(iter_compressed_text(compressed))
+            return collector.text(), mime_type, True, collector.length
+        
+        collector = TextCollector(
+            on_chunk, compress=extraction_cache.enabled, compress_limit=extraction_cache.max_entry_bytes
+        )
+        text, mime_type, length = cls.process_file(source, filename, collector=collector)
+        compressed = collector.compressed()
+        if compressed is not None:
+            extraction_cache.set(content_hash, compressed, mime_type)
+        return text, mime_type, False, length
@@ -0,0 +1,350 @@
+"""
+Jobs assíncronos de processamento de arquivos, persistidos em SQLite
+
+O arquivo enviado fica no banco até o job terminar. Cada processo do servidor
+roda JOBS_WORKERS workers que disputam os jobs da fila; a reserva de um job é
+renovada enquanto ele roda, e um job cuja reserva venceu (reinício ou queda do
+processo) volta para a fila, até JOBS_MAX_ATTEMPTS tentativas.
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import closing, contextmanager
+from io import BytesIO
+from typing import Optional
+from fastapi import HTTPException
+from .email_processor import email_processor
+from .file_processor import FileProcessor
+from .metrics import observe_stage, record_job
+from ..config.settings import (
+    JOBS_ENABLED, JOBS_DB_PATH, JOBS_WORKERS, JOBS_MAX_PENDING, JOBS_RETENTION, JOBS_LEASE_SECONDS,
+    JOBS_MAX_ATTEMPTS, JOBS_POLL_INTERVAL
+)
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+# Colunas devolvidas na consulta de status (sem o conteúdo do arquivo)
+STATUS_COLUMNS = (
+    "id", "status", "filename", "size", "attempts", "result", "error",
+    "created_at", "started_at", "finished_at"
+)
+
+class QueueFullError(Exception):
+    """Fila de jobs no limite de jobs pendentes"""
+
+class JobStore:
+    """Estado dos jobs em SQLite, compartilhado entre processos e preservado entre reinícios"""
+
+    def __init__(self, path: str, max_pending: int, retention: float, lease_seconds: float, max_attempts: int):
+        self.path = path
+        self.max_pending = max_pending
+        self.retention = retention
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._pid = None
+        self._connection = None
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, status TEXT NOT NULL, filename TEXT NOT NULL, "
+                "content_hash TEXT NOT NULL, size INTEGER NOT NULL, content BLOB, "
+                "result TEXT, error TEXT, attempts INTEGER NOT NULL DEFAULT 0, "
+                "owner TEXT, lease_until REAL, "
+                "created_at REAL NOT NULL, started_at REAL, finished_at REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_created_at ON jobs (status, created_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=10, check_same_thread=False, isolation_level=None)
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        """Conexão do processo atual (aberta depois do fork dos workers do gunicorn)"""
+        if self._pid != os.getpid():
+            self._connection = self._connect()
+            self._pid = os.getpid()
+        return self._connection
+
+    @contextmanager
+    def _transaction(self):
+        """Transação com bloqueio de escrita desde o início (reserva atômica entre processos)"""
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def create(self, filename: str, content: bytes, content_hash: str) -> str:
+        """Enfileirar um arquivo; QueueFullError se houver jobs pendentes demais"""
+        job_id = uuid.uuid4().hex
+        with self._transaction() as conn:
+            pending = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status IN (?, ?)", (QUEUED, RUNNING)
+            ).fetchone()[0]
+            if pending >= self.max_pending:
+                raise QueueFullError(f"{pending} jobs pendentes (limite {self.max_pending})")
+            conn.execute(
+                "INSERT INTO jobs (id, status, filename, content_hash, size, content, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, QUEUED, filename, content_hash, len(content), content, time.time())
+            )
+        return job_id
+
+    def claim(self, owner: str) -> Optional[dict]:
+        """Reservar o job mais antigo da fila (ou com reserva vencida) para este worker"""
+        while True:
+            now = time.time()
+            with self._transaction() as conn:
+                row = conn.execute(
+                    "SELECT id, status, attempts FROM jobs "
+                    "WHERE status = ? OR (status = ? AND lease_until < ?) "
+                    "ORDER BY created_at LIMIT 1",
+                    (QUEUED, RUNNING, now)
+                ).fetchone()
+                if row is None:
+                    return None
+
+                job_id, status, attempts = row
+                if attempts >= self.max_attempts:
+                    conn.execute(
+                        "UPDATE jobs SET status = ?, error = ?, content = NULL, owner = NULL, "
+                        "lease_until = NULL, finished_at = ? WHERE id = ?",
+                        (FAILED, f"Processamento interrompido {attempts} vezes", now, job_id)
+                    )
+                    record_job("failed")
+                    continue
+
+                if status == RUNNING:
+                    logger.warning(f"Job {job_id} com reserva vencida: nova tentativa")
+                    record_job("retried")
+                conn.execute(
+                    "UPDATE jobs SET status = ?, owner = ?, lease_until = ?, attempts = attempts + 1, "
+                    "started_at = ? WHERE id = ?",
+                    (RUNNING, owner, now + self.lease_seconds, now, job_id)
+                )
+                filename, content_hash, content = conn.execute(
+                    "SELECT filename, content_hash, content FROM jobs WHERE id = ?", (job_id,)
+                ).fetchone()
+            return {"id": job_id, "filename": filename, "content_hash": content_hash, "content": content}
+
+    def finish(self, job_id: str, owner: str, result: Optional[dict] = None, error: Optional[str] = None) -> bool:
+        """Registrar o resultado (ou o erro) de um job ainda reservado por este worker"""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, content = NULL, owner = NULL, "
+                "lease_until = NULL, finished_at = ? WHERE id = ? AND owner = ? AND status = ?",
+                (
+                    FAILED if error is not None else DONE,
+                    json.dumps(result, ensure_ascii=False) if result is not None else None,
+                    error, time.time(), job_id, owner, RUNNING
+                )
+            )
+            return cursor.rowcount == 1
+
+    def renew(self, job_id: str, owner: str) -> bool:
+        """Estender a reserva de um job em execução por este worker"""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_until = ? WHERE id = ? AND owner = ? AND status = ?",
+                (time.time() + self.lease_seconds, job_id, owner, RUNNING)
+            )
+            return cursor.rowcount == 1
+
+    def release(self, owner: str) -> int:
+        """Devolver à fila os jobs interrompidos deste worker (a tentativa não conta)"""
+        with self._transaction() as conn:
+            return conn.execute(
+                "UPDATE jobs SET status = ?, owner = NULL, lease_until = NULL, attempts = attempts - 1 "
+                "WHERE status = ? AND owner = ?",
+                (QUEUED, RUNNING, owner)
+            ).rowcount
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """Status do job, com o resultado já decodificado"""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(STATUS_COLUMNS)} FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        job = dict(zip(STATUS_COLUMNS, row))
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def purge(self) -> int:
+        """Remover jobs concluídos (ou esquecidos na fila) há mais de retention segundos"""
+        cutoff = time.time() - self.retention
+        with self._transaction() as conn:
+            return conn.execute(
+                "DELETE FROM jobs WHERE status != ? AND COALESCE(finished_at, created_at) < ?",
+                (RUNNING, cutoff)
+            ).rowcount
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return {status: counts.get(status, 0) for status in (QUEUED, RUNNING, DONE, FAILED)}
+
+class JobQueue:
+    """Workers em background (por processo) que executam os jobs do JobStore"""
+
+    def __init__(self, store: JobStore, workers: int, poll_interval: float):
+        self.store = store
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.owner = None
+        self._tasks: list[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+
+    async def start(self):
+        """Iniciar os workers no event loop do processo atual"""
+        if self._tasks:
+            return
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._purge_loop()))
+        logger.info(f"Fila de jobs: {self.workers} workers em {self.store.path}")
+
+    async def stop(self):
+        """Parar os workers e devolver à fila os jobs interrompidos"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self.owner is not None:
+            released = await asyncio.to_thread(self.store.release, self.owner)
+            if released:
+                logger.info(f"{released} jobs devolvidos à fila")
+
+    async def submit(self, filename: str, content: bytes, content_hash: str) -> str:
+        """Enfileirar um arquivo e acordar os workers deste processo"""
+        try:
+            job_id = await asyncio.to_thread(self.store.create, filename, content, content_hash)
+        except QueueFullError:
+            record_job("rejected")
+            raise
+        record_job("queued")
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job_id
+
+    async def _worker(self):
+        while True:
+            try:
+                job = await asyncio.to_thread(self.store.claim, self.owner)
+            except sqlite3.Error as e:
+                logger.error(f"Erro ao reservar job: {e}")
+                job = None
+
+            if job is None:
+                # Jobs de outros processos (ou retomados) aparecem na próxima consulta
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+
+            try:
+                await self._run(job)
+            except Exception as e:
+                # O worker continua; sem conclusão, o job volta à fila quando a reserva vencer
+                logger.error(f"Erro ao concluir o job {job['id']}: {e}")
+
+    async def _renew_lease(self, job_id: str):
+        """Renovar a reserva a cada terço do prazo enquanto o job roda"""
+        while True:
+            await asyncio.sleep(self.store.lease_seconds / 3)
+            try:
+                if not await asyncio.to_thread(self.store.renew, job_id, self.owner):
+                    logger.warning(f"Job {job_id} perdeu a reserva durante a execução")
+                    return
+            except sqlite3.Error as e:
+                logger.error(f"Erro ao renovar a reserva do job {job_id}: {e}")
+
+    async def _run(self, job: dict):
+        start = time.perf_counter()
+        result, error = None, None
+        renewal = asyncio.create_task(self._renew_lease(job["id"]))
+        try:
+            result = await self._process(job)
+        except HTTPException as e:
+            error = str(e.detail)
+        except Exception as e:
+            logger.error(f"Erro no job {job['id']}: {e}")
+            error = str(e)
+        finally:
+            renewal.cancel()
+            observe_stage("job_process_file", time.perf_counter() - start)
+
+        if not await asyncio.to_thread(self.store.finish, job["id"], self.owner, result, error):
+            logger.warning(f"Job {job['id']} perdeu a reserva antes de terminar: resultado descartado")
+            return
+        record_job("failed" if error is not None else "done")
+        logger.info(f"Job {job['id']} concluído - {job['filename']} ({'erro' if error else 'ok'})")
+
+    @staticmethod
+    async def _process(job: dict) -> dict:
+        """Mesmo pipeline de /process-file (sem prazo: o cliente não está esperando)"""
+        classifier = email_processor.stream_classifier()
+        text, detected_type, cache_hit, extracted_chars = await asyncio.to_thread(
+            FileProcessor.process_file_cached, BytesIO(job["content"]), job["filename"], job["content_hash"],
+            classifier.feed
+        )
+
+        category, confidence, keywords = classifier.finish()
+        response_text, fallback = await email_processor.generate_response_async(
+            text, category, keywords, overload_policy="degrade"
+        )
+
+        return {
+            "category": category,
+            "confidence": round(confidence, 2),
+            "response": response_text,
+            "email_preview": text[:100] + '...' if len(text) > 100 else text,
+            "processed_keywords": keywords[:10] if keywords else None,
+            "file_info": {
+                "filename": job["filename"],
+                "size_bytes": len(job["content"]),
+                "detected_type": detected_type,
+                "extracted_chars": extracted_chars,
+                "success": True,
+                "cache_hit": cache_hit
+            },
+            "fallback": fallback
+        }
+
+    async def _purge_loop(self):
+        """Aplicar a retenção periodicamente"""
+        while True:
+            try:
+                purged = await asyncio.to_thread(self.store.purge)
+                if purged:
+                    logger.info(f"{purged} jobs expirados removidos")
+            except sqlite3.Error as e:
+                logger.error(f"Erro ao remover jobs expirados: {e}")
+            await asyncio.sleep(min(300, max(1, self.store.retention / 10)))
+
+# Instâncias globais (sem banco de jobs quando JOBS_ENABLED=false)
+job_store = JobStore(
+    JOBS_DB_PATH, JOBS_MAX_PENDING, JOBS_RETENTION, JOBS_LEASE_SECONDS, JOBS_MAX_ATTEMPTS
+) if JOBS_ENABLED else None
+job_queue = JobQueue(job_store, JOBS_WORKERS, JOBS_POLL_INTERVAL) if JOBS_ENABLED else None
@@ -0,0 +1,138 @@
+"""
+Casamento multi-padrão de palavras-chave em uma única passada sobre o texto
+"""
+import re
+from functools import lru_cache
+from itertools import chain
+from typing import Iterable, Iterator
+from ..models.constants import PRODUCTIVE_KEYWORDS, UNPRODUCTIVE_KEYWORDS, KEYWORD_WEIGHTS, CONTEXT_KEYWORDS
+from ..config.settings import KEYWORD_CACHE_SIZE, KEYWORD_CACHE_MAX_CHARS
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+class KeywordMatcher:
+    """Autômato compilado uma única vez para contar todas as palavras-chave do léxico
+
+    As contagens são idênticas às de ``str.count``: ocorrências da mesma palavra
+    não se sobrepõem, mas palavras diferentes podem se sobrepor ('fest' e 'festa').
+    Usa pyahocorasick quando instalado e, como fallback, uma regex em forma de trie.
+    """
+
+    def __init__(self, keywords: Iterable[str], cache_size: int = 64, max_cached_chars: int = 20000):
+        self.keywords = tuple(dict.fromkeys(word for word in keywords if word))
+        self._lengths = {word: len(word) for word in self.keywords}
+
+        if ahocorasick is not None:
+            self.backend = "ahocorasick"
+            self._automaton = self._build_automaton()
+            self._iter_matches = self._iter_automaton
+        else:
+            self.backend = "regex"
+            self._pattern, self._prefixes = self._build_trie_regex()
+            self._iter_matches = self._iter_regex
+
+        # O mesmo texto é consultado na classificação e na geração da resposta; só textos
+        # curtos entram no cache, que mantém vivas as chaves (textos de arquivos inteiros)
+        self.max_cached_chars = max_cached_chars
+        self._cached_count = lru_cache(maxsize=cache_size)(self._count)
+
+    def _build_automaton(self):
+        """Construir autômato Aho-Corasick"""
+        automaton = ahocorasick.Automaton()
+        for word in self.keywords:
+            automaton.add_word(word, word)
+        automaton.make_automaton()
+        return automaton
+
+    def _build_trie_regex(self):
+        """Construir regex em forma de trie e a tabela de prefixos"""
+        trie = {}
+        for word in self.keywords:
+            node = trie
+            for char in word:
+                node = node.setdefault(char, {})
+            node[""] = True
+
+        def build(node: dict) -> str:
+            branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+            if not branches:
+                return ""
+            body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+            return "(?:" + body + ")?" if "" in node else body
+
+        # Consome apenas o primeiro caractere para que a busca continue na
+        # posição seguinte; o restante da palavra fica no lookahead
+        pattern = re.compile("|".join(
+            re.escape(char) + "(?=(" + build(child) + "))"
+            for char, child in sorted(trie.items())
+        ))
+
+        # Todas as palavras que casam numa posição são prefixos da mais longa
+        prefixes = {
+            word: [other for other in self.keywords if word.startswith(other)]
+            for word in self.keywords
+        }
+        return pattern, prefixes
+
+    def _iter_automaton(self, text: str) -> Iterator[tuple[int, str]]:
+        lengths = self._lengths
+        for end, word in self._automaton.iter(text):
+            yield end - lengths[word] + 1, word
+
+    def _iter_regex(self, text: str) -> Iterator[tuple[int, str]]:
+        prefixes = self._prefixes
+        for match in self._pattern.finditer(text):
+            start = match.start()
+            for word in prefixes[text[start:match.end(match.lastindex)]]:
+                yield start, word
+
+    def matches(self, text: str) -> Iterator[tuple[int, str]]:
+        """Posição e palavra de cada ocorrência, inclusive sobrepostas (texto já em minúsculas)"""
+        return self._iter_matches(text)
+
+    def count(self, text: str) -> dict[str, int]:
+        """Contar ocorrências de todas as palavras-chave (memoizado para textos curtos)"""
+        if len(text) <= self.max_cached_chars:
+            return self._cached_count(text)
+        return self._count(text)
+
+    def cache_clear(self):
+        """Esvaziar o cache de contagens"""
+        self._cached_count.cache_clear()
+
+    def _count(self, text: str) -> dict[str, int]:
+        """Contar ocorrências de todas as palavras-chave (texto já em minúsculas)"""
+        counts = dict.fromkeys(self.keywords, 0)
+        next_start = {}
+        lengths = self._lengths
+
+        for start, word in self._iter_matches(text):
+            if start >= next_start.get(word, 0):
+                counts[word] += 1
+                next_start[word] = start + lengths[word]
+
+        return counts
+
+    @staticmethod
+    def weighted_score(counts: dict[str, int], words: list[str], default_weight: float) -> float:
+        """Somar contagens ponderadas na ordem da lista de palavras"""
+        score = 0
+        for word in words:
+            score += counts[word] * KEYWORD_WEIGHTS.get(word, default_weight)
+        return score
+
+    @staticmethod
+    def has_any(counts: dict[str, int], words: list[str]) -> bool:
+        """Verificar se alguma das palavras ocorre no texto"""
+        return any(counts[word] for word in words)
+
+# Instância global construída a partir do léxico da aplicação
+keyword_matcher = KeywordMatcher(chain(
+    PRODUCTIVE_KEYWORDS,
+    UNPRODUCTIVE_KEYWORDS,
+    KEYWORD_WEIGHTS,
+    *CONTEXT_KEYWORDS.values()
+), cache_size=KEYWORD_CACHE_SIZE, max_cached_chars=KEYWORD_CACHE_MAX_CHARS)
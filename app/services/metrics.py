@@ -0,0 +1,221 @@
+"""
+Métricas da aplicação no formato Prometheus (latência por etapa, requisições e erros da OpenAI)
+
+Com vários workers, defina PROMETHEUS_MULTIPROC_DIR (um diretório vazio, compartilhado
+pelos workers) antes de iniciar o servidor: cada processo grava seus valores em arquivos
+mmap e o /metrics de qualquer worker agrega todos eles.
+"""
+import os
+import time
+from contextlib import contextmanager
+from prometheus_client import (
+    CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, CONTENT_TYPE_LATEST, generate_latest, multiprocess
+)
+from .request_context import request_stages
+
+MULTIPROCESS = bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+
+# De 1 ms (classificação) a 30 s (PDFs grandes e timeouts da OpenAI)
+LATENCY_BUCKETS = (.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30)
+
+# Tokens por prompt: de emails curtos a PDFs inteiros
+TOKEN_BUCKETS = (25, 50, 100, 200, 300, 400, 600, 800, 1200, 1600, 3200, 6400, 12800, 25600)
+
+STAGE_SECONDS = Histogram(
+    "emailsmart_stage_duration_seconds",
+    "Duração de cada etapa do processamento",
+    ["stage"],
+    buckets=LATENCY_BUCKETS
+)
+EXTRACTION_SECONDS = Histogram(
+    "emailsmart_extraction_duration_seconds",
+    "Duração da extração de texto por tipo MIME",
+    ["mime_type"],
+    buckets=LATENCY_BUCKETS
+)
+REQUEST_SECONDS = Histogram(
+    "emailsmart_http_request_duration_seconds",
+    "Duração das requisições HTTP",
+    ["route", "method"],
+    buckets=LATENCY_BUCKETS
+)
+REQUESTS_TOTAL = Counter(
+    "emailsmart_http_requests",
+    "Requisições HTTP por rota e status",
+    ["route", "method", "status"]
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "emailsmart_http_requests_in_flight",
+    "Requisições HTTP em andamento",
+    ["route"],
+    multiprocess_mode="livesum"
+)
+FALLBACK_RESPONSES_TOTAL = Counter(
+    "emailsmart_fallback_responses",
+    "Respostas de template por motivo (deadline, cancelled, circuit_open, overload, openai_error, not_configured, short_text)",
+    ["reason"]
+)
+CIRCUIT_STATE = Gauge(
+    "emailsmart_openai_circuit_state",
+    "Estado do circuit breaker da OpenAI (0 fechado, 1 meio aberto, 2 aberto)",
+    multiprocess_mode="livemax"
+)
+CIRCUIT_TRANSITIONS_TOTAL = Counter(
+    "emailsmart_openai_circuit_transitions",
+    "Mudanças de estado do circuit breaker da OpenAI",
+    ["state"]
+)
+COALESCED_TOTAL = Counter(
+    "emailsmart_coalesced_requests",
+    "Chamadas atendidas por uma execução idêntica já em andamento",
+    ["operation"]
+)
+PROMPT_TOKENS = Histogram(
+    "emailsmart_prompt_tokens",
+    "Tokens do email recebido (email) e do prompt enviado à OpenAI (prompt)",
+    ["kind"],
+    buckets=TOKEN_BUCKETS
+)
+PROMPT_COMPACTIONS_TOTAL = Counter(
+    "emailsmart_prompt_compactions",
+    "Prompts em que o email foi reduzido para caber no orçamento de tokens"
+)
+JOBS_TOTAL = Counter(
+    "emailsmart_jobs",
+    "Jobs de arquivo por evento (queued, rejected, retried, done, failed)",
+    ["event"]
+)
+STREAM_CLASSIFICATIONS_TOTAL = Counter(
+    "emailsmart_stream_classifications",
+    "Classificações incrementais de arquivos por desfecho (complete, early_stop)",
+    ["outcome"]
+)
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "emailsmart_admission_queue_depth",
+    "Chamadas à OpenAI esperando vaga no controle de admissão",
+    multiprocess_mode="livesum"
+)
+ADMISSION_ACTIVE = Gauge(
+    "emailsmart_admission_active",
+    "Chamadas à OpenAI em andamento, admitidas pelo controle de admissão",
+    multiprocess_mode="livesum"
+)
+SHED_REQUESTS_TOTAL = Counter(
+    "emailsmart_shed_requests",
+    "Requisições descartadas por sobrecarga (queue_full, queue_timeout, rate_limited)",
+    ["reason"]
+)
+STARTUP_SECONDS = Gauge(
+    "emailsmart_startup_seconds",
+    "Duração da inicialização do processo por fase (import, warmup)",
+    ["phase"],
+    multiprocess_mode="livemax"
+)
+OPENAI_ERRORS_TOTAL = Counter(
+    "emailsmart_openai_errors",
+    "Falhas nas chamadas à OpenAI por tipo (timeout, connection, rate_limit, status, other)",
+    ["kind"]
+)
+
+def _add_request_stage(stage: str, seconds: float):
+    stages = request_stages.get()
+    if stages is not None:
+        stages[stage] = stages.get(stage, 0.0) + seconds
+
+@contextmanager
+def track_stage(stage: str):
+    """Registrar a duração de uma etapa (também pode ser usado como decorator de funções síncronas)"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - start)
+
+def observe_stage(stage: str, seconds: float):
+    """Registrar a duração já medida de uma etapa"""
+    STAGE_SECONDS.labels(stage).observe(seconds)
+    _add_request_stage(stage, seconds)
+
+@contextmanager
+def track_extraction(mime_type: str):
+    """Registrar a duração da extração de texto de um tipo MIME"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        EXTRACTION_SECONDS.labels(mime_type).observe(seconds)
+        _add_request_stage("extract_text", seconds)
+
+def record_fallback(reason: str):
+    """Contar uma resposta de template pelo motivo"""
+    FALLBACK_RESPONSES_TOTAL.labels(reason).inc()
+
+def record_coalesced(operation: str):
+    """Contar uma chamada que aproveitou uma execução já em andamento"""
+    COALESCED_TOTAL.labels(operation).inc()
+
+def record_prompt_tokens(email_tokens: int, prompt_tokens: int, compacted: bool):
+    """Registrar os tokens do email e do prompt final"""
+    PROMPT_TOKENS.labels("email").observe(email_tokens)
+    PROMPT_TOKENS.labels("prompt").observe(prompt_tokens)
+    if compacted:
+        PROMPT_COMPACTIONS_TOTAL.inc()
+
+def record_job(event: str):
+    """Contar um evento da fila de jobs"""
+    JOBS_TOTAL.labels(event).inc()
+
+def record_stream_classification(seconds: float, early_stop: bool):
+    """Registrar a duração e o desfecho de uma classificação incremental"""
+    observe_stage("classify_stream", seconds)
+    STREAM_CLASSIFICATIONS_TOTAL.labels("early_stop" if early_stop else "complete").inc()
+
+def record_admission(active: int, queued: int):
+    """Registrar as chamadas admitidas e a profundidade da fila de admissão"""
+    ADMISSION_ACTIVE.set(active)
+    ADMISSION_QUEUE_DEPTH.set(queued)
+
+def record_shed(reason: str):
+    """Contar uma requisição descartada por sobrecarga"""
+    SHED_REQUESTS_TOTAL.labels(reason).inc()
+
+def record_startup(phase: str, seconds: float):
+    """Registrar a duração de uma fase da inicialização"""
+    STARTUP_SECONDS.labels(phase).set(seconds)
+
+def record_openai_error(error: Exception):
+    """Contar uma falha da OpenAI pelo tipo de erro (o SDK já foi importado por quem falhou)"""
+    import openai
+    if isinstance(error, openai.APITimeoutError):
+        kind = "timeout"
+    elif isinstance(error, openai.APIConnectionError):
+        kind = "connection"
+    elif isinstance(error, openai.RateLimitError):
+        kind = "rate_limit"
+    elif isinstance(error, openai.APIStatusError):
+        kind = "status"
+    else:
+        kind = "other"
+    OPENAI_ERRORS_TOTAL.labels(kind).inc()
+
+CIRCUIT_STATE_VALUES = {"closed": 0, "half_open": 1, "open": 2}
+
+def record_circuit_state(state: str):
+    """Registrar uma mudança de estado do circuit breaker"""
+    CIRCUIT_STATE.set(CIRCUIT_STATE_VALUES[state])
+    CIRCUIT_TRANSITIONS_TOTAL.labels(state).inc()
+
+def render_metrics() -> tuple[bytes, str]:
+    """Métricas no formato texto do Prometheus (agregando os workers, se houver)"""
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+def mark_worker_dead(pid: int):
+    """Descartar os gauges de um worker encerrado (hook child_exit do gunicorn)"""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(pid)
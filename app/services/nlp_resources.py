@@ -0,0 +1,109 @@
+"""
+Bundle pré-compilado de recursos de NLP (stopwords, léxico e dados do tokenizer)
+
+O bundle é gerado na etapa de build (python nltk_setup.py) e carregado na
+inicialização sem acesso à rede e sem importar o NLTK.
+"""
+import logging
+import os
+import pickle
+from typing import Optional
+from ..config.settings import NLP_BUNDLE_PATH
+from ..models.constants import PRODUCTIVE_KEYWORDS, UNPRODUCTIVE_KEYWORDS, MANUAL_STOPWORDS
+
+logger = logging.getLogger(__name__)
+
+NLP_BUNDLE_VERSION = 1
+
+def keyword_lexicon() -> frozenset:
+    """Léxico de palavras-chave da aplicação"""
+    return frozenset(PRODUCTIVE_KEYWORDS) | frozenset(UNPRODUCTIVE_KEYWORDS)
+
+def load_nltk_stopwords(download: bool = True, download_dir: Optional[str] = None) -> tuple[frozenset, str]:
+    """Carregar stopwords do NLTK com fallback robusto (português, inglês, manual)"""
+    try:
+        import nltk
+        from nltk.corpus import stopwords
+
+        # Tenta baixar stopwords se não estiverem disponíveis
+        try:
+            nltk.data.find('corpora/stopwords')
+        except LookupError:
+            if download:
+                nltk.download('stopwords', download_dir=download_dir, quiet=True)
+
+        # Tenta português primeiro
+        return frozenset(stopwords.words('portuguese')), "nltk:portuguese"
+    except Exception as e:
+        logger.warning(f"Stopwords português não disponíveis: {e}")
+        try:
+            # Fallback para inglês
+            return frozenset(stopwords.words('english')), "nltk:english"
+        except Exception as e2:
+            logger.warning(f"Stopwords inglês não disponíveis: {e2}")
+            # Fallback manual se tudo falhar
+            logger.info("Usando stopwords manuais - NLTK não disponível")
+            return frozenset(MANUAL_STOPWORDS), "manual"
+
+def punkt_available(download: bool = True, download_dir: Optional[str] = None) -> bool:
+    """Verificar (e baixar, se preciso) o tokenizer punkt"""
+    try:
+        import nltk
+        try:
+            nltk.data.find('tokenizers/punkt')
+        except LookupError:
+            if not download:
+                return False
+            nltk.download('punkt', download_dir=download_dir, quiet=True)
+            nltk.data.find('tokenizers/punkt')
+        return True
+    except Exception as e:
+        logger.warning(f"Punkt tokenizer não disponível: {e}")
+        return False
+
+def build_nlp_bundle(path: str = NLP_BUNDLE_PATH, download_dir: Optional[str] = None) -> dict:
+    """Compilar os recursos de NLP em um único arquivo (etapa de build)"""
+    if download_dir:
+        import nltk
+        if download_dir not in nltk.data.path:
+            nltk.data.path.append(download_dir)
+
+    stop_words, stopwords_source = load_nltk_stopwords(download_dir=download_dir)
+    bundle = {
+        "version": NLP_BUNDLE_VERSION,
+        "stopwords": stop_words,
+        "stopwords_source": stopwords_source,
+        "keywords": keyword_lexicon(),
+        "punkt_available": punkt_available(download_dir=download_dir)
+    }
+
+    # Escrita atômica para não expor um bundle parcial a processos em execução
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as bundle_file:
+        pickle.dump(bundle, bundle_file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_path, path)
+
+    logger.info(f"Bundle de NLP gerado em {path} (stopwords: {stopwords_source})")
+    return bundle
+
+def load_nlp_bundle(path: str = NLP_BUNDLE_PATH) -> Optional[dict]:
+    """Carregar o bundle de NLP (None se ausente ou incompatível)"""
+    try:
+        with open(path, "rb") as bundle_file:
+            bundle = pickle.load(bundle_file)
+    except FileNotFoundError:
+        logger.warning(f"Bundle de NLP não encontrado em {path} - usando NLTK em tempo de execução")
+        return None
+    except Exception as e:
+        logger.warning(f"Bundle de NLP inválido em {path}: {e}")
+        return None
+
+    if not isinstance(bundle, dict) or bundle.get("version") != NLP_BUNDLE_VERSION:
+        logger.warning(f"Versão do bundle de NLP incompatível em {path}")
+        return None
+
+    if bundle.get("keywords") != keyword_lexicon():
+        logger.warning("Léxico do bundle de NLP desatualizado - usando palavras-chave atuais")
+        bundle["keywords"] = keyword_lexicon()
+
+    return bundle
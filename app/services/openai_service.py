@@ -2,79 +2,254 @@
 Serviço para integração com OpenAI
 """
 import logging
-from openai import OpenAI
-from ..config.settings import OPENAI_API_KEY, OPENAI_MODEL, OPENAI_MAX_TOKENS, OPENAI_TIMEOUT
+import threading
+from contextlib import contextmanager
+from typing import AsyncIterator
+from .circuit_breaker import CircuitBreaker, CircuitOpenError
+from .metrics import record_openai_error, record_circuit_state
+from ..config.settings import (
+    OPENAI_API_KEY, OPENAI_MODEL, OPENAI_MAX_TOKENS, OPENAI_TIMEOUT, OPENAI_BASE_URL,
+    OPENAI_MAX_CONNECTIONS, OPENAI_MAX_KEEPALIVE_CONNECTIONS, OPENAI_KEEPALIVE_EXPIRY,
+    OPENAI_CIRCUIT_ENABLED, OPENAI_CIRCUIT_WINDOW, OPENAI_CIRCUIT_MIN_CALLS,
+    OPENAI_CIRCUIT_FAILURE_RATE, OPENAI_CIRCUIT_OPEN_SECONDS, OPENAI_CIRCUIT_HALF_OPEN_CALLS
+)
 
 logger = logging.getLogger(__name__)
 
 class OpenAIService:
     """Serviço para comunicação com API da OpenAI"""
-    
-    def __init__(self):
-        self.client = None
-        self._initialize_client()
-    
-    def _initialize_client(self):
-        """Inicializar cliente OpenAI"""
-        if not OPENAI_API_KEY:
+
+    def __init__(self, api_key: str = OPENAI_API_KEY, base_url: str = OPENAI_BASE_URL):
+        self.api_key = api_key
+        self.base_url = base_url
+        self._client = None
+        self._async_client = None
+        self._initialized = False
+        self._lock = threading.Lock()
+        self.breaker = CircuitBreaker(
+            "openai",
+            window_seconds=OPENAI_CIRCUIT_WINDOW,
+            min_calls=OPENAI_CIRCUIT_MIN_CALLS,
+            failure_rate=OPENAI_CIRCUIT_FAILURE_RATE,
+            open_seconds=OPENAI_CIRCUIT_OPEN_SECONDS,
+            half_open_calls=OPENAI_CIRCUIT_HALF_OPEN_CALLS,
+            on_state_change=record_circuit_state
+        ) if OPENAI_CIRCUIT_ENABLED else None
+        if not self.api_key:
             logger.warning("OPENAI_API_KEY não configurada")
-            return
-        
-        try:
-            self.client = OpenAI(api_key=OPENAI_API_KEY)
-            logger.info("Cliente OpenAI inicializado com sucesso")
-        except Exception as e:
-            logger.error(f"Erro ao inicializar cliente OpenAI: {e}")
-            self.client = None
-    
+
+    @staticmethod
+    def _pool_limits():
+        """Limites do pool de conexões (keep-alive e máximo de conexões)"""
+        import httpx
+        return httpx.Limits(
+            max_connections=OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY
+        )
+
+    def _initialize_client(self):
+        """
+        Inicializar clientes OpenAI (síncrono para scripts, assíncrono para as rotas) no
+        primeiro uso: o SDK da OpenAI é a importação mais pesada da aplicação
+        """
+        with self._lock:
+            if self._initialized:
+                return
+            self._initialized = True
+            if not self.api_key:
+                return
+
+            try:
+                import httpx
+                from openai import OpenAI, AsyncOpenAI
+
+                self._client = OpenAI(
+                    api_key=self.api_key,
+                    base_url=self.base_url,
+                    http_client=httpx.Client(limits=self._pool_limits())
+                )
+                self._async_client = AsyncOpenAI(
+                    api_key=self.api_key,
+                    base_url=self.base_url,
+                    http_client=httpx.AsyncClient(limits=self._pool_limits())
+                )
+                logger.info("Cliente OpenAI inicializado com sucesso")
+            except Exception as e:
+                logger.error(f"Erro ao inicializar cliente OpenAI: {e}")
+                self._client = None
+                self._async_client = None
+
+    @property
+    def client(self):
+        self._initialize_client()
+        return self._client
+
+    @property
+    def async_client(self):
+        self._initialize_client()
+        return self._async_client
+
     def is_configured(self) -> bool:
         """Verificar se OpenAI está configurada"""
         return self.client is not None
-    
+
+    def circuit_status(self) -> dict:
+        """Estado do circuit breaker (para /health e /test-openai)"""
+        if self.breaker is None:
+            return {"state": "disabled"}
+        return self.breaker.snapshot()
+
+    @staticmethod
+    def _is_outage(error: Exception) -> bool:
+        """Falhas que indicam indisponibilidade da OpenAI, e não erro da própria requisição"""
+        import openai
+        if isinstance(error, openai.APIStatusError):
+            return error.status_code == 429 or error.status_code >= 500
+        return True
+
+    @contextmanager
+    def _circuit(self):
+        """Passar uma chamada pelo circuit breaker, registrando o resultado"""
+        if self.breaker is None:
+            yield
+            return
+
+        if not self.breaker.allow():
+            raise CircuitOpenError("Circuito da OpenAI aberto - chamada não realizada")
+
+        try:
+            yield
+        except Exception as e:
+            if self._is_outage(e):
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            raise
+        except BaseException:
+            # Cancelamento (prazo da requisição, cliente desconectado): sem resultado
+            self.breaker.release()
+            raise
+        else:
+            self.breaker.record_success()
+
+    def _completion_params(self, prompt: str, system_prompt: str) -> dict:
+        """Parâmetros da chamada de chat completion"""
+        return {
+            "model": OPENAI_MODEL,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            "max_tokens": OPENAI_MAX_TOKENS,
+            "temperature": 0.8,
+            "timeout": OPENAI_TIMEOUT
+        }
+
     def generate_response(self, prompt: str, system_prompt: str) -> str:
+        """Gerar resposta de forma síncrona (bloqueia a thread atual)"""
+        if not self.is_configured():
+            raise Exception("OpenAI não configurada")
+
+        with self._circuit():
+            try:
+                response = self.client.chat.completions.create(**self._completion_params(prompt, system_prompt))
+                content = response.choices[0].message.content
+                return content.strip() if content else ""
+
+            except Exception as e:
+                logger.error(f"Erro na geração com OpenAI: {e}")
+                record_openai_error(e)
+                raise
+
+    async def generate_response_async(self, prompt: str, system_prompt: str) -> str:
+        """Gerar resposta sem bloquear o event loop"""
         if not self.is_configured():
             raise Exception("OpenAI não configurada")
-        
+
+        with self._circuit():
+            try:
+                response = await self.async_client.chat.completions.create(
+                    **self._completion_params(prompt, system_prompt)
+                )
+                content = response.choices[0].message.content
+                return content.strip() if content else ""
+
+            except Exception as e:
+                logger.error(f"Erro na geração com OpenAI: {e}")
+                record_openai_error(e)
+                raise
+
+    async def stream_response_async(self, prompt: str, system_prompt: str) -> AsyncIterator[str]:
+        """Gerar resposta em streaming, produzindo os trechos de texto conforme chegam"""
+        if not self.is_configured():
+            raise Exception("OpenAI não configurada")
+
+        with self._circuit():
+            try:
+                stream = await self.async_client.chat.completions.create(
+                    **self._completion_params(prompt, system_prompt),
+                    stream=True
+                )
+                async for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+
+            except Exception as e:
+                logger.error(f"Erro no streaming com OpenAI: {e}")
+                record_openai_error(e)
+                raise
+
+    def test_connection(self) -> dict:
+        """Testar conexão com OpenAI"""
+        if not self.is_configured():
+            return {"status": "error", "message": "OpenAI não configurada"}
+
         try:
             response = self.client.chat.completions.create(
                 model=OPENAI_MODEL,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=OPENAI_MAX_TOKENS,
-                temperature=0.8,
-                timeout=OPENAI_TIMEOUT
+                messages=[{"role": "user", "content": "Teste de conexão. Responda 'OK'"}],
+                max_tokens=10,
+                temperature=0.1
             )
-            content = response.choices[0].message.content
-            return content.strip() if content else ""
-            
+
+            return {
+                "status": "success",
+                "response": response.choices[0].message.content,
+                "model": OPENAI_MODEL
+            }
+
         except Exception as e:
-            logger.error(f"Erro na geração com OpenAI: {e}")
-            raise
+            return {"status": "error", "message": str(e)}
 
-        
-    def test_connection(self) -> dict:
-        """Testar conexão com OpenAI"""
+    async def test_connection_async(self) -> dict:
+        """Testar conexão com OpenAI sem bloquear o event loop"""
         if not self.is_configured():
             return {"status": "error", "message": "OpenAI não configurada"}
-        
+
         try:
-            response = self.client.chat.completions.create(
+            response = await self.async_client.chat.completions.create(
                 model=OPENAI_MODEL,
                 messages=[{"role": "user", "content": "Teste de conexão. Responda 'OK'"}],
                 max_tokens=10,
                 temperature=0.1
             )
-            
+
             return {
                 "status": "success",
                 "response": response.choices[0].message.content,
                 "model": OPENAI_MODEL
             }
-            
+
         except Exception as e:
             return {"status": "error", "message": str(e)}
 
+    async def close(self):
+        """Fechar os pools de conexão (se chegaram a ser criados)"""
+        if self._async_client is not None:
+            await self._async_client.close()
+        if self._client is not None:
+            self._client.close()
+
 # Instância global do serviço
-openai_service = OpenAIService()
\ No newline at end of file
+openai_service = OpenAIService()
@@ -0,0 +1,204 @@
+"""
+Extração de texto de PDFs por faixas de páginas em um pool de processos
+"""
+import logging
+import multiprocessing
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import BinaryIO, Iterator, Optional, Union
+from ..config.settings import (
+    PDF_POOL_WORKERS, PDF_PAGES_PER_TASK, PDF_PARALLEL_MIN_PAGES,
+    PDF_MAX_PAGES, PDF_EXTRACTION_TIMEOUT
+)
+
+logger = logging.getLogger(__name__)
+
+ENGINES = ("pdfplumber", "PyPDF2")
+
+class PDFExtractionTimeout(Exception):
+    """Tempo limite de extração do PDF excedido"""
+
+def iter_page_range(source: Union[str, BinaryIO], start: int, end: Optional[int],
+                    engine: str, deadline: float) -> Iterator[str]:
+    """Texto de cada página [start, end) de um PDF, à medida que é extraída"""
+    # pdfplumber (pdfminer) e PyPDF2 são importados só quando há PDF para extrair
+    if engine == "pdfplumber":
+        import pdfplumber
+        pages = range(start + 1, end + 1) if end is not None else None
+        with pdfplumber.open(source, pages=pages) as pdf:
+            for page in pdf.pages:
+                if time.time() > deadline:
+                    raise PDFExtractionTimeout("Tempo limite de extração do PDF excedido")
+                text = page.extract_text() or ""
+                # Liberar objetos de layout da página já processada
+                page.flush_cache()
+                yield text
+    else:
+        import PyPDF2
+        reader = PyPDF2.PdfReader(source)
+        for index in range(start, end if end is not None else len(reader.pages)):
+            if time.time() > deadline:
+                raise PDFExtractionTimeout("Tempo limite de extração do PDF excedido")
+            yield reader.pages[index].extract_text() or ""
+
+def extract_page_range(source: Union[str, BinaryIO], start: int, end: Optional[int],
+                       engine: str, deadline: float) -> list[str]:
+    """Extrair o texto das páginas [start, end) de um PDF (roda nos processos do pool)"""
+    return list(iter_page_range(source, start, end, engine, deadline))
+
+class PDFExtractor:
+    """Extrator de PDF com paralelismo por páginas e limites de páginas e tempo"""
+
+    def __init__(self, workers: int = PDF_POOL_WORKERS, pages_per_task: int = PDF_PAGES_PER_TASK,
+                 parallel_min_pages: int = PDF_PARALLEL_MIN_PAGES, max_pages: int = PDF_MAX_PAGES,
+                 timeout: float = PDF_EXTRACTION_TIMEOUT):
+        self.workers = workers
+        self.pages_per_task = max(1, pages_per_task)
+        self.parallel_min_pages = parallel_min_pages
+        self.max_pages = max_pages
+        self.timeout = timeout
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Criar o pool sob demanda ("spawn" evita fork de um processo com threads)"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    @staticmethod
+    def page_count(source: BinaryIO) -> Optional[int]:
+        """Contar páginas do PDF (None se o arquivo não puder ser lido)"""
+        try:
+            import PyPDF2
+            source.seek(0)
+            return len(PyPDF2.PdfReader(source).pages)
+        except Exception as e:
+            logger.warning(f"Não foi possível contar as páginas do PDF: {e}")
+            return None
+
+    def _page_ranges(self, total_pages: Optional[int]) -> list[tuple[int, Optional[int]]]:
+        if total_pages is None:
+            return [(0, None)]
+        if total_pages > self.max_pages:
+            logger.warning(f"PDF com {total_pages} páginas, extraindo apenas as {self.max_pages} primeiras")
+            total_pages = self.max_pages
+        return [
+            (start, min(start + self.pages_per_task, total_pages))
+            for start in range(0, total_pages, self.pages_per_task)
+        ]
+
+    def _iter_pool(self, path: str, ranges: list, engine: str, deadline: float) -> Iterator[str]:
+        """Páginas extraídas no pool, na ordem, entregues assim que cada faixa fica pronta"""
+        executor = self._get_executor()
+        futures = [
+            executor.submit(extract_page_range, path, start, end, engine, deadline)
+            for start, end in ranges
+        ]
+        try:
+            for future in futures:
+                try:
+                    texts = future.result(timeout=max(0.0, deadline - time.time()))
+                except FutureTimeoutError:
+                    raise PDFExtractionTimeout("Tempo limite de extração do PDF excedido")
+                yield from texts
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def _iter_pages(self, source: BinaryIO, path: Optional[str], ranges: list,
+                    engine: str, deadline: float) -> Iterator[str]:
+        """Extrair as faixas no pool (se houver arquivo em disco) ou no próprio processo"""
+        if path is not None:
+            pages = self._iter_pool(path, ranges, engine, deadline)
+            try:
+                # Um pool quebrado aparece na primeira faixa, antes de qualquer página entregue
+                first_page = next(pages, None)
+            except BrokenProcessPool as e:
+                logger.error(f"Pool de extração de PDF indisponível, extraindo no processo: {e}")
+                self.shutdown()
+            else:
+                if first_page is not None:
+                    yield first_page
+                    yield from pages
+                return
+
+        source.seek(0)
+        yield from iter_page_range(source, 0, ranges[-1][1], engine, deadline)
+
+    def extract(self, source: BinaryIO) -> str:
+        """Extrair texto de PDF (pdfplumber, com fallback para PyPDF2)"""
+        return "".join(self.extract_pages(source))
+
+    def extract_pages(self, source: BinaryIO) -> Iterator[str]:
+        """
+        Texto de cada página não vazia, na ordem, já com a quebra de linha final, entregue
+        durante a extração. Se o pdfplumber falhar no meio do documento, o PyPDF2 continua
+        a partir da primeira página ainda não entregue
+        """
+        deadline = time.time() + self.timeout
+        total_pages = self.page_count(source)
+        ranges = self._page_ranges(total_pages)
+        parallel = (
+            self.workers > 0
+            and len(ranges) > 1
+            and total_pages is not None
+            and total_pages >= self.parallel_min_pages
+        )
+
+        with tempfile.NamedTemporaryFile(suffix=".pdf") if parallel else nullcontext() as pdf_file:
+            if parallel:
+                # Os processos do pool leem o documento do disco
+                source.seek(0)
+                shutil.copyfileobj(source, pdf_file)
+                pdf_file.flush()
+
+            delivered = 0
+            for engine in ENGINES:
+                # Páginas em branco ficam retidas até aparecer texto: um motor que não
+                # extrai nada não entrega coisa alguma e o próximo recomeça do início
+                held, has_text = [], delivered > 0
+                try:
+                    path = pdf_file.name if parallel else None
+                    for index, page_text in enumerate(self._iter_pages(source, path, ranges, engine, deadline)):
+                        if index < delivered:
+                            continue
+                        held.append(page_text)
+                        if page_text.strip():
+                            has_text = True
+                        if has_text:
+                            for text in held:
+                                if text:
+                                    yield text + "\n"
+                            delivered = index + 1
+                            held = []
+                except PDFExtractionTimeout:
+                    raise
+                except Exception as e:
+                    logger.warning(f"{engine} falhou: {e}")
+                    continue
+
+                if has_text:
+                    logger.info(f"Texto extraído com {engine}")
+                    return
+
+        raise Exception("Não foi possível extrair texto do PDF")
+
+    def shutdown(self):
+        """Encerrar o pool de processos"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+# Instância global do extrator
+pdf_extractor = PDFExtractor()
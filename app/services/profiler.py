@@ -0,0 +1,159 @@
+"""
+Profiling de requisições isoladas, gravado em PROFILING_DIR com o id da requisição
+
+- sampling: uma thread lê as pilhas de todas as threads do processo a cada
+  PROFILING_INTERVAL segundos e grava as pilhas colapsadas (<id>.collapsed), no formato
+  do flamegraph.pl e do speedscope. Inclui a extração feita em threads, e também o que
+  as outras requisições do mesmo worker estiverem fazendo
+- cprofile: cProfile determinístico (<id>.pstats), apenas na thread do event loop
+  (inclui as outras corrotinas do loop, mas não o trabalho enviado a threads)
+"""
+import cProfile
+import logging
+import os
+import sys
+import threading
+from collections import Counter
+from typing import Optional
+from ..config.settings import PROFILING_MODE, PROFILING_INTERVAL, PROFILING_DIR, PROFILING_MAX_FILES
+
+logger = logging.getLogger(__name__)
+
+PROFILING_MODES = ("sampling", "cprofile")
+
+def _is_idle(frame) -> bool:
+    """Thread parada esperando trabalho (pool de threads ou Condition.wait)"""
+    code = frame.f_code
+    return (code.co_name == "_worker" and code.co_filename.endswith(os.path.join("concurrent", "futures", "thread.py"))) \
+        or (code.co_name == "wait" and code.co_filename.endswith("threading.py"))
+
+class SamplingProfiler:
+    """Amostragem das pilhas de todas as threads do processo, numa thread à parte"""
+
+    def __init__(self, interval: float = PROFILING_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._labels = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            filename = code.co_filename
+            for prefix in sorted(sys.path, key=len, reverse=True):
+                if prefix and filename.startswith(prefix + os.sep):
+                    filename = filename[len(prefix) + 1:]
+                    break
+            label = self._labels[code] = f"{code.co_name} ({filename}:{code.co_firstlineno})"
+        return label
+
+    def _sample(self):
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own or _is_idle(frame):
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(self._label(frame.f_code))
+                frame = frame.f_back
+            stack.append(names.get(ident, str(ident)))
+            self.stacks[";".join(reversed(stack))] += 1
+        self.samples += 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def dump(self, path: str):
+        """Pilhas colapsadas: uma linha por pilha distinta, com o número de amostras"""
+        with open(path, "w", encoding="utf-8") as output:
+            for stack, count in self.stacks.most_common():
+                output.write(f"{stack} {count}\n")
+
+class DeterministicProfiler:
+    """cProfile na thread atual"""
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+
+    def start(self):
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+
+    def dump(self, path: str):
+        self.profile.dump_stats(path)
+
+class RequestProfiler:
+    """
+    Um perfil por vez em cada processo: o cProfile e a amostragem de todas as threads
+    não distinguem requisições simultâneas, então as demais seguem sem profiling
+    """
+
+    def __init__(self, mode: str = PROFILING_MODE, interval: float = PROFILING_INTERVAL,
+                 directory: str = PROFILING_DIR, max_files: int = PROFILING_MAX_FILES):
+        if mode not in PROFILING_MODES:
+            logger.warning(f"PROFILING_MODE inválido: {mode} - usando sampling")
+            mode = "sampling"
+        self.mode = mode
+        self.interval = interval
+        self.directory = directory
+        self.max_files = max_files
+        self._active = False
+        self._lock = threading.Lock()
+
+    @property
+    def extension(self) -> str:
+        return "collapsed" if self.mode == "sampling" else "pstats"
+
+    def start(self):
+        """Iniciar um perfil (None se já houver um em andamento neste processo)"""
+        with self._lock:
+            if self._active:
+                return None
+            self._active = True
+        profiler = SamplingProfiler(self.interval) if self.mode == "sampling" else DeterministicProfiler()
+        profiler.start()
+        return profiler
+
+    def stop(self, profiler):
+        profiler.stop()
+        with self._lock:
+            self._active = False
+
+    def save(self, profiler, request_id: str) -> Optional[str]:
+        """Gravar o perfil como <request_id>.<extensão> e descartar os mais antigos"""
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, f"{request_id}.{self.extension}")
+            profiler.dump(path)
+            self._prune()
+            logger.info(f"Perfil da requisição {request_id} gravado em {path}")
+            return path
+        except OSError as e:
+            logger.warning(f"Não foi possível gravar o perfil da requisição {request_id}: {e}")
+            return None
+
+    def _prune(self):
+        if self.max_files <= 0:
+            return
+        entries = [entry for entry in os.scandir(self.directory) if entry.is_file()]
+        if len(entries) > self.max_files:
+            entries.sort(key=lambda entry: entry.stat().st_mtime)
+            for entry in entries[:len(entries) - self.max_files]:
+                os.remove(entry.path)
+
+# Instância global
+request_profiler = RequestProfiler()
@@ -0,0 +1,237 @@
+"""
+Montagem do prompt da geração de respostas dentro de um orçamento de tokens
+
+O email é limpo (espaços, respostas citadas, assinatura, cabeçalhos repetidos de
+PDF) e, se ainda não couber, reduzido às frases com mais palavras-chave do
+classificador, mantidas na ordem original. Só o início do email (PROMPT_INPUT_CHARS_PER_TOKEN
+caracteres por token do orçamento) é considerado, e o custo não cresce com o arquivo.
+"""
+import logging
+import math
+import os
+import re
+from collections import Counter
+from typing import Optional
+from .keyword_matcher import KeywordMatcher, keyword_matcher
+from .metrics import record_prompt_tokens, track_stage
+from .scoring_engine import scoring_engine
+from ..config.settings import (
+    OPENAI_MODEL, PROMPT_TOKEN_BUDGET, PROMPT_TOKENIZER_ENCODING, TOKENIZER_CACHE_DIR,
+    PROMPT_INPUT_CHARS_PER_TOKEN
+)
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+PROMPT_TEMPLATE = 'ANÁLISE: {context}\nEMAIL: "{email}"\nINSTRUÇÕES: Gere resposta {tone} baseada no contexto.\nRESPOSTA:'
+OMISSION_MARKER = "(...)"
+
+# Ruído que não ajuda a responder: respostas citadas, cabeçalhos de encaminhamento,
+# assinaturas de celular e numeração de páginas de PDF
+NOISE_LINE_PATTERN = re.compile(
+    r'(?i)^(?:>.*'
+    r'|(?:em|on)\s.{0,200}\s(?:escreveu|wrote):?'
+    r'|-{2,}\s*(?:mensagem\s+(?:original|encaminhada)|original\s+message|forwarded\s+message)\s*-*'
+    r'|(?:enviado\s+do\s+meu|sent\s+from\s+my)\s.*'
+    r'|p[áa]gina\s+\d+(?:\s+(?:de|of)\s+\d+)?|page\s+\d+(?:\s+of\s+\d+)?|\d+\s*/\s*\d+)$'
+)
+SIGNATURE_DELIMITER_PATTERN = re.compile(r'^--\s?$')
+CLOSING_PATTERN = re.compile(
+    r'(?i)^(?:att\.?|atenciosamente|cordialmente|abraços?|um abraço|saudações|grato|grata'
+    r'|best regards|regards|kind regards)[,.!]?$'
+)
+SENTENCE_SPLIT_PATTERN = re.compile(r'(?<=[.!?])\s+')
+# Estimativa sem tokenizer: palavras, números e cada sinal de pontuação
+TOKEN_ESTIMATE_PATTERN = re.compile(r'\w+|[^\w\s]')
+
+# Linhas depois da despedida que ainda contam como assinatura
+SIGNATURE_MAX_LINES = 8
+# Linhas curtas que se repetem tantas vezes são cabeçalho/rodapé de página
+REPEATED_LINE_MIN_COUNT = 3
+REPEATED_LINE_MAX_LENGTH = 120
+
+class TokenCounter:
+    """Contagem de tokens com o tiktoken (se disponível localmente) ou por estimativa"""
+
+    def __init__(self, encoding_name: str = PROMPT_TOKENIZER_ENCODING, model: str = OPENAI_MODEL,
+                 cache_dir: str = TOKENIZER_CACHE_DIR):
+        self.encoding_name = encoding_name
+        self.model = model
+        self.cache_dir = cache_dir
+        self._encoding = None
+        self._loaded = False
+
+    def load(self, download: bool = False):
+        """Carregar a codificação do tiktoken (download só com download=True, na etapa de build)"""
+        self._loaded = True
+        if tiktoken is None:
+            return None
+        if not download and not (os.path.isdir(self.cache_dir) and os.listdir(self.cache_dir)):
+            return None
+
+        os.environ.setdefault("TIKTOKEN_CACHE_DIR", self.cache_dir)
+        try:
+            if self.encoding_name:
+                self._encoding = tiktoken.get_encoding(self.encoding_name)
+            else:
+                try:
+                    self._encoding = tiktoken.encoding_for_model(self.model)
+                except KeyError:
+                    self._encoding = tiktoken.get_encoding("cl100k_base")
+            logger.info(f"Tokenizer do prompt: tiktoken {self._encoding.name}")
+        except Exception as e:
+            logger.warning(f"Codificação do tiktoken indisponível: {e} - estimando tokens")
+            self._encoding = None
+        return self._encoding
+
+    @property
+    def encoding(self):
+        if not self._loaded:
+            self.load()
+        return self._encoding
+
+    @property
+    def backend(self) -> str:
+        return f"tiktoken:{self.encoding.name}" if self.encoding is not None else "estimate"
+
+    def count(self, text: str) -> int:
+        if self.encoding is not None:
+            return len(self.encoding.encode_ordinary(text))
+        # Palavras longas viram vários tokens (cerca de 4 caracteres cada)
+        return sum(math.ceil(len(piece) / 4) for piece in TOKEN_ESTIMATE_PATTERN.findall(text))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Prefixo do texto com até max_tokens tokens"""
+        if max_tokens <= 0:
+            return ""
+        if self.encoding is not None:
+            tokens = self.encoding.encode_ordinary(text)
+            return text if len(tokens) <= max_tokens else self.encoding.decode(tokens[:max_tokens]).rstrip()
+
+        used = 0
+        for match in TOKEN_ESTIMATE_PATTERN.finditer(text):
+            used += math.ceil(len(match.group()) / 4)
+            if used > max_tokens:
+                return text[:match.start()].rstrip()
+        return text
+
+class PromptBuilder:
+    """Prompt com o email limpo e, se preciso, reduzido às frases mais informativas"""
+
+    def __init__(self, token_budget: int = PROMPT_TOKEN_BUDGET, counter: Optional[TokenCounter] = None,
+                 matcher: KeywordMatcher = keyword_matcher, chars_per_token: int = PROMPT_INPUT_CHARS_PER_TOKEN):
+        self.token_budget = token_budget
+        self.input_chars = max(1, token_budget) * chars_per_token
+        self.counter = counter or TokenCounter()
+        self.matcher = matcher
+        # Peso de cada palavra-chave do classificador (as de contexto valem 1)
+        self.weights = {word: 1.0 for word in matcher.keywords}
+        for word, weight in scoring_engine.productive + scoring_engine.unproductive:
+            self.weights[word] = max(weight, 1.0)
+
+    @staticmethod
+    def clean(text: str) -> list[str]:
+        """Linhas do email sem espaços extras, respostas citadas, assinatura e cabeçalhos repetidos"""
+        lines = []
+        for raw_line in text.splitlines():
+            if SIGNATURE_DELIMITER_PATTERN.match(raw_line):
+                break
+            line = " ".join(raw_line.split())
+            if line and not NOISE_LINE_PATTERN.match(line):
+                lines.append(line)
+
+        for index in range(len(lines) - 1, max(-1, len(lines) - SIGNATURE_MAX_LINES - 2), -1):
+            if CLOSING_PATTERN.match(lines[index]):
+                lines = lines[:index]
+                break
+
+        repeated = {
+            line for line, count in Counter(lines).items()
+            if count >= REPEATED_LINE_MIN_COUNT and len(line) <= REPEATED_LINE_MAX_LENGTH
+        }
+        if repeated:
+            seen = set()
+            lines = [line for line in lines if line not in repeated or not (line in seen or seen.add(line))]
+        return lines
+
+    @staticmethod
+    def split_sentences(lines: list[str]) -> list[str]:
+        """Frases das linhas, sem repetições (mantém a primeira ocorrência)"""
+        return list(dict.fromkeys(
+            sentence for line in lines for sentence in SENTENCE_SPLIT_PATTERN.split(line) if sentence
+        ))
+
+    def sentence_score(self, sentence: str) -> float:
+        """Soma dos pesos das palavras-chave encontradas na frase"""
+        weights = self.weights
+        return sum(weights.get(word, 1.0) for _, word in self.matcher.matches(sentence.lower()))
+
+    def window(self, email_text: str) -> str:
+        """Início do email com até input_chars caracteres (cortado num espaço)"""
+        if len(email_text) <= self.input_chars:
+            return email_text
+        cut = email_text.rfind(" ", self.input_chars // 2, self.input_chars)
+        return email_text[:cut if cut > 0 else self.input_chars]
+
+    def compact(self, email_text: str, budget: int) -> tuple[str, bool]:
+        """Email limpo dentro de budget tokens (e se foi preciso descartar conteúdo)"""
+        sentences = self.split_sentences(self.clean(email_text))
+        if not sentences:
+            text = " ".join(email_text.split())
+            truncated = self.counter.truncate(text, budget)
+            return truncated, truncated != text
+
+        cleaned = " ".join(sentences)
+        if self.counter.count(cleaned) <= budget:
+            return cleaned, False
+
+        # Mais palavras-chave primeiro; no empate, a frase que aparece antes
+        ranked = sorted(range(len(sentences)), key=lambda i: (-self.sentence_score(sentences[i]), i))
+        marker_tokens = self.counter.count(f" {OMISSION_MARKER}")
+        selected, used = [], 0
+        for index in ranked:
+            cost = self.counter.count(sentences[index]) + marker_tokens + 1
+            if used + cost <= budget:
+                selected.append(index)
+                used += cost
+
+        if not selected:
+            return self.counter.truncate(sentences[ranked[0]], budget), True
+
+        selected.sort()
+        parts = []
+        previous = -1
+        for index in selected:
+            if index != previous + 1:
+                parts.append(OMISSION_MARKER)
+            parts.append(sentences[index])
+            previous = index
+        if previous != len(sentences) - 1:
+            parts.append(OMISSION_MARKER)
+
+        compacted = " ".join(parts)
+        if self.counter.count(compacted) > budget:
+            compacted = self.counter.truncate(compacted, budget)
+        return compacted, True
+
+    def build(self, email_text: str, context: str, tone: str) -> str:
+        """Prompt completo (análise, email e instruções) dentro do orçamento de tokens"""
+        with track_stage("build_prompt"):
+            frame_tokens = self.counter.count(PROMPT_TEMPLATE.format(context=context, email="", tone=tone))
+            window = self.window(email_text)
+            email, compacted = self.compact(window, max(0, self.token_budget - frame_tokens))
+            prompt = PROMPT_TEMPLATE.format(context=context, email=email, tone=tone)
+            email_tokens = self.counter.count(window)
+            if len(window) < len(email_text):
+                # Tokens do email inteiro estimados pela proporção da janela
+                compacted = True
+                email_tokens = math.ceil(email_tokens * len(email_text) / max(1, len(window)))
+            record_prompt_tokens(email_tokens, self.counter.count(prompt), compacted)
+            return prompt
+
+# Instância global
+prompt_builder = PromptBuilder()
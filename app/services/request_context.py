@@ -0,0 +1,44 @@
+"""
+Contexto da requisição em andamento: id, amostragem dos logs e duração das etapas,
+compartilhados pelos middlewares de log e de profiling e lidos pelos registros de log
+"""
+import re
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+REQUEST_ID_HEADER = "X-Request-ID"
+# O id pode virar nome de arquivo (perfis): ids recebidos fora deste formato são substituídos
+REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+# Duração acumulada por etapa (definido só pelos middlewares de log JSON e de profiling;
+# sem eles, cada etapa custa apenas uma leitura desta variável)
+request_stages: ContextVar[Optional[dict]] = ContextVar("request_stages", default=None)
+# {"request_id": ..., "sampled": ...} da requisição em andamento
+request_info: ContextVar[Optional[dict]] = ContextVar("request_info", default=None)
+
+def request_id_for(scope) -> str:
+    """Id da requisição: o recebido em X-Request-ID (se válido) ou um novo, guardado no scope"""
+    state = scope.setdefault("state", {})
+    request_id = state.get("request_id")
+    if request_id is None:
+        header = REQUEST_ID_HEADER.lower().encode("latin-1")
+        value = next((value for name, value in scope["headers"] if name == header), b"").decode("latin-1")
+        request_id = value if REQUEST_ID_PATTERN.match(value) else uuid.uuid4().hex
+        state["request_id"] = request_id
+    return request_id
+
+@contextmanager
+def collect_stages() -> Iterator[dict]:
+    """Acumular a duração das etapas da requisição (reaproveitando a coleta de um middleware externo)"""
+    stages = request_stages.get()
+    if stages is not None:
+        yield stages
+        return
+    stages = {}
+    token = request_stages.set(stages)
+    try:
+        yield stages
+    finally:
+        request_stages.reset(token)
@@ -0,0 +1,253 @@
+"""
+Cache de respostas geradas pela OpenAI
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from contextlib import closing
+from typing import Optional
+from ..config.settings import (
+    OPENAI_MODEL, RESPONSE_CACHE_ENABLED, RESPONSE_CACHE_BACKEND,
+    RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_TTL, RESPONSE_CACHE_PATH, RESPONSE_CACHE_EVICT_EVERY
+)
+
+logger = logging.getLogger(__name__)
+
+class MemoryCacheBackend:
+    """Backend em memória com despejo LRU (por processo)"""
+
+    # Operações rápidas o bastante para rodar no event loop
+    blocking = False
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, now: float) -> Optional[tuple[str, float]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            response, latency, expires_at = entry
+            if expires_at <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return response, latency
+
+    def set(self, key: str, response: str, latency: float, expires_at: float):
+        with self._lock:
+            self._entries[key] = (response, latency, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def size(self) -> int:
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+class SQLiteCacheBackend:
+    """
+    Backend em SQLite: sobrevive a reinícios e é compartilhado entre workers. Entradas
+    vencidas e excedentes são removidas a cada evict_every inserções (o tamanho pode
+    passar do limite por até evict_every entradas)
+    """
+
+    # E/S em disco com espera por bloqueio: chamado fora do event loop
+    blocking = True
+
+    def __init__(self, path: str, max_entries: int, evict_every: int = 64):
+        self.path = path
+        self.max_entries = max_entries
+        self.evict_every = max(1, evict_every)
+        self._inserts = 0
+        self._lock = threading.Lock()
+        self._pid = None
+        self._connection = None
+        # Esquema criado com uma conexão temporária: o processo que importa o módulo
+        # (mestre do gunicorn com preload) não fica com conexão aberta para os workers
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, latency REAL NOT NULL, "
+                "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        """Conexão do processo atual (conexões SQLite não podem atravessar um fork)"""
+        if self._pid != os.getpid():
+            self._connection = self._connect()
+            self._pid = os.getpid()
+        return self._connection
+
+    def get(self, key: str, now: float) -> Optional[tuple[str, float]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, latency, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            response, latency, expires_at = row
+            if expires_at <= now:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            return response, latency
+
+    def set(self, key: str, response: str, latency: float, expires_at: float):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, latency, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, response, latency, expires_at, now)
+            )
+            self._inserts += 1
+            if self._inserts >= self.evict_every:
+                self._inserts = 0
+                self._evict(now)
+
+    def _evict(self, now: float):
+        """Remover entradas vencidas e as menos acessadas além de max_entries"""
+        self._conn.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+        self._conn.execute(
+            "DELETE FROM responses WHERE key IN ("
+            "SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+
+    def size(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+
+class ResponseCache:
+    """Cache de respostas com TTL, limite de tamanho e contadores de acerto"""
+
+    def __init__(self, backend, ttl: int, enabled: bool = True):
+        self.backend = backend
+        self.ttl = ttl
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self.llm_seconds = 0.0
+        # get/set também rodam em threads (get_async/set_async com backend em disco)
+        self._stats_lock = threading.Lock()
+
+    @staticmethod
+    def normalize(email_text: str) -> str:
+        """Normalizar texto do email (Unicode, espaços e caixa)"""
+        text = unicodedata.normalize("NFC", email_text)
+        return re.sub(r"\s+", " ", text).strip().lower()
+
+    def make_key(self, email_text: str, category: str, system_prompt: str) -> str:
+        """Chave: hash do texto normalizado, categoria, modelo e prompt do sistema"""
+        payload = "\x1f".join([self.normalize(email_text), category, OPENAI_MODEL, system_prompt])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Buscar resposta no cache"""
+        if not self.enabled:
+            return None
+
+        try:
+            entry = self.backend.get(key, time.time())
+        except Exception as e:
+            logger.warning(f"Falha ao ler cache de respostas: {e}")
+            entry = None
+
+        if entry is None:
+            with self._stats_lock:
+                self.misses += 1
+            return None
+
+        response, latency = entry
+        with self._stats_lock:
+            self.hits += 1
+            self.saved_seconds += latency
+        return response
+
+    def set(self, key: str, response: str, latency: float = 0.0):
+        """Armazenar resposta gerada e a latência do LLM que ela evita"""
+        if not self.enabled or not response:
+            return
+
+        with self._stats_lock:
+            self.llm_seconds += latency
+        try:
+            self.backend.set(key, response, latency, time.time() + self.ttl)
+        except Exception as e:
+            logger.warning(f"Falha ao gravar cache de respostas: {e}")
+
+    async def get_async(self, key: str) -> Optional[str]:
+        """get sem bloquear o event loop (backend com E/S roda numa thread)"""
+        if self.enabled and self.backend.blocking:
+            return await asyncio.to_thread(self.get, key)
+        return self.get(key)
+
+    async def set_async(self, key: str, response: str, latency: float = 0.0):
+        """set sem bloquear o event loop (backend com E/S roda numa thread)"""
+        if self.enabled and response and self.backend.blocking:
+            return await asyncio.to_thread(self.set, key, response, latency)
+        self.set(key, response, latency)
+
+    def stats(self) -> dict:
+        """Contadores do cache (por processo)"""
+        with self._stats_lock:
+            hits, misses = self.hits, self.misses
+            llm_seconds, saved_seconds = self.llm_seconds, self.saved_seconds
+        lookups = hits + misses
+        return {
+            "enabled": self.enabled,
+            "backend": type(self.backend).__name__,
+            "entries": self.backend.size(),
+            "max_entries": self.backend.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "llm_seconds": round(llm_seconds, 3),
+            "saved_llm_seconds": round(saved_seconds, 3)
+        }
+
+    def clear(self):
+        self.backend.clear()
+
+def _create_response_cache() -> ResponseCache:
+    """Criar cache conforme configuração, com fallback para memória"""
+    backend = None
+    if RESPONSE_CACHE_BACKEND == "sqlite":
+        try:
+            backend = SQLiteCacheBackend(RESPONSE_CACHE_PATH, RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_EVICT_EVERY)
+            logger.info(f"Cache de respostas em SQLite: {RESPONSE_CACHE_PATH}")
+        except Exception as e:
+            logger.warning(f"Cache SQLite indisponível, usando memória: {e}")
+
+    if backend is None:
+        backend = MemoryCacheBackend(RESPONSE_CACHE_MAX_ENTRIES)
+
+    return ResponseCache(backend, RESPONSE_CACHE_TTL, enabled=RESPONSE_CACHE_ENABLED)
+
+# Instância global do cache
+response_cache = _create_response_cache()
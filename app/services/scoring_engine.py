@@ -0,0 +1,287 @@
+"""
+Motor de pontuação da classificação: vocabulário e pesos compilados em vetores,
+com pontuação de lotes inteiros de emails em operações NumPy
+
+Os pesos vêm de app/models/constants.py ou de um artefato JSON versionado
+(SCORING_WEIGHTS_PATH), que pode ser gerado com:
+
+    python -m app.services.scoring_engine scoring_weights.json
+"""
+import json
+import logging
+import os
+import sys
+from typing import Iterable, Optional
+from .keyword_matcher import KeywordMatcher, keyword_matcher
+from ..config.settings import SCORING_WEIGHTS_PATH
+from ..models.constants import (
+    PRODUCTIVE_KEYWORDS, UNPRODUCTIVE_KEYWORDS, KEYWORD_WEIGHTS, DEFAULT_KEYWORD_WEIGHTS,
+    RATIO_THRESHOLDS, CONTEXT_KEYWORDS
+)
+
+# NumPy só é importado no primeiro lote grande (ver load_numpy)
+np = None
+_numpy_checked = False
+
+logger = logging.getLogger(__name__)
+
+SCORING_ARTIFACT_FORMAT = "emailsmart-scoring"
+SCORING_ARTIFACT_VERSION = 1
+
+# Abaixo disso o custo fixo das operações NumPy supera o do cálculo termo a termo
+MIN_VECTORIZED_BATCH = 64
+
+def load_numpy():
+    """Importar o NumPy sob demanda (None se não estiver instalado)"""
+    global np, _numpy_checked
+    if not _numpy_checked:
+        try:
+            import numpy
+            np = numpy
+        except ImportError:
+            np = None
+        _numpy_checked = True
+    return np
+
+def weights_from_constants() -> dict:
+    """Pesos e limiares atuais da aplicação, no formato do artefato"""
+    return {
+        "format": SCORING_ARTIFACT_FORMAT,
+        "version": SCORING_ARTIFACT_VERSION,
+        "productive": [
+            [word, KEYWORD_WEIGHTS.get(word, DEFAULT_KEYWORD_WEIGHTS['produtivo'])]
+            for word in PRODUCTIVE_KEYWORDS
+        ],
+        "unproductive": [
+            [word, KEYWORD_WEIGHTS.get(word, DEFAULT_KEYWORD_WEIGHTS['improdutivo'])]
+            for word in UNPRODUCTIVE_KEYWORDS
+        ],
+        "implicit_productive": list(CONTEXT_KEYWORDS['produtivo_implicito']),
+        "thresholds": dict(RATIO_THRESHOLDS)
+    }
+
+def save_weights(path: str, weights: Optional[dict] = None):
+    """Gravar o artefato de pesos (escrita atômica)"""
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as weights_file:
+        json.dump(weights or weights_from_constants(), weights_file, ensure_ascii=False, indent=2)
+    os.replace(temp_path, path)
+
+def load_weights(path: str) -> dict:
+    """Ler e validar um artefato de pesos"""
+    with open(path, encoding="utf-8") as weights_file:
+        weights = json.load(weights_file)
+
+    if weights.get("format") != SCORING_ARTIFACT_FORMAT or weights.get("version") != SCORING_ARTIFACT_VERSION:
+        raise ValueError(f"Artefato de pesos incompatível: {weights.get('format')} v{weights.get('version')}")
+    for key in ("productive", "unproductive", "implicit_productive"):
+        if not isinstance(weights.get(key), list):
+            raise ValueError(f"Artefato de pesos sem a lista '{key}'")
+    if set(weights.get("thresholds", {})) != set(RATIO_THRESHOLDS):
+        raise ValueError(f"Limiares esperados no artefato: {sorted(RATIO_THRESHOLDS)}")
+    return weights
+
+class ScoringEngine:
+    """
+    Pontuação produtivo/improdutivo de emails a partir das contagens de termos.
+
+    As contagens de um lote formam uma matriz esparsa em CSR (emails x vocabulário), só
+    com os termos não nulos; cada pontuação é o produto dessa matriz pelo vetor de pesos
+    de uma lista, somado na ordem da lista de palavras-chave para que os resultados
+    sejam idênticos aos do cálculo termo a termo. Sem NumPy, usa esse cálculo em Python
+    """
+
+    def __init__(self, weights: dict, matcher: Optional[KeywordMatcher] = None):
+        self.weights = weights
+        self.productive = [(word, float(weight)) for word, weight in weights["productive"]]
+        self.unproductive = [(word, float(weight)) for word, weight in weights["unproductive"]]
+        self.implicit = list(weights["implicit_productive"])
+        self.thresholds = weights["thresholds"]
+
+        # Listas podem repetir termos (cada ocorrência soma de novo): o vocabulário não
+        self.vocabulary = tuple(dict.fromkeys(
+            [word for word, _ in self.productive] + [word for word, _ in self.unproductive] + self.implicit
+        ))
+        self.index = {word: i for i, word in enumerate(self.vocabulary)}
+
+        if matcher is None or not set(self.vocabulary) <= set(matcher.keywords):
+            matcher = KeywordMatcher(self.vocabulary)
+        self.matcher = matcher
+        self._vectors_ready = False
+
+    @property
+    def backend(self) -> str:
+        return "numpy" if load_numpy() is not None else "python"
+
+    def _positions(self, keywords: list[tuple[str, float]]) -> tuple:
+        """Posições de cada termo do vocabulário numa lista, em CSR (indptr, posições)"""
+        positions = [[] for _ in self.vocabulary]
+        for position, (word, _) in enumerate(keywords):
+            positions[self.index[word]].append(position)
+        indptr = np.cumsum([0] + [len(word_positions) for word_positions in positions])
+        return indptr.astype(np.intp), np.array([p for word_positions in positions for p in word_positions], dtype=np.intp)
+
+    def _compile_vectors(self):
+        """Posições, pesos e termos implícitos em vetores NumPy (na primeira pontuação vetorizada)"""
+        if not self._vectors_ready:
+            np = load_numpy()
+            self._productive_positions = self._positions(self.productive)
+            self._productive_weights = np.array([w for _, w in self.productive], dtype=np.float64)
+            self._unproductive_positions = self._positions(self.unproductive)
+            self._unproductive_weights = np.array([w for _, w in self.unproductive], dtype=np.float64)
+            self._implicit_mask = np.zeros(len(self.vocabulary), dtype=bool)
+            self._implicit_mask[[self.index[w] for w in self.implicit]] = True
+            self._vectors_ready = True
+
+    @classmethod
+    def from_settings(cls, path: str = SCORING_WEIGHTS_PATH, matcher: Optional[KeywordMatcher] = None) -> "ScoringEngine":
+        """Pesos do artefato configurado, ou das constantes da aplicação"""
+        weights = None
+        if path:
+            try:
+                weights = load_weights(path)
+                logger.info(f"Pesos de classificação carregados de {path}")
+            except Exception as e:
+                logger.warning(f"Artefato de pesos inválido em {path}: {e} - usando constantes")
+        return cls(weights or weights_from_constants(), matcher)
+
+    def vectorize(self, texts: Iterable[str]) -> tuple:
+        """Matriz esparsa de contagens (emails x vocabulário) em CSR: (indptr, colunas, contagens)"""
+        self._compile_vectors()
+        indptr, columns, values = [0], [], []
+        for text in texts:
+            for word, count in self.matcher.count(text.lower()).items():
+                if count and word in self.index:
+                    columns.append(self.index[word])
+                    values.append(count)
+            indptr.append(len(columns))
+        return (np.array(indptr, dtype=np.intp), np.array(columns, dtype=np.intp),
+                np.array(values, dtype=np.float64))
+
+    @staticmethod
+    def _ordered_weighted_sum(counts: tuple, positions: tuple, weights):
+        """
+        Produto da matriz CSR pelo vetor de pesos de uma lista, somado na ordem da lista.
+
+        Cada termo não nulo vai para as posições da sua palavra na lista (positions, em CSR:
+        vocabulário x posições); os termos de cada email são ordenados por posição, postos
+        numa matriz densa (emails x maior número de termos de um email) e acumulados da
+        esquerda para a direita. np.add.reduce e o produto de matrizes somam em pares ou
+        em blocos, e uma diferença no último bit muda a classificação de razões exatamente
+        nos limiares; os termos nulos omitidos não alteram a soma (x + 0.0 == x)
+        """
+        indptr, columns, values = counts
+        position_ptr, position_index = positions
+        rows = len(indptr) - 1
+        entry_rows = np.repeat(np.arange(rows), np.diff(indptr))
+
+        repeats = position_ptr[columns + 1] - position_ptr[columns]
+        entry_rows = np.repeat(entry_rows, repeats)
+        first = np.repeat(np.cumsum(repeats) - repeats, repeats)
+        entry_positions = position_index[np.repeat(position_ptr[columns], repeats) + np.arange(len(first)) - first]
+        terms = np.repeat(values, repeats) * weights[entry_positions]
+
+        order = np.lexsort((entry_positions, entry_rows))
+        lengths = np.bincount(entry_rows, minlength=rows)
+        width = int(lengths.max()) if len(terms) else 0
+        if not width:
+            return np.zeros(rows)
+        offsets = np.arange(len(order)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        matrix = np.zeros((rows, width))
+        matrix[entry_rows[order], offsets] = terms[order]
+        return np.add.accumulate(matrix, axis=1)[:, -1]
+
+    def score(self, counts: tuple) -> tuple:
+        """Pontuações produtiva e improdutiva de cada linha da matriz"""
+        self._compile_vectors()
+        productive = self._ordered_weighted_sum(counts, self._productive_positions, self._productive_weights)
+        unproductive = self._ordered_weighted_sum(counts, self._unproductive_positions, self._unproductive_weights)
+        return productive, unproductive
+
+    def has_implicit(self, counts: tuple):
+        """Emails da matriz com algum termo de produtividade implícita"""
+        indptr, columns, _ = counts
+        rows = len(indptr) - 1
+        entry_rows = np.repeat(np.arange(rows), np.diff(indptr))
+        return np.bincount(entry_rows[self._implicit_mask[columns]], minlength=rows) > 0
+
+    def _decide(self, productive, unproductive, implicit) -> tuple[list[str], list[float]]:
+        """Categoria e confiança a partir das pontuações (vetorizado)"""
+        high, neutral, low = (self.thresholds[key] for key in ("produtivo", "neutro", "improdutivo"))
+        total = productive + unproductive
+        scored = total != 0
+        ratio = np.divide(productive, total, out=np.zeros_like(total), where=scored)
+
+        conditions = [
+            ~scored & implicit,
+            ~scored,
+            ratio > high,
+            ratio > neutral,
+            ratio > low
+        ]
+        is_productive = np.select(conditions, [True, False, True, True, False], default=False)
+        confidence = np.select(conditions, [
+            0.6,
+            0.55,
+            np.minimum(0.95, 0.7 + (ratio - high) * 2),
+            0.6 + (ratio - neutral) * 0.5,
+            0.55
+        ], default=np.minimum(0.95, 0.7 + (low - ratio) * 2))
+
+        categories = ["Produtivo" if flag else "Improdutivo" for flag in is_productive.tolist()]
+        return categories, confidence.tolist()
+
+    def predict(self, texts: list[str]) -> list[tuple[str, float]]:
+        """(categoria, confiança) de cada email do lote"""
+        if not texts:
+            return []
+        if len(texts) < MIN_VECTORIZED_BATCH or load_numpy() is None:
+            return [self._predict_python(text) for text in texts]
+
+        counts = self.vectorize(texts)
+        productive, unproductive = self.score(counts)
+        implicit = self.has_implicit(counts)
+        return list(zip(*self._decide(productive, unproductive, implicit)))
+
+    def predict_one(self, text: str) -> tuple[str, float]:
+        """(categoria, confiança) de um único email (sem o custo fixo das operações NumPy)"""
+        return self._predict_python(text)
+
+    def _predict_python(self, text: str) -> tuple[str, float]:
+        """Mesmo cálculo termo a termo, para emails isolados e ambientes sem NumPy"""
+        return self.predict_counts(self.matcher.count(text.lower()))
+
+    def predict_counts(self, counts: dict[str, int]) -> tuple[str, float]:
+        """(categoria, confiança) a partir das contagens de termos (também usado na classificação incremental)"""
+        high, neutral, low = (self.thresholds[key] for key in ("produtivo", "neutro", "improdutivo"))
+
+        productive_score = 0
+        for word, weight in self.productive:
+            productive_score += counts[word] * weight
+        unproductive_score = 0
+        for word, weight in self.unproductive:
+            unproductive_score += counts[word] * weight
+
+        total_score = productive_score + unproductive_score
+        if total_score == 0:
+            if KeywordMatcher.has_any(counts, self.implicit):
+                return "Produtivo", 0.6
+            return "Improdutivo", 0.55
+
+        ratio = productive_score / total_score
+        if ratio > high:
+            return "Produtivo", min(0.95, 0.7 + (ratio - high) * 2)
+        elif ratio > neutral:
+            return "Produtivo", 0.6 + (ratio - neutral) * 0.5
+        elif ratio > low:
+            return "Improdutivo", 0.55
+        else:
+            return "Improdutivo", min(0.95, 0.7 + (low - ratio) * 2)
+
+# Instância global (compartilha o autômato do keyword_matcher quando o vocabulário cabe nele)
+scoring_engine = ScoringEngine.from_settings(matcher=keyword_matcher)
+
+if __name__ == "__main__":
+    output_path = sys.argv[1] if len(sys.argv) > 1 else "scoring_weights.json"
+    save_weights(output_path)
+    print(f"Artefato de pesos v{SCORING_ARTIFACT_VERSION} gravado em {output_path}")
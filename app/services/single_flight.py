@@ -0,0 +1,72 @@
+"""
+Coalescência de chamadas idênticas em andamento (single-flight)
+"""
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional
+from .metrics import record_coalesced
+
+logger = logging.getLogger(__name__)
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+class SingleFlight:
+    """
+    Compartilhar uma única execução entre chamadas concorrentes com a mesma chave.
+    A entrada sai do registro assim que a execução termina, com sucesso ou erro:
+    todos os que aguardavam recebem o mesmo resultado (ou a mesma exceção) e a
+    próxima chamada começa uma execução nova
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._flights: dict[str, _Flight] = {}
+
+    def running(self, key: str) -> bool:
+        return key in self._flights
+
+    def _start(self, key: str, factory: Callable[[], Awaitable]) -> _Flight:
+        flight = _Flight(asyncio.ensure_future(factory()))
+        self._flights[key] = flight
+        flight.task.add_done_callback(lambda task: self._finish(key, flight))
+        return flight
+
+    def _finish(self, key: str, flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if flight.task.cancelled():
+            return
+        error = flight.task.exception()
+        if error is not None and flight.waiters == 0:
+            logger.warning(f"Execução compartilhada ({self.name}) falhou sem ninguém aguardando: {error}")
+
+    async def wait(self, key: str, factory: Callable[[], Awaitable],
+                   timeout: Optional[float] = None) -> asyncio.Task:
+        """
+        Aguardar a execução da chave (iniciando-a com factory se não houver uma em andamento)
+        por até timeout segundos. Retorna a tarefa compartilhada, concluída ou não
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._start(key, factory)
+        else:
+            record_coalesced(self.name)
+
+        flight.waiters += 1
+        try:
+            # asyncio.wait não cancela a tarefa se quem aguarda for cancelado
+            await asyncio.wait({flight.task}, timeout=timeout)
+        finally:
+            flight.waiters -= 1
+        return flight.task
+
+    def abandon(self, key: str, task: asyncio.Task):
+        """Cancelar a execução se ninguém mais estiver aguardando por ela"""
+        flight = self._flights.get(key)
+        if flight is not None and flight.task is task and flight.waiters == 0:
+            task.cancel()
@@ -0,0 +1,176 @@
+"""
+Classificação incremental de textos longos recebidos em trechos (páginas de PDF,
+blocos de TXT/DOCX decodificados), com contagens de palavras-chave acumuladas e
+parada antecipada quando a decisão se estabiliza
+"""
+import logging
+import time
+from typing import Callable, Iterable, Iterator, Optional
+from .scoring_engine import ScoringEngine, scoring_engine
+from .metrics import record_stream_classification
+from ..config.settings import (
+    STREAM_CLASSIFY_CHUNK_CHARS, STREAM_CLASSIFY_EARLY_STOP, STREAM_CLASSIFY_MIN_CHARS,
+    STREAM_CLASSIFY_STABLE_CHUNKS, STREAM_CLASSIFY_TOLERANCE
+)
+
+logger = logging.getLogger(__name__)
+
+# Até onde procurar, no fim de um trecho, um caractere que não seja letra para cortá-lo
+MAX_WORD_LENGTH = 256
+# Palavras-chave guardadas por texto (as respostas mostram no máximo 10)
+MAX_KEYWORDS = 10
+
+def iter_chunks(text: str, size: int = STREAM_CLASSIFY_CHUNK_CHARS) -> Iterator[str]:
+    """Fatias consecutivas de um texto já em memória"""
+    for start in range(0, len(text), size):
+        yield text[start:start + size]
+
+class StreamClassifier:
+    """
+    Classificador de um único texto recebido em trechos (feed), com a categoria e a
+    confiança atualizadas a cada trecho. Sem parada antecipada, o resultado é igual ao
+    de classify_email sobre o texto inteiro: cada trecho é cortado no último caractere
+    que não é letra (o resto segue para o próximo) e a contagem de termos reaproveita o
+    final do trecho anterior, para não perder palavras-chave na divisa
+    """
+
+    def __init__(self, engine: ScoringEngine = scoring_engine,
+                 keyword_extractor: Optional[Callable[[str], list[str]]] = None,
+                 early_stop: bool = STREAM_CLASSIFY_EARLY_STOP, min_chars: int = STREAM_CLASSIFY_MIN_CHARS,
+                 stable_chunks: int = STREAM_CLASSIFY_STABLE_CHUNKS, tolerance: float = STREAM_CLASSIFY_TOLERANCE):
+        self.engine = engine
+        self.keyword_extractor = keyword_extractor
+        self.early_stop = early_stop
+        self.min_chars = min_chars
+        self.stable_chunks = max(1, stable_chunks)
+        self.tolerance = tolerance
+
+        matcher = engine.matcher
+        self._matcher = matcher
+        self._lengths = {word: len(word) for word in matcher.keywords}
+        self._overlap = max(self._lengths.values(), default=1) - 1
+        self.counts = dict.fromkeys(matcher.keywords, 0)
+        self._next_start = {}
+        self.keywords = []
+
+        self.chars = 0  # caracteres já classificados
+        self._position = 0  # posição no texto em minúsculas (lower() pode mudar o tamanho)
+        self._pending = ""
+        self._tail = ""
+        self._content_start = None
+        self._content_end = None
+
+        self.category, self.confidence = "Improdutivo", 0.5
+        self._stable = 0
+        self.done = False
+        self.stopped_early = False
+        self.failed = False
+        self._elapsed = 0.0
+        self._recorded = False
+
+    def feed(self, chunk: str) -> bool:
+        """Acrescentar um trecho do texto. Retorna False quando a classificação já terminou"""
+        if self.done or not chunk:
+            return not self.done
+
+        start = time.perf_counter()
+        try:
+            data = self._pending + chunk
+            cut = self._cut_position(data)
+            self._pending = data[cut:]
+            if cut:
+                self._consume(data[:cut])
+                self._update()
+        except Exception as e:
+            logger.error(f"Erro na classificação incremental: {e}")
+            self.failed = True
+            self.done = True
+        finally:
+            self._elapsed += time.perf_counter() - start
+        return not self.done
+
+    def finish(self) -> tuple[str, float, list[str]]:
+        """Encerrar o texto e retornar (categoria, confiança, primeiras MAX_KEYWORDS palavras-chave)"""
+        if not self.done:
+            start = time.perf_counter()
+            try:
+                if self._pending:
+                    self._consume(self._pending)
+                    self._pending = ""
+            except Exception as e:
+                logger.error(f"Erro na classificação incremental: {e}")
+                self.failed = True
+            self.done = True
+            self._elapsed += time.perf_counter() - start
+
+        if not self._recorded:
+            self._recorded = True
+            record_stream_classification(self._elapsed, self.stopped_early)
+            if self.stopped_early:
+                logger.info(f"Classificação incremental encerrada após {self.chars} caracteres")
+
+        if self.failed:
+            return "Improdutivo", 0.5, self.keywords
+        if self._content_start is None or self._content_end - self._content_start + 1 < 5:
+            return "Improdutivo", 0.5, []
+        self.category, self.confidence = self.engine.predict_counts(self.counts)
+        return self.category, self.confidence, self.keywords
+
+    def classify(self, chunks: Iterable[str]) -> tuple[str, float, list[str]]:
+        """Consumir os trechos (até a parada antecipada) e retornar o resultado"""
+        for chunk in chunks:
+            if not self.feed(chunk):
+                break
+        return self.finish()
+
+    @staticmethod
+    def _cut_position(data: str) -> int:
+        """Posição logo após o último caractere que não é letra (palavras inteiras de um lado só)"""
+        for index in range(len(data) - 1, max(-1, len(data) - MAX_WORD_LENGTH - 1), -1):
+            if not data[index].isalpha():
+                return index + 1
+        # Palavra longa demais para ser palavra-chave: corta assim mesmo
+        return len(data) if len(data) > MAX_WORD_LENGTH else 0
+
+    def _consume(self, segment: str):
+        """Contar os termos e extrair as palavras-chave de um segmento"""
+        offset = self.chars
+        stripped_left = len(segment) - len(segment.lstrip())
+        if stripped_left < len(segment):
+            if self._content_start is None:
+                self._content_start = offset + stripped_left
+            self._content_end = offset + len(segment.rstrip()) - 1
+
+        # Ocorrências que terminam dentro do final do segmento anterior já foram contadas
+        lowered = segment.lower()
+        buffer = self._tail + lowered
+        base = self._position - len(self._tail)
+        seen = len(self._tail)
+        counts, next_start, lengths = self.counts, self._next_start, self._lengths
+        for start, word in self._matcher.matches(buffer):
+            end = start + lengths[word]
+            if end <= seen:
+                continue
+            position = base + start
+            if position >= next_start.get(word, 0):
+                counts[word] += 1
+                next_start[word] = position + lengths[word]
+        self._tail = buffer[-self._overlap:] if self._overlap else ""
+        self._position += len(lowered)
+
+        if self.keyword_extractor is not None and len(self.keywords) < MAX_KEYWORDS:
+            self.keywords.extend(self.keyword_extractor(segment)[:MAX_KEYWORDS - len(self.keywords)])
+        self.chars = offset + len(segment)
+
+    def _update(self):
+        """Atualizar a decisão parcial e verificar se ela se estabilizou"""
+        category, confidence = self.engine.predict_counts(self.counts)
+        if category == self.category and abs(confidence - self.confidence) <= self.tolerance:
+            self._stable += 1
+        else:
+            self._stable = 0
+        self.category, self.confidence = category, confidence
+
+        if self.early_stop and self.chars >= self.min_chars and self._stable >= self.stable_chunks:
+            self.stopped_early = True
+            self.done = True
@@ -0,0 +1,184 @@
+"""
+Aquecimento do processo: as bibliotecas pesadas são importadas sob demanda, e não na
+importação do app; antes de o worker se declarar pronto (/ready), elas são carregadas
+e um email, um PDF e um DOCX mínimos passam pelo pipeline, para que a primeira
+requisição real não pague esse custo
+"""
+import asyncio
+import importlib
+import io
+import logging
+import time
+import zipfile
+from typing import Optional
+from .email_processor import email_processor
+from .file_processor import FileProcessor
+from .metrics import record_startup
+from .openai_service import openai_service
+from .prompt_builder import prompt_builder
+from .scoring_engine import MIN_VECTORIZED_BATCH, load_numpy
+from ..config.settings import WARMUP_ENABLED
+
+logger = logging.getLogger(__name__)
+
+# Importadas sob demanda pelos serviços (ausentes são ignoradas)
+HEAVY_MODULES = ("httpx", "openai", "pdfplumber", "PyPDF2", "magic")
+
+SAMPLE_EMAIL = (
+    "Prezados, segue o relatório do projeto com o prazo atualizado. "
+    "Solicito suporte urgente: o sistema apresenta erro ao gerar o orçamento para o cliente. "
+    "Atenciosamente, Maria"
+)
+
+def sample_pdf(lines: list[str]) -> bytes:
+    """PDF mínimo de uma página (Helvetica, WinAnsi); as linhas não podem ter parênteses"""
+    content = ("BT /F1 12 Tf 14 TL 40 800 Td " + " ".join(f"({line}) '" for line in lines) + " ET").encode("cp1252")
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+        b"/Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+        b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content)
+    ]
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref_offset = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        output += b"%010d 00000 n \n" % offset
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset)
+    return bytes(output)
+
+def sample_docx(lines: list[str]) -> bytes:
+    """DOCX mínimo (um parágrafo por linha)"""
+    paragraphs = "".join(f"<w:p><w:r><w:t>{line}</w:t></w:r></w:p>" for line in lines)
+    document = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        f"<w:body>{paragraphs}</w:body></w:document>"
+    )
+    content_types = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/word/document.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+        "</Types>"
+    )
+    relationships = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="word/document.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+        "</Relationships>"
+    )
+    output = io.BytesIO()
+    with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as archive:
+        # [Content_Types].xml primeiro, como o Word grava (e como o libmagic espera)
+        archive.writestr("[Content_Types].xml", content_types)
+        archive.writestr("_rels/.rels", relationships)
+        archive.writestr("word/document.xml", document)
+    return output.getvalue()
+
+def import_heavy_modules():
+    """Importar as bibliotecas carregadas sob demanda"""
+    for name in HEAVY_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            logger.info(f"Aquecimento: {name} não instalado")
+    load_numpy()
+    # Primeira detecção de tipo carrega a base do libmagic
+    FileProcessor.detect_file_type(b"%PDF-1.4\n")
+
+def warm_email():
+    """Um email pela classificação (isolada e em lote) e pela montagem do prompt e do template"""
+    category, _, keywords = email_processor.classify_email(SAMPLE_EMAIL)
+    email_processor.classify_emails([SAMPLE_EMAIL] * MIN_VECTORIZED_BATCH)
+    email_processor._build_contextual_prompt(SAMPLE_EMAIL, category, keywords)
+    email_processor._get_contextual_fallback_response(SAMPLE_EMAIL, category, keywords)
+
+def warm_file(content: bytes, filename: str):
+    """Um arquivo pela detecção de tipo, extração e classificação incremental (sem o cache)"""
+    classifier = email_processor.stream_classifier()
+    FileProcessor.process_file(content, filename, classifier.feed)
+    classifier.finish()
+
+class Warmup:
+    """Estado do aquecimento deste processo, consultado pelo /ready"""
+
+    def __init__(self, enabled: bool = WARMUP_ENABLED):
+        self.enabled = enabled
+        self.ready = not enabled
+        self.import_seconds: Optional[float] = None
+        self.warmup_seconds: Optional[float] = None
+        self.steps: dict[str, float] = {}
+        self.errors: dict[str, str] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def set_import_time(self, seconds: float):
+        """Registrar quanto a importação do app levou"""
+        self.import_seconds = seconds
+        record_startup("import", seconds)
+        logger.info(f"App importado em {seconds * 1000:.0f} ms")
+
+    def _step(self, name: str, function, *args):
+        """Executar uma etapa medindo o tempo; a falha é registrada, mas não impede as demais"""
+        start = time.perf_counter()
+        try:
+            function(*args)
+        except Exception as e:
+            logger.warning(f"Aquecimento: etapa {name} falhou: {e}")
+            self.errors[name] = str(e)
+        self.steps[name] = round((time.perf_counter() - start) * 1000, 1)
+
+    def warm_imports(self):
+        """
+        Etapas que podem rodar antes do fork (hook when_ready do gunicorn): bibliotecas
+        e recursos de NLP só de leitura, compartilhados pelos workers
+        """
+        self._step("imports", import_heavy_modules)
+        self._step("nlp", email_processor.load_nlp_resources)
+
+    def _warm_pipeline(self):
+        if "imports" not in self.steps:
+            self.warm_imports()
+        self._step("tokenizer", lambda: prompt_builder.counter.encoding)
+        # Sem chamada real à OpenAI: só o cliente e o pool de conexões
+        self._step("openai_client", openai_service.is_configured)
+        self._step("email", warm_email)
+        self._step("pdf", warm_file, sample_pdf(SAMPLE_EMAIL.split(". ")), "warmup.pdf")
+        self._step("docx", warm_file, sample_docx(SAMPLE_EMAIL.split(". ")), "warmup.docx")
+
+    async def run(self):
+        """Aquecer o worker numa thread (o event loop segue atendendo /health e /ready)"""
+        start = time.perf_counter()
+        await asyncio.to_thread(self._warm_pipeline)
+        self.warmup_seconds = time.perf_counter() - start
+        self.ready = True
+        record_startup("warmup", self.warmup_seconds)
+        steps = ", ".join(f"{name}={ms:.0f}ms" for name, ms in self.steps.items())
+        logger.info(f"Aquecimento concluído em {self.warmup_seconds * 1000:.0f} ms ({steps})")
+
+    def start(self) -> Optional[asyncio.Task]:
+        """Iniciar o aquecimento em segundo plano (evento de startup)"""
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    def snapshot(self) -> dict:
+        return {
+            "status": "ready" if self.ready else "warming_up",
+            "import_ms": round(self.import_seconds * 1000, 1) if self.import_seconds is not None else None,
+            "warmup_ms": round(self.warmup_seconds * 1000, 1) if self.warmup_seconds is not None else None,
+            "steps": dict(self.steps),
+            "errors": dict(self.errors)
+        }
+
+# Instância global
+warmup = Warmup()
@@ -0,0 +1,95 @@
+"""
+Benchmark: /process-email sob sobrecarga, sem e com controle de admissão
+
+A OpenAI é simulada com capacidade limitada (no máximo --capacity chamadas em
+paralelo, cada uma com --latency segundos; as demais esperam do lado dela), e as
+requisições chegam em ritmo fixo (carga aberta) acima dessa capacidade. Sem
+admissão a fila cresce durante todo o teste e a latência acompanha; com admissão,
+o excedente é recusado (503) ou respondido por template, e as requisições
+atendidas pela OpenAI mantêm o p99 perto da latência da própria OpenAI.
+
+Uso: python -m benchmarks.bench_admission [--rate 80] [--duration 10] [--capacity 8] [--latency 0.2]
+"""
+import argparse
+import asyncio
+import logging
+import sys
+import time
+import httpx
+from app.main import app
+from app.services import email_processor as email_processor_module
+from app.services.admission import llm_admission
+from app.services.openai_service import openai_service
+from app.services.response_cache import response_cache
+from benchmarks.fixtures import make_email
+from benchmarks.suite import stub_openai, summarize
+
+async def run_case(args, max_concurrent: int, policy: str) -> dict:
+    llm_admission.max_concurrent = max_concurrent
+    llm_admission.max_queue = max_concurrent
+    email_processor_module.ADMISSION_POLICY = policy
+    upstream = asyncio.Semaphore(args.capacity)
+
+    async def generate_response_async(prompt: str, system_prompt: str) -> str:
+        async with upstream:
+            await asyncio.sleep(args.latency)
+        return "Resposta de teste"
+
+    accepted, degraded, rejected, errors = [], 0, 0, 0
+
+    async def send(http: httpx.AsyncClient, index: int):
+        nonlocal degraded, rejected, errors
+        start = time.perf_counter()
+        response = await http.post("/process-email", json={"email": make_email(500, index)},
+                                   headers={"X-Request-Deadline": "60"})
+        if response.status_code == 503:
+            rejected += 1
+        elif response.status_code != 200:
+            errors += 1
+        elif response.json()["fallback"]:
+            degraded += 1
+        else:
+            accepted.append(time.perf_counter() - start)
+
+    with stub_openai(configured=True):
+        openai_service.generate_response_async = generate_response_async
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as http:
+            tasks = []
+            interval = 1 / args.rate
+            start = time.perf_counter()
+            for index in range(int(args.rate * args.duration)):
+                delay = start + index * interval - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                tasks.append(asyncio.create_task(send(http, index)))
+            await asyncio.gather(*tasks)
+            wall_seconds = time.perf_counter() - start
+
+    result = summarize(accepted, wall_seconds) if accepted else {}
+    return {**result, "degraded": degraded, "rejected": rejected, "errors": errors}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=float, default=80, help="requisições por segundo")
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--capacity", type=int, default=8, help="chamadas simultâneas que a OpenAI simulada atende")
+    parser.add_argument("--latency", type=float, default=0.2)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    response_cache.enabled = False
+
+    print(f"carga {args.rate:g} req/s por {args.duration:g}s; capacidade da OpenAI simulada "
+          f"{args.capacity / args.latency:g} req/s ({args.capacity} x {args.latency:g}s)")
+    cases = [
+        ("sem admissão", 0, "degrade"),
+        ("admissão, reject", args.capacity, "reject"),
+        ("admissão, degrade", args.capacity, "degrade")
+    ]
+    for name, max_concurrent, policy in cases:
+        result = asyncio.run(run_case(args, max_concurrent, policy))
+        shown = ("samples", "p50_ms", "p99_ms", "max_ms", "degraded", "rejected", "errors")
+        print(f"{name:<20} " + "  ".join(f"{key}={result[key]}" for key in shown if key in result), flush=True)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""
+Benchmark: docx2txt (XML inteiro na memória) x extração em streaming (iterparse)
+
+Cada medição roda num processo novo, para que o pico de RSS seja só o da extração.
+
+Uso: python -m benchmarks.bench_docx_extraction [caracteres ...]
+"""
+import hashlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from benchmarks.fixtures import make_docx
+
+# Limite de caracteres do caso "streaming com limite"
+CAPPED_CHARS = 20000
+
+def memory_mb(field: str) -> float:
+    """VmRSS (atual) ou VmHWM (pico) do processo, em MB. O ru_maxrss não serve aqui:
+    o Linux preserva no filho o pico do processo pai"""
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith(f"{field}:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+def run_child(method: str, path: str):
+    """Extrair no processo atual e imprimir tempo e memória em JSON"""
+    import docx2txt
+    from app.services.docx_extractor import DocxExtractor
+
+    with open(path, "rb") as docx_file:
+        data = docx_file.read()
+    extract = {
+        "docx2txt": lambda: docx2txt.process(io.BytesIO(data)),
+        "streaming": lambda: DocxExtractor().extract(io.BytesIO(data)),
+        "streaming_capped": lambda: DocxExtractor(max_chars=CAPPED_CHARS).extract(io.BytesIO(data))
+    }[method]
+
+    baseline = memory_mb("VmRSS")
+    start = time.perf_counter()
+    text = extract()
+    elapsed = time.perf_counter() - start
+    peak = memory_mb("VmHWM")
+    print(json.dumps({"seconds": elapsed, "peak_rss_delta_mb": peak - baseline, "chars": len(text),
+                      "sha256": hashlib.sha256(text.encode("utf-8")).hexdigest()}))
+
+def measure(method: str, path: str) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_docx_extraction", "--child", method, path],
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main(sizes: list[int]):
+    for size in sizes:
+        with tempfile.NamedTemporaryFile(suffix=".docx", delete=False) as docx_file:
+            docx_file.write(make_docx(size))
+            path = docx_file.name
+            file_size = docx_file.tell()
+        try:
+            results = {method: measure(method, path) for method in ("docx2txt", "streaming", "streaming_capped")}
+        finally:
+            os.unlink(path)
+
+        legacy, streaming = results["docx2txt"], results["streaming"]
+        assert streaming["sha256"] == legacy["sha256"], "texto difere do docx2txt"
+        assert results["streaming_capped"]["chars"] <= CAPPED_CHARS
+
+        print(f"{size:>10} caracteres (DOCX de {file_size / 1024:.0f}KB)")
+        for method, result in results.items():
+            print(f"    {method:<17} {result['seconds'] * 1e3:9.1f}ms  "
+                  f"pico RSS +{result['peak_rss_delta_mb']:7.1f}MB  {result['chars']} caracteres  "
+                  f"({legacy['seconds'] / result['seconds']:.1f}x)")
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        run_child(sys.argv[2], sys.argv[3])
+    else:
+        main([int(arg) for arg in sys.argv[1:]] or [100_000, 2_000_000, 20_000_000])
@@ -0,0 +1,92 @@
+"""
+Benchmark: pontuação por palavras-chave (str.count por palavra x autômato compilado)
+
+Uso: python -m benchmarks.bench_keyword_matcher
+"""
+import random
+import timeit
+from app.models.constants import PRODUCTIVE_KEYWORDS, UNPRODUCTIVE_KEYWORDS, KEYWORD_WEIGHTS, CONTEXT_KEYWORDS
+from app.services import keyword_matcher as matcher_module
+from app.services.keyword_matcher import KeywordMatcher, keyword_matcher
+
+FILLER = (
+    "olá equipe segue em anexo o documento conforme combinado na última semana "
+    "favor verificar os itens pendentes e retornar assim que possível atenciosamente"
+).split()
+LEXICON = PRODUCTIVE_KEYWORDS + UNPRODUCTIVE_KEYWORDS + ["agradecimento", "obrigada", "festas", "ajudajuda"]
+
+def legacy_scores(email_text: str) -> tuple[float, float, bool]:
+    """Implementação anterior de classify_email (uma varredura por palavra)"""
+    email_lower = email_text.lower()
+    productive_score = 0
+    unproductive_score = 0
+    for word in PRODUCTIVE_KEYWORDS:
+        productive_score += email_lower.count(word) * KEYWORD_WEIGHTS.get(word, 1.2)
+    for word in UNPRODUCTIVE_KEYWORDS:
+        unproductive_score += email_lower.count(word) * KEYWORD_WEIGHTS.get(word, 1.0)
+    implicit = any(word in email_lower for word in CONTEXT_KEYWORDS['produtivo_implicito'])
+    return productive_score, unproductive_score, implicit
+
+def matcher_scores(email_text: str, matcher: KeywordMatcher) -> tuple[float, float, bool]:
+    counts = matcher.count(email_text.lower())
+    return (
+        matcher.weighted_score(counts, PRODUCTIVE_KEYWORDS, 1.2),
+        matcher.weighted_score(counts, UNPRODUCTIVE_KEYWORDS, 1.0),
+        matcher.has_any(counts, CONTEXT_KEYWORDS['produtivo_implicito'])
+    )
+
+def make_text(size: int, rng: random.Random) -> str:
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(LEXICON) if rng.random() < 0.05 else rng.choice(FILLER)
+        if rng.random() < 0.1:
+            word = word.upper()
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)[:size]
+
+def build_regex_matcher(keywords) -> KeywordMatcher:
+    """Forçar o backend de regex mesmo com pyahocorasick instalado"""
+    original = matcher_module.ahocorasick
+    matcher_module.ahocorasick = None
+    try:
+        return KeywordMatcher(keywords)
+    finally:
+        matcher_module.ahocorasick = original
+
+def main():
+    rng = random.Random(42)
+    regex_matcher = build_regex_matcher(keyword_matcher.keywords)
+
+    # Paridade exata com a implementação anterior
+    for _ in range(500):
+        text = make_text(rng.randint(5, 3000), rng)
+        expected = legacy_scores(text)
+        assert matcher_scores(text, keyword_matcher) == expected, text
+        assert matcher_scores(text, regex_matcher) == expected, text
+    print(f"Paridade verificada (backend padrão: {keyword_matcher.backend})")
+
+    for size in (1_000, 10_000, 200_000):
+        text = make_text(size, rng)
+        number = max(5, 2_000_000 // size)
+        legacy = timeit.timeit(lambda: legacy_scores(text), number=number) / number
+        results = [("str.count", legacy)]
+        for name, matcher in (("matcher", keyword_matcher), ("matcher[regex]", regex_matcher)):
+            # Sem o cache LRU para medir apenas a varredura
+            elapsed = timeit.timeit(lambda: matcher._count(text.lower()), number=number) / number
+            results.append((name, elapsed))
+        line = "  ".join(f"{name}={elapsed * 1e6:9.1f}µs" for name, elapsed in results)
+        print(f"{size:>8} chars  {line}  speedup={legacy / results[1][1]:.1f}x")
+
+    # Crescimento do léxico: custo da varredura não deve acompanhar o número de termos
+    text = make_text(10_000, rng)
+    for extra in (0, 200, 1000):
+        lexicon = list(keyword_matcher.keywords) + [f"termo{i}x" for i in range(extra)]
+        matcher = KeywordMatcher(lexicon)
+        legacy = timeit.timeit(lambda: [text.count(word) for word in lexicon], number=50) / 50
+        elapsed = timeit.timeit(lambda: matcher._count(text), number=50) / 50
+        print(f"léxico={len(lexicon):>5}  str.count={legacy * 1e6:9.1f}µs  matcher={elapsed * 1e6:9.1f}µs")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Benchmark: custo do log por requisição no event loop, antes e depois do LoggingMiddleware
+
+Cada caso chama o app ASGI diretamente (sem cliente HTTP), com uma rota que emite um log
+INFO como as rotas reais. O destino é um arquivo, ou um destino lento (--slow-ms por
+escrita, como um stdout entupido ou um coletor de logs lento). O tempo por requisição é o
+visto pelo event loop; "com flush" inclui esperar a fila ser escrita no fim do caso.
+
+Uso: python -m benchmarks.bench_logging [--requests 5000] [--slow-ms 0] [--repeat 5]
+"""
+import argparse
+import asyncio
+import logging
+import tempfile
+import time
+from fastapi import FastAPI, Request
+from app.config.logging_setup import setup_logging
+from app.middleware.logging_middleware import LoggingMiddleware
+
+route_logger = logging.getLogger("app.routes.email_routes")
+
+async def legacy_logging_middleware(request: Request, call_next):
+    """Middleware anterior (BaseHTTPMiddleware, URL completa e duas linhas por requisição)"""
+    logging.getLogger("app.middleware.logging_middleware").info(f"Requisição: {request.method} {request.url}")
+    response = await call_next(request)
+    logging.getLogger("app.middleware.logging_middleware").info(f"Resposta: {response.status_code}")
+    return response
+
+def build_app(middleware: str, sample_rate: float = 1.0, with_stages: bool = False):
+    app = FastAPI()
+
+    @app.get("/process-email")
+    async def process_email():
+        route_logger.info(f"Email processado - Produtivo ({0.89:.2f})")
+        return {"category": "Produtivo"}
+
+    if middleware == "legacy":
+        app.middleware("http")(legacy_logging_middleware)
+    elif middleware == "new":
+        app.add_middleware(LoggingMiddleware, sample_rate=sample_rate, with_stages=with_stages)
+    return app
+
+class SlowStream:
+    """Arquivo cujas escritas demoram `delay` segundos"""
+
+    def __init__(self, stream, delay: float):
+        self.stream = stream
+        self.delay = delay
+
+    def write(self, data: str):
+        if self.delay:
+            time.sleep(self.delay)
+        return self.stream.write(data)
+
+    def flush(self):
+        self.stream.flush()
+
+SCOPE = {
+    "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+    "path": "/process-email", "raw_path": b"/process-email", "root_path": "", "query_string": b"",
+    "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 5000), "server": ("bench", 80)
+}
+
+async def run_requests(app, count: int) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    start = time.perf_counter()
+    for _ in range(count):
+        await app(dict(SCOPE), receive, send)
+    return time.perf_counter() - start
+
+def run_case(args, stream, name: str, middleware: str, log_format: str = "text", use_queue: bool = False,
+             sample_rate: float = 1.0) -> dict:
+    runs = []
+    for _ in range(args.repeat):
+        async_logging = setup_logging("INFO", log_format, use_queue, stream=SlowStream(stream, args.slow_ms / 1000))
+        app = build_app(middleware, sample_rate, with_stages=log_format == "json")
+        asyncio.run(run_requests(app, 200))
+        loop_seconds = asyncio.run(run_requests(app, args.requests))
+        flush_start = time.perf_counter()
+        if async_logging is not None:
+            async_logging.stop()
+        runs.append((loop_seconds, loop_seconds + time.perf_counter() - flush_start))
+    # Melhor de `repeat` (a máquina compartilhada só acrescenta ruído)
+    loop_seconds, total_seconds = min(runs)
+    return {
+        "name": name,
+        "per_request_us": loop_seconds / args.requests * 1e6,
+        "with_flush_us": total_seconds / args.requests * 1e6
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--slow-ms", type=float, default=0.0, help="atraso de cada escrita no destino dos logs")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    cases = [
+        ("sem middleware", "none", "text", False, 1.0),
+        ("antes (http middleware)", "legacy", "text", False, 1.0),
+        ("texto", "new", "text", False, 1.0),
+        ("json", "new", "json", False, 1.0),
+        ("json + fila", "new", "json", True, 1.0),
+        ("json + fila, amostra 10%", "new", "json", True, 0.1)
+    ]
+    with tempfile.TemporaryFile("w") as stream:
+        results = [run_case(args, stream, *case) for case in cases]
+    baseline = results[0]["per_request_us"]
+    print(f"{args.requests} requisições, destino {'lento (' + str(args.slow_ms) + ' ms por escrita)' if args.slow_ms else 'arquivo'}")
+    for result in results:
+        print(f"{result['name']:<26} {result['per_request_us']:8.1f} µs/req  "
+              f"({result['per_request_us'] - baseline:+7.1f} µs)  com flush {result['with_flush_us']:8.1f} µs/req")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark: N chamadas concorrentes ao chat completions (cliente síncrono x assíncrono)
+
+Sobe um servidor falso de chat completions com latência fixa e mostra que,
+pelo caminho assíncrono, N requisições concorrentes terminam em cerca de uma
+latência do LLM, enquanto o cliente síncrono no event loop leva N latências.
+
+Uso: python -m benchmarks.bench_openai_concurrency [N] [latência_s]
+"""
+import asyncio
+import socket
+import sys
+import threading
+import time
+import uvicorn
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from app.services.openai_service import OpenAIService
+
+def create_fake_server(latency: float) -> Starlette:
+    """Servidor falso compatível com POST /v1/chat/completions"""
+    async def chat_completions(request):
+        await request.json()
+        await asyncio.sleep(latency)
+        return JSONResponse({
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": "fake",
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "Resposta de teste"},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2}
+        })
+
+    return Starlette(routes=[Route("/v1/chat/completions", chat_completions, methods=["POST"])])
+
+def start_server(app: Starlette) -> tuple[uvicorn.Server, str]:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, f"http://127.0.0.1:{port}/v1"
+
+async def run_async(service: OpenAIService, n: int) -> float:
+    start = time.perf_counter()
+    results = await asyncio.gather(*[
+        service.generate_response_async(f"email {i}", "sistema") for i in range(n)
+    ])
+    assert results == ["Resposta de teste"] * n
+    return time.perf_counter() - start
+
+async def run_blocking(service: OpenAIService, n: int) -> float:
+    """Comportamento anterior: o cliente síncrono chamado de rotas async"""
+    async def handler(i):
+        return service.generate_response(f"email {i}", "sistema")
+
+    start = time.perf_counter()
+    await asyncio.gather(*[handler(i) for i in range(n)])
+    return time.perf_counter() - start
+
+async def main(n: int, latency: float):
+    server, base_url = start_server(create_fake_server(latency))
+    service = OpenAIService(api_key="sk-fake", base_url=base_url)
+    try:
+        # Aquecer o pool de conexões
+        await service.generate_response_async("aquecimento", "sistema")
+
+        async_elapsed = await run_async(service, n)
+        blocking_elapsed = await run_blocking(service, n)
+    finally:
+        await service.close()
+        server.should_exit = True
+
+    print(f"N={n} latência={latency:.2f}s")
+    print(f"  assíncrono: {async_elapsed:.2f}s ({async_elapsed / latency:.1f} latências)")
+    print(f"  síncrono:   {blocking_elapsed:.2f}s ({blocking_elapsed / latency:.1f} latências)")
+
+    assert async_elapsed < 2 * latency, "requisições concorrentes não se sobrepuseram"
+    assert blocking_elapsed >= n * latency * 0.9
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.5
+    asyncio.run(main(n, latency))
@@ -0,0 +1,72 @@
+"""
+Benchmark: pré-processamento legado (word_tokenize + stemming de todos os tokens)
+x caminho rápido (regex pré-compilada, radicais memoizados, stemming sob demanda)
+
+Uso: python -m benchmarks.bench_preprocessing [tamanhos ...]
+"""
+import logging
+import re
+import sys
+import time
+from nltk.stem import PorterStemmer
+from nltk.tokenize import NLTKWordTokenizer
+from app.services.email_processor import EmailProcessor
+from benchmarks.fixtures import make_text
+
+# Textos extras para conferir a tokenização das contrações do Treebank
+EDGE_CASES = [
+    "I cannot go, we're gonna wanna GIMME that, gotta lemme know. Cannotx wannabe",
+    "Reunião: prazo do projeto!!! Urgente, por favor... 123 e-mail@empresa.com.br",
+    ""
+]
+
+def legacy_preprocess(processor: EmailProcessor, stemmer: PorterStemmer, text: str) -> tuple[str, list[str], list[str]]:
+    """Implementação anterior, com word_tokenize sem a divisão em frases
+    (o texto já não tem pontuação, então o punkt devolveria uma única frase)"""
+    text = text.lower()
+    text = re.sub(r'[^a-zA-Záàâãéèêíïóôõöúçñ\s]', ' ', text)
+    tokens = NLTKWordTokenizer().tokenize(text)
+    filtered_tokens = [word for word in tokens if word not in processor.stop_words and len(word) > 2]
+    keywords = [word for word in filtered_tokens if word in processor.keywords]
+    processed_text = ' '.join([stemmer.stem(word) for word in filtered_tokens])
+    return processed_text, keywords, filtered_tokens
+
+def measure(func, texts: list[str], repeat: int) -> float:
+    """Melhor tempo médio por email entre as repetições"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in texts:
+            func(text)
+        best = min(best, (time.perf_counter() - start) / len(texts))
+    return best
+
+def main(sizes: list[int]):
+    logging.disable(logging.WARNING)
+    processor = EmailProcessor()
+    processor.has_punkt = True
+    stemmer = PorterStemmer()
+
+    for text in EDGE_CASES + [make_text(size, seed) for size in sizes for seed in range(5)]:
+        legacy_text, legacy_keywords, legacy_tokens = legacy_preprocess(processor, stemmer, text)
+        fast = processor.preprocess_text(text)
+        assert processor._filter_tokens(re.sub(r'[^a-zA-Záàâãéèêíïóôõöúçñ\s]', ' ', text.lower())) == legacy_tokens
+        assert fast == (legacy_text, legacy_keywords), "pré-processamento difere da implementação anterior"
+        assert processor.extract_keywords(text) == legacy_keywords
+    print("Paridade: tokens, palavras-chave e texto processado idênticos")
+
+    for size in sizes:
+        texts = [make_text(size, seed) for seed in range(50)]
+        legacy = measure(lambda text: legacy_preprocess(processor, stemmer, text), texts, 3)
+        preprocess = measure(processor.preprocess_text, texts, 3)
+        keywords = measure(processor.extract_keywords, texts, 3)
+        classify = measure(processor.classify_email, texts, 3)
+        print(f"{size:>6} chars  legado={legacy * 1e6:9.1f}µs  "
+              f"preprocess_text={preprocess * 1e6:9.1f}µs ({legacy / preprocess:5.1f}x)  "
+              f"extract_keywords={keywords * 1e6:8.1f}µs ({legacy / keywords:5.1f}x)  "
+              f"classify_email={classify * 1e6:8.1f}µs")
+
+    print(f"Cache de radicais: {processor.stem.cache_info()}")
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [500, 2000, 10000])
@@ -0,0 +1,46 @@
+"""
+Benchmark: tokens do prompt anterior (email cortado em 1.000 caracteres, com indentação)
+x prompt com orçamento de tokens (email limpo e reduzido às frases com palavras-chave)
+
+Uso: python -m benchmarks.bench_prompt [orçamento]
+"""
+import logging
+import sys
+import time
+from app.services.email_processor import email_processor
+from app.services.prompt_builder import PromptBuilder
+from benchmarks.fixtures import EMAIL_SIZES, make_corpus
+
+def legacy_prompt(email_text: str, context: str) -> str:
+    """Implementação anterior de _build_contextual_prompt (categoria Produtivo)"""
+    return f"""
+            ANÁLISE: {context}
+            EMAIL: "{email_text[:1000]}"
+            INSTRUÇÕES: Gere resposta profissional baseada no contexto.
+            RESPOSTA:
+            """
+
+def main(budget: int):
+    logging.disable(logging.WARNING)
+    builder = PromptBuilder(token_budget=budget)
+    counter = builder.counter
+    print(f"Tokenizer: {counter.backend}, orçamento: {budget} tokens")
+
+    for size, emails in make_corpus(30, {**EMAIL_SIZES, "pdf": 20000}).items():
+        legacy_tokens, new_tokens, over_budget = 0, 0, 0
+        start = time.perf_counter()
+        for email_text in emails:
+            context = email_processor._analyze_email_context(email_text, email_processor.extract_keywords(email_text))
+            prompt = builder.build(email_text, context, "profissional")
+            tokens = counter.count(prompt)
+            new_tokens += tokens
+            over_budget += tokens > budget
+            legacy_tokens += counter.count(legacy_prompt(email_text, context))
+        elapsed = (time.perf_counter() - start) / len(emails)
+
+        print(f"{size:>7}  anterior={legacy_tokens / len(emails):7.1f} tokens  "
+              f"novo={new_tokens / len(emails):7.1f} tokens ({1 - new_tokens / legacy_tokens:.0%} de economia)  "
+              f"acima do orçamento={over_budget}  montagem={elapsed * 1e3:.2f}ms")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 400)
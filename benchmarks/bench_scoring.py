@@ -0,0 +1,84 @@
+"""
+Benchmark: pontuação legada (soma termo a termo por email)
+x motor de pontuação vetorizado (lote inteiro em operações NumPy)
+
+Uso: python -m benchmarks.bench_scoring [tamanhos de lote ...]
+"""
+import logging
+import random
+import sys
+import time
+from app.models.constants import PRODUCTIVE_KEYWORDS, UNPRODUCTIVE_KEYWORDS, CONTEXT_KEYWORDS
+from app.services.email_processor import EmailProcessor
+from app.services.keyword_matcher import keyword_matcher
+from app.services.scoring_engine import scoring_engine
+from benchmarks.fixtures import make_corpus
+
+# Razões exatamente nos limiares (ex.: 'reunião' pesa 2.0, contra três termos improdutivos de 1.0 = 0.4)
+EDGE_CASES = [
+    "reunião obrigado obrigada parabéns",
+    "reunião urgente obrigado obrigada parabéns feliz",
+    "preciso de ajuda obrigado",
+    "bom dia, tudo bem?",
+    "segue em anexo conforme combinado",
+    "Reunião URGENTE: prazo do projeto, reunião de novo, reunião!"
+]
+
+def legacy_score(text: str) -> tuple[str, float]:
+    """Implementação anterior de classify_email (sem a extração de palavras-chave)"""
+    counts = keyword_matcher.count(text.lower())
+    productive_score = keyword_matcher.weighted_score(counts, PRODUCTIVE_KEYWORDS, 1.2)
+    unproductive_score = keyword_matcher.weighted_score(counts, UNPRODUCTIVE_KEYWORDS, 1.0)
+    total_score = productive_score + unproductive_score
+
+    if total_score == 0:
+        if keyword_matcher.has_any(counts, CONTEXT_KEYWORDS['produtivo_implicito']):
+            return "Produtivo", 0.6
+        return "Improdutivo", 0.55
+
+    ratio = productive_score / total_score
+    if ratio > 0.6:
+        return "Produtivo", min(0.95, 0.7 + (ratio - 0.6) * 2)
+    elif ratio > 0.4:
+        return "Produtivo", 0.6 + (ratio - 0.4) * 0.5
+    elif ratio > 0.3:
+        return "Improdutivo", 0.55
+    return "Improdutivo", min(0.95, 0.7 + (0.3 - ratio) * 2)
+
+def keyword_bags(count: int, seed: int = 0) -> list[str]:
+    """Textos formados só por palavras-chave sorteadas, para cobrir as faixas de razão"""
+    rng = random.Random(seed)
+    vocabulary = list(scoring_engine.vocabulary)
+    return [" ".join(rng.choices(vocabulary, k=rng.randint(1, 12))) for _ in range(count)]
+
+def best_of(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main(batch_sizes: list[int]):
+    logging.disable(logging.WARNING)
+    texts = EDGE_CASES + keyword_bags(5000) + [email for emails in make_corpus(50).values() for email in emails]
+
+    expected = [legacy_score(text) for text in texts]
+    assert scoring_engine.predict(texts) == expected, "pontuação em lote difere da implementação anterior"
+    assert [scoring_engine.predict_one(text) for text in texts] == expected, "pontuação isolada difere"
+    processor = EmailProcessor()
+    assert processor.classify_emails(texts) == [processor.classify_email(text) for text in texts]
+    print(f"Paridade: {len(texts)} textos com categoria e confiança idênticas (backend {scoring_engine.backend})")
+
+    for size in batch_sizes:
+        batch = (texts * (size // len(texts) + 1))[:size]
+        repeat = max(3, 2000 // size)
+        legacy = best_of(lambda: [legacy_score(text) for text in batch], repeat)
+        engine = best_of(lambda: scoring_engine.predict(batch), repeat)
+        single = best_of(lambda: [scoring_engine.predict_one(text) for text in batch], repeat)
+        print(f"lote {size:>6}  legado={size / legacy:10.0f} emails/s  "
+              f"predict={size / engine:10.0f} emails/s ({legacy / engine:4.1f}x)  "
+              f"predict_one={size / single:10.0f} emails/s")
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1, 100, 1000, 10000])
@@ -0,0 +1,147 @@
+"""
+Teste de carga local: gunicorn com 1 e com N workers uvicorn (gunicorn.conf.py)
+
+Sobe o servidor de produção numa porta livre, sem chave da OpenAI (respostas de
+template: o custo medido é o da classificação e do HTTP), e dispara requisições
+concorrentes contra /process-email por alguns segundos. Mostra vazão, p50/p99 e
+a memória dos workers (RSS e PSS: com preload, boa parte do RSS é compartilhada
+com o processo mestre)
+
+Uso: python -m benchmarks.bench_server [--workers 1,4] [--concurrency 64] [--duration 10]
+     [--no-preload] [--legacy]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import httpx
+from benchmarks.fixtures import make_email
+from benchmarks.suite import summarize
+
+# Configuração anterior do start.py: worker síncrono (WSGI) com 2 threads
+LEGACY_ARGS = ["--workers", "1", "--threads", "2", "--worker-class", "gthread"]
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_server(port: int, workers: int, preload: bool, extra_args: list[str]) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        PORT=str(port),
+        WEB_CONCURRENCY=str(workers),
+        SERVER_PRELOAD=str(preload).lower(),
+        OPENAI_API_KEY="",
+        RESPONSE_CACHE_ENABLED="false",
+        PROMETHEUS_MULTIPROC_DIR=tempfile.mkdtemp(prefix="emailsmart_metrics_")
+    )
+    return subprocess.Popen(
+        ["gunicorn", "app.main:app", "--config", "gunicorn.conf.py", "--log-level", "warning", *extra_args],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+def wait_ready(base_url: str, server: subprocess.Popen, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError("gunicorn encerrou durante a inicialização")
+        try:
+            httpx.get(f"{base_url}/health", timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError("servidor não respondeu a tempo")
+
+def worker_memory(master_pid: int) -> dict:
+    """RSS e PSS (MB) somados dos workers, a partir de /proc (Linux)"""
+    try:
+        with open(f"/proc/{master_pid}/task/{master_pid}/children") as children_file:
+            pids = [int(pid) for pid in children_file.read().split()]
+    except OSError:
+        return {}
+
+    totals = {"rss_mb": 0.0, "pss_mb": 0.0}
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/smaps_rollup") as rollup:
+                for line in rollup:
+                    key, value = line.split(":", 1)
+                    if key in ("Rss", "Pss"):
+                        totals[f"{key.lower()}_mb"] += int(value.split()[0]) / 1024
+        except OSError:
+            continue
+    return {"workers": len(pids), **{key: round(value, 1) for key, value in totals.items()}}
+
+async def load(base_url: str, concurrency: int, duration: float) -> dict:
+    """Clientes concorrentes enviando emails até o fim do tempo"""
+    emails = [make_email(2000, seed) for seed in range(200)]
+    samples, errors = [], 0
+
+    async def client(index: int):
+        nonlocal errors
+        sent = index
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            try:
+                response = await http.post(f"{base_url}/process-email", json={"email": emails[sent % len(emails)]})
+                response.raise_for_status()
+                samples.append(time.perf_counter() - start)
+            except httpx.HTTPError:
+                errors += 1
+            sent += concurrency
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=30) as http:
+        start = time.perf_counter()
+        stop = start + duration
+        await asyncio.gather(*[client(i) for i in range(concurrency)])
+        wall_seconds = time.perf_counter() - start
+
+    return {**summarize(samples, wall_seconds), "errors": errors} if samples else {"errors": errors}
+
+def run_case(name: str, workers: int, preload: bool, args, extra_args: list[str] = ()) -> dict:
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = start_server(port, workers, preload, list(extra_args))
+    try:
+        wait_ready(base_url, server)
+        asyncio.run(load(base_url, args.concurrency, 1))  # aquecimento
+        result = asyncio.run(load(base_url, args.concurrency, args.duration))
+        result.update(worker_memory(server.pid))
+    except RuntimeError as e:
+        result = {"error": str(e)}
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=30)
+
+    shown = ("throughput_per_s", "p50_ms", "p99_ms", "errors", "workers", "rss_mb", "pss_mb", "error")
+    print(f"{name:<24} " + "  ".join(f"{key}={result[key]}" for key in shown if key in result), flush=True)
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", default=f"1,{os.cpu_count() or 1}", help="quantidades de workers, separadas por vírgula")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--no-preload", action="store_true", help="medir também sem preload")
+    parser.add_argument("--legacy", action="store_true", help="medir também a configuração anterior do start.py")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    print(f"{os.cpu_count()} núcleos, {args.concurrency} clientes, {args.duration:g}s por caso", flush=True)
+    if args.legacy:
+        run_case("anterior (1 sync, 2 thr)", 1, False, args, LEGACY_ARGS)
+    for workers in dict.fromkeys(int(value) for value in args.workers.split(",")):
+        run_case(f"{workers} uvicorn (preload)", workers, True, args)
+        if args.no_preload:
+            run_case(f"{workers} uvicorn (sem preload)", workers, False, args)
+
+if __name__ == "__main__":
+    sys.exit(main())
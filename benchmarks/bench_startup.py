@@ -0,0 +1,64 @@
+"""
+Benchmark: tempo de inicialização dos recursos de NLP (NLTK em tempo de execução x bundle)
+
+Cada abordagem roda em um processo Python novo, como no cold start de um dyno.
+
+Uso: python -m benchmarks.bench_startup [repetições]
+"""
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+LEGACY = """
+import nltk
+nltk.download('stopwords')
+nltk.download('punkt')
+from nltk.corpus import stopwords
+from nltk.tokenize import word_tokenize
+from nltk.stem import PorterStemmer
+PorterStemmer()
+try:
+    nltk.data.find('corpora/stopwords')
+except LookupError:
+    nltk.download('stopwords', quiet=True)
+try:
+    stop_words = set(stopwords.words('portuguese'))
+except Exception:
+    stop_words = set()
+"""
+
+BUNDLE = """
+import sys
+from app.services.nlp_resources import load_nlp_bundle
+bundle = load_nlp_bundle(sys.argv[1])
+assert bundle is not None
+assert 'nltk' not in sys.modules
+"""
+
+def run(code: str, *args: str) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code, *args], check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+def main(repeat: int):
+    from app.services.nlp_resources import build_nlp_bundle
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "nlp_bundle.pickle")
+        bundle = build_nlp_bundle(path)
+        print(f"Bundle: {os.path.getsize(path)} bytes, stopwords={bundle['stopwords_source']}")
+
+        baseline = run("pass")
+        legacy = [run(LEGACY) for _ in range(repeat)]
+        bundled = [run(BUNDLE, path) for _ in range(repeat)]
+
+    print(f"Interpretador vazio: {baseline * 1000:8.1f} ms")
+    print(f"NLTK + download:     {statistics.median(legacy) * 1000:8.1f} ms (mediana de {repeat})")
+    print(f"Bundle:              {statistics.median(bundled) * 1000:8.1f} ms (mediana de {repeat})")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
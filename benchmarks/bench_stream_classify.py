@@ -0,0 +1,70 @@
+"""
+Benchmark: extração de TXT seguida de classify_email sobre o texto inteiro
+x classificação incremental alimentada durante a decodificação (com e sem parada antecipada)
+
+Uso: python -m benchmarks.bench_stream_classify [caracteres ...]
+"""
+import io
+import logging
+import sys
+import time
+from app.services.email_processor import EmailProcessor
+from app.services.file_processor import FileProcessor, TextCollector
+from app.services.keyword_matcher import keyword_matcher
+from benchmarks.fixtures import make_txt
+
+def legacy_extract_txt(source) -> str:
+    """Implementação anterior de extract_text_from_txt (quatro encodings, um após o outro)"""
+    source.seek(0)
+    file_content = source.read()
+    for encoding in ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']:
+        try:
+            text = file_content.decode(encoding)
+            if text.strip():
+                return text
+        except UnicodeDecodeError:
+            continue
+    raise Exception("Não foi possível decodificar o arquivo")
+
+def best_of(func, repeat: int = 3):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        keyword_matcher.cache_clear()
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main(sizes: list[int]):
+    logging.disable(logging.WARNING)
+    processor = EmailProcessor()
+
+    def legacy(data: bytes):
+        text = legacy_extract_txt(io.BytesIO(data))
+        return processor.classify_email(text), len(text)
+
+    def streaming(data: bytes, early_stop: bool):
+        classifier = processor.stream_classifier(early_stop=early_stop)
+        FileProcessor.extract_text_from_txt(io.BytesIO(data), TextCollector(classifier.feed))
+        return classifier.finish(), classifier.chars
+
+    for size in sizes:
+        for encoding in ("utf-8", "cp1252"):
+            data = make_txt(size, encoding=encoding)
+            cases = {
+                "anterior": lambda: legacy(data),
+                "incremental": lambda: streaming(data, False),
+                "parada antecipada": lambda: streaming(data, True)
+            }
+            results = {name: best_of(func) for name, func in cases.items()}
+
+            legacy_seconds, (expected, _) = results["anterior"]
+            assert results["incremental"][1][0] == expected, "classificação incremental difere de classify_email"
+
+            print(f"{size:>10} caracteres ({encoding})")
+            for name, (seconds, ((category, confidence, _), classified)) in results.items():
+                print(f"    {name:<18} {seconds * 1e3:9.1f}ms  {category} {confidence:.3f}  "
+                      f"{classified} caracteres classificados  ({legacy_seconds / seconds:.1f}x)")
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [100_000, 1_000_000, 5_000_000])
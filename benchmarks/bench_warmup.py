@@ -0,0 +1,87 @@
+"""
+Benchmark: importação do app, aquecimento e latência das primeiras requisições (frio x aquecido)
+
+Cada caso roda num processo Python novo, como um worker recém-criado. A chave da
+OpenAI é fictícia e a geração é simulada (sem rede): o cliente é criado de verdade,
+mas a resposta é fixa.
+
+Uso: python -m benchmarks.bench_warmup [repetições]
+"""
+import asyncio
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+def child(mode: str):
+    """Importar o app, aquecer (se mode == "warm") e medir as três primeiras requisições"""
+    start = time.perf_counter()
+    from app.main import app
+    import_ms = (time.perf_counter() - start) * 1000
+
+    import httpx
+    from app.services.openai_service import openai_service
+    from app.services.response_cache import response_cache
+    from app.services.warmup import warmup
+    from benchmarks.fixtures import make_docx, make_email, make_pdf
+
+    logging.disable(logging.WARNING)
+    response_cache.enabled = False
+
+    async def generate_response_async(prompt: str, system_prompt: str) -> str:
+        return "Resposta de teste"
+    openai_service.generate_response_async = generate_response_async
+
+    async def run() -> dict:
+        result = {"import_ms": round(import_ms, 1)}
+        if mode == "warm":
+            await warmup.run()
+            result["warmup_ms"] = round(warmup.warmup_seconds * 1000, 1)
+            result["steps"] = warmup.steps
+
+        def requests(seed: int) -> list:
+            return [
+                ("email", "/process-email", {"json": {"email": make_email(2000, seed)}}),
+                ("pdf", "/process-file", {"files": {"file": ("a.pdf", make_pdf(1, seed=seed), "application/pdf")}}),
+                ("docx", "/process-file",
+                 {"files": {"file": ("a.docx", make_docx(3000, seed=seed), "application/octet-stream")}})
+            ]
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as http:
+            # A segunda rodada (outros documentos, sem cache) mostra o custo sem o efeito do frio
+            for prefix, seed in (("first", 1), ("second", 2)):
+                for name, path, kwargs in requests(seed):
+                    request_start = time.perf_counter()
+                    response = await http.post(path, **kwargs)
+                    assert response.status_code == 200, f"{name}: {response.status_code} {response.text}"
+                    result[f"{prefix}_{name}_ms"] = round((time.perf_counter() - request_start) * 1000, 1)
+        return result
+
+    print(json.dumps(asyncio.run(run())))
+
+def run_case(mode: str) -> dict:
+    env = {**os.environ, "OPENAI_API_KEY": "sk-bench", "WARMUP_ENABLED": "true"}
+    output = subprocess.run([sys.executable, "-m", "benchmarks.bench_warmup", "--child", mode], env=env,
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main(repeat: int):
+    keys = ("import_ms", "warmup_ms") + tuple(
+        f"{prefix}_{name}_ms" for prefix in ("first", "second") for name in ("email", "pdf", "docx")
+    )
+    for mode in ("cold", "warm"):
+        runs = [run_case(mode) for _ in range(repeat)]
+        medians = {key: statistics.median(run[key] for run in runs) for key in keys if key in runs[0]}
+        print(f"{mode:<5} " + "  ".join(f"{key}={value:.1f}" for key, value in medians.items()))
+        if mode == "warm":
+            print(f"      etapas (último): {runs[-1]['steps']}")
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--child":
+        child(sys.argv[2])
+    else:
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else 3)
@@ -0,0 +1,132 @@
+"""
+Geração de documentos sintéticos e reprodutíveis para os benchmarks
+"""
+import io
+import random
+import zipfile
+from xml.sax.saxutils import escape
+
+PARAGRAPHS = [
+    "Prezados, conforme combinado na reunião de ontem, segue o relatório do projeto com o prazo atualizado.",
+    "Solicito suporte urgente: o sistema apresenta erro ao gerar o orçamento para o cliente.",
+    "Gostaria de agradecer a todos pela festa de fim de ano, foi uma comemoração incrível.",
+    "Lembramos que o contrato precisa ser assinado até sexta-feira para não atrasar a entrega.",
+    "Obrigado pelo convite para o almoço, estarei de férias mas adoraria participar do jantar.",
+    "Estamos com uma dúvida sobre a atualização do sistema e o impacto nas tarefas da equipe.",
+    "Segue em anexo a proposta comercial revisada, com os itens solicitados pelo cliente.",
+    "Feliz aniversário! Desejamos muita diversão, lazer e descanso neste dia especial."
+]
+
+def make_text(size: int, seed: int = 0) -> str:
+    """Texto em português com aproximadamente `size` caracteres"""
+    rng = random.Random(seed)
+    parts = []
+    length = 0
+    while length < size:
+        paragraph = rng.choice(PARAGRAPHS)
+        parts.append(paragraph)
+        length += len(paragraph) + 1
+    return "\n".join(parts)[:size]
+
+GREETINGS = ["Olá equipe,", "Prezados,", "Bom dia,", "Oi pessoal,", "Caro cliente,"]
+SIGNATURES = ["Atenciosamente,\nMaria Souza", "Abraços,\nJoão", "Obrigado,\nEquipe Financeira", "Att.,\nCarlos Lima"]
+
+# Tamanhos (em caracteres) do corpus de emails
+EMAIL_SIZES = {"short": 300, "medium": 2000, "long": 10000}
+
+def make_email(size: int, seed: int = 0) -> str:
+    """Email com saudação, corpo e assinatura, com até `size` caracteres no total"""
+    rng = random.Random(seed)
+    greeting, signature = rng.choice(GREETINGS), rng.choice(SIGNATURES)
+    body = make_text(max(0, size - len(greeting) - len(signature) - 4), seed)
+    return f"{greeting}\n\n{body}\n\n{signature}"
+
+def make_corpus(count: int, sizes: dict = EMAIL_SIZES, seed: int = 0) -> dict[str, list[str]]:
+    """Corpus reprodutível com `count` emails por faixa de tamanho"""
+    return {
+        name: [make_email(size, seed + i) for i in range(count)]
+        for name, size in sizes.items()
+    }
+
+def make_txt(size: int, seed: int = 0, encoding: str = "utf-8") -> bytes:
+    """Arquivo de texto com aproximadamente `size` caracteres"""
+    return make_email(size, seed).encode(encoding)
+
+def make_docx(size: int, seed: int = 0) -> bytes:
+    """DOCX mínimo (um parágrafo por linha) com aproximadamente `size` caracteres"""
+    paragraphs = "".join(
+        f"<w:p><w:r><w:t xml:space=\"preserve\">{escape(line)}</w:t></w:r></w:p>"
+        for line in make_email(size, seed).split("\n")
+    )
+    document = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        f"<w:body>{paragraphs}</w:body></w:document>"
+    )
+    content_types = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/word/document.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+        "</Types>"
+    )
+    relationships = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="word/document.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+        "</Relationships>"
+    )
+
+    output = io.BytesIO()
+    with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as archive:
+        # [Content_Types].xml primeiro, como o Word grava (e como o libmagic espera)
+        archive.writestr("[Content_Types].xml", content_types)
+        archive.writestr("_rels/.rels", relationships)
+        archive.writestr("word/document.xml", document)
+    return output.getvalue()
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def make_pdf(pages: int, lines_per_page: int = 40, seed: int = 0) -> bytes:
+    """PDF mínimo (fonte Helvetica, WinAnsi) com `pages` páginas de texto"""
+    rng = random.Random(seed)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # árvore de páginas, preenchida depois
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"
+    ]
+    page_ids = []
+
+    for _ in range(pages):
+        lines = [rng.choice(PARAGRAPHS)[:90] for _ in range(lines_per_page)]
+        content = "BT /F1 10 Tf 12 TL 40 800 Td " + " ".join(
+            f"({_pdf_escape(line)}) '" for line in lines
+        ) + " ET"
+        stream = content.encode("cp1252")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(len(objects))
+
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, pages)
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+
+    xref_offset = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        output += b"%010d 00000 n \n" % offset
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset)
+    return bytes(output)
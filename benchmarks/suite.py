@@ -0,0 +1,310 @@
+"""
+Suíte de benchmarks: pré-processamento, classificação, resposta fallback, extração
+de arquivos e rotas completas pelo app ASGI (com o openai_service simulado)
+
+Cada amostra usa um documento diferente do corpus sintético (os caches de respostas
+e de extração ficam desligados), e o resultado é um JSON com vazão e p50/p95/p99
+por caso. Passando --baseline, os percentis são comparados com um resultado salvo
+e o processo termina com código 1 se algum caso piorar além do limite.
+
+Uso:
+    python -m benchmarks.suite --output baseline.json
+    python -m benchmarks.suite --baseline baseline.json --threshold 0.15
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+import httpx
+from app.main import app
+from app.services.email_processor import email_processor
+from app.services.extraction_cache import extraction_cache
+from app.services.file_processor import FileProcessor
+from app.services.openai_service import openai_service
+from app.services.pdf_extractor import pdf_extractor
+from app.services.response_cache import response_cache
+from benchmarks.fixtures import EMAIL_SIZES, make_corpus, make_docx, make_email, make_pdf, make_txt
+
+SUITE_VERSION = 1
+
+# Métricas comparadas com o baseline
+COMPARED_METRICS = ("p50_ms", "p95_ms")
+
+STUB_RESPONSE = "Agradecemos o contato. Nossa equipe retornará em breve com os detalhes solicitados."
+
+def percentile(sorted_samples: list[float], q: float) -> float:
+    """Percentil pelo método nearest-rank"""
+    rank = max(1, math.ceil(q / 100 * len(sorted_samples)))
+    return sorted_samples[rank - 1]
+
+def summarize(samples: list[float], wall_seconds: float) -> dict:
+    """Resumo de latências (em ms) e vazão de um caso"""
+    ordered = sorted(samples)
+    return {
+        "samples": len(ordered),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 4),
+        "min_ms": round(ordered[0] * 1000, 4),
+        "p50_ms": round(percentile(ordered, 50) * 1000, 4),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 4),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 4),
+        "max_ms": round(ordered[-1] * 1000, 4),
+        "throughput_per_s": round(len(ordered) / wall_seconds, 2)
+    }
+
+def bench(func, inputs: list, warmup: list) -> dict:
+    """Medir uma função síncrona, uma chamada por entrada"""
+    for item in warmup:
+        func(item)
+
+    samples = []
+    wall_start = time.perf_counter()
+    for item in inputs:
+        start = time.perf_counter()
+        func(item)
+        samples.append(time.perf_counter() - start)
+    return summarize(samples, time.perf_counter() - wall_start)
+
+async def bench_async(func, inputs: list, warmup: list) -> dict:
+    """Medir uma corrotina, uma chamada por entrada"""
+    for item in warmup:
+        await func(item)
+
+    samples = []
+    wall_start = time.perf_counter()
+    for item in inputs:
+        start = time.perf_counter()
+        await func(item)
+        samples.append(time.perf_counter() - start)
+    return summarize(samples, time.perf_counter() - wall_start)
+
+@contextlib.contextmanager
+def stub_openai(configured: bool, latency: float = 0.0):
+    """Substituir as chamadas à OpenAI por uma resposta fixa (com latência simulada)"""
+    originals = {
+        name: openai_service.__dict__.get(name)
+        for name in ("is_configured", "generate_response_async", "stream_response_async")
+    }
+
+    async def generate_response_async(prompt: str, system_prompt: str) -> str:
+        if latency:
+            await asyncio.sleep(latency)
+        return STUB_RESPONSE
+
+    async def stream_response_async(prompt: str, system_prompt: str):
+        if latency:
+            await asyncio.sleep(latency)
+        for word in STUB_RESPONSE.split(" "):
+            yield word + " "
+
+    openai_service.is_configured = lambda: configured
+    openai_service.generate_response_async = generate_response_async
+    openai_service.stream_response_async = stream_response_async
+    try:
+        yield
+    finally:
+        for name, original in originals.items():
+            if original is None:
+                vars(openai_service).pop(name, None)
+            else:
+                setattr(openai_service, name, original)
+
+@contextlib.contextmanager
+def caches_disabled():
+    """Desligar os caches para medir o caminho completo a cada amostra"""
+    previous = response_cache.enabled, extraction_cache.enabled
+    response_cache.enabled = extraction_cache.enabled = False
+    try:
+        yield
+    finally:
+        response_cache.enabled, extraction_cache.enabled = previous
+
+def run_units(count: int) -> dict:
+    """Pré-processamento, classificação e resposta fallback por tamanho de email"""
+    results = {}
+    corpus = make_corpus(count)
+    warmup = make_corpus(3, seed=10_000)
+
+    with stub_openai(configured=False):
+        for size, emails in corpus.items():
+            results[f"preprocess_text/{size}"] = bench(email_processor.preprocess_text, emails, warmup[size])
+            results[f"classify_email/{size}"] = bench(email_processor.classify_email, emails, warmup[size])
+
+            # Classificação fora da medição: só a geração da resposta fallback é cronometrada
+            classified = [(email, *email_processor.classify_email(email)) for email in emails]
+            warm = [(email, *email_processor.classify_email(email)) for email in warmup[size]]
+            results[f"generate_response_fallback/{size}"] = bench(
+                lambda item: email_processor.generate_response(item[0], item[1], item[3]), classified, warm
+            )
+    return results
+
+def file_fixtures(count: int, seed: int = 0) -> dict[str, list[tuple[str, bytes]]]:
+    """Arquivos por caso de extração: (nome, conteúdo)"""
+    size = EMAIL_SIZES["medium"]
+    # A extração de PDF custa centenas de ms por página: menos amostras nesses casos
+    pdf_count = max(3, count // 5) if count > 3 else count
+    return {
+        "pdf/1p": [("email.pdf", make_pdf(1, seed=seed + i)) for i in range(pdf_count)],
+        "pdf/10p": [("email.pdf", make_pdf(10, seed=seed + i)) for i in range(pdf_count)],
+        "docx/medium": [("email.docx", make_docx(size, seed + i)) for i in range(count)],
+        "txt/medium": [("email.txt", make_txt(size, seed + i)) for i in range(count)],
+        "txt/cp1252": [("email.txt", make_txt(size, seed + i, "cp1252")) for i in range(count)]
+    }
+
+def run_extractors(count: int) -> dict:
+    """Cada FileProcessor.extract_text_* com arquivos sintéticos"""
+    extractors = {
+        "pdf": FileProcessor.extract_text_from_pdf,
+        "docx": FileProcessor.extract_text_from_docx,
+        "txt": FileProcessor.extract_text_from_txt
+    }
+    files = file_fixtures(count)
+    warmup = file_fixtures(2, seed=10_000)
+
+    results = {}
+    for case, items in files.items():
+        extract = extractors[case.split("/")[0]]
+        results[f"extract_text/{case}"] = bench(
+            lambda item: extract(io.BytesIO(item[1])), items, warmup[case]
+        )
+    return results
+
+async def run_routes(count: int, latency: float) -> dict:
+    """Rotas completas pelo app ASGI, com a OpenAI simulada"""
+    corpus = make_corpus(count)
+    warmup = make_corpus(3, seed=10_000)
+    files = file_fixtures(count)
+    file_warmup = file_fixtures(2, seed=10_000)
+    batches = [[make_email(EMAIL_SIZES["short"], 100 * i + j) for j in range(20)] for i in range(count)]
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def post_email(email: str):
+            response = await client.post("/process-email", json={"email": email})
+            response.raise_for_status()
+
+        async def post_batch(emails: list[str]):
+            response = await client.post("/process-emails", json={"emails": [{"email": e} for e in emails]})
+            response.raise_for_status()
+
+        async def post_file(item: tuple[str, bytes]):
+            response = await client.post("/process-file", files={"file": item})
+            response.raise_for_status()
+
+        with stub_openai(configured=True, latency=latency):
+            for size, emails in corpus.items():
+                results[f"route/process-email/{size}"] = await bench_async(post_email, emails, warmup[size])
+            results["route/process-emails/20x-short"] = await bench_async(post_batch, batches, batches[:1])
+            for case, items in files.items():
+                results[f"route/process-file/{case}"] = await bench_async(post_file, items, file_warmup[case])
+    return results
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[dict]:
+    """Variação relativa dos percentis em relação ao baseline (casos presentes nos dois)"""
+    rows = []
+    for case, current in results["results"].items():
+        previous = baseline.get("results", {}).get(case)
+        if previous is None:
+            continue
+        for metric in COMPARED_METRICS:
+            if not previous.get(metric):
+                continue
+            change = current[metric] / previous[metric] - 1
+            rows.append({
+                "case": case,
+                "metric": metric,
+                "baseline": previous[metric],
+                "current": current[metric],
+                "change": round(change, 4),
+                "regression": change > threshold
+            })
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks do EmailSmart")
+    parser.add_argument("--count", type=int, default=30, help="amostras por caso")
+    parser.add_argument("--only", choices=["units", "extractors", "routes"], action="append",
+                        help="grupos a executar (padrão: todos)")
+    parser.add_argument("--openai-latency", type=float, default=0.0,
+                        help="latência simulada da OpenAI nas rotas, em segundos")
+    parser.add_argument("--output", help="arquivo JSON de saída (padrão: stdout)")
+    parser.add_argument("--baseline", help="resultado anterior para comparação")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="piora relativa tolerada antes de acusar regressão")
+    args = parser.parse_args()
+
+    # Logs por requisição distorcem as medições e poluem a saída
+    logging.disable(logging.WARNING)
+    groups = args.only or ["units", "extractors", "routes"]
+
+    results = {}
+    try:
+        with caches_disabled():
+            if "units" in groups:
+                results.update(run_units(args.count))
+            if "extractors" in groups:
+                results.update(run_extractors(args.count))
+            if "routes" in groups:
+                results.update(asyncio.run(run_routes(args.count, args.openai_latency)))
+    finally:
+        pdf_extractor.shutdown()
+
+    report = {
+        "suite_version": SUITE_VERSION,
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "count": args.count,
+            "openai_latency": args.openai_latency
+        },
+        "results": results
+    }
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+        report["comparison"] = {
+            "baseline_revision": baseline.get("meta", {}).get("git_revision"),
+            "threshold": args.threshold,
+            "rows": compare(report, baseline, args.threshold)
+        }
+        regressions = [row for row in report["comparison"]["rows"] if row["regression"]]
+        for row in report["comparison"]["rows"]:
+            flag = "REGRESSÃO" if row["regression"] else ""
+            print(f"{row['case']:<40} {row['metric']:<7} {row['baseline']:10.3f} -> "
+                  f"{row['current']:10.3f} ms  {row['change']:+7.1%} {flag}", file=sys.stderr)
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            output_file.write(output + "\n")
+    else:
+        print(output)
+
+    if regressions:
+        print(f"{len(regressions)} métrica(s) acima do limite de {args.threshold:.0%}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Configuração do gunicorn (carregada automaticamente a partir do diretório atual)
+
+Modo de produção: workers uvicorn (ASGI), um por núcleo disponível ou WEB_CONCURRENCY.
+Com SERVER_PRELOAD o app é importado no processo mestre antes do fork: stopwords,
+autômato de palavras-chave e vetores de pontuação são montados uma única vez e
+compartilhados pelos workers (copy-on-write). Cada worker é reciclado depois de
+SERVER_MAX_REQUESTS requisições (com jitter, para não reiniciarem todos juntos),
+limitando o crescimento de memória da extração de PDFs. Cada worker só responde 200 em
+/ready depois do aquecimento (WARMUP_ENABLED)
+
+Cada worker tem o próprio pool de extração de PDF: sem PDF_POOL_WORKERS definido, os
+núcleos são divididos entre os workers (no mínimo 1 processo por worker), em vez de
+workers x min(4, núcleos) interpretadores extras
+"""
+import gc
+import os
+from app.config.settings import (
+    PORT, WEB_CONCURRENCY, SERVER_PRELOAD, SERVER_MAX_REQUESTS, SERVER_MAX_REQUESTS_JITTER,
+    SERVER_TIMEOUT, SERVER_GRACEFUL_TIMEOUT, SERVER_KEEPALIVE, PDF_POOL_WORKERS
+)
+
+def available_cores() -> int:
+    """Núcleos que este processo pode usar (respeita a afinidade de CPU do contêiner)"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+bind = f"0.0.0.0:{PORT}"
+worker_class = "uvicorn.workers.UvicornWorker"
+workers = WEB_CONCURRENCY or available_cores()
+preload_app = SERVER_PRELOAD
+max_requests = SERVER_MAX_REQUESTS
+max_requests_jitter = SERVER_MAX_REQUESTS_JITTER
+timeout = SERVER_TIMEOUT
+graceful_timeout = SERVER_GRACEFUL_TIMEOUT
+keepalive = SERVER_KEEPALIVE
+pdf_pool_workers = PDF_POOL_WORKERS if "PDF_POOL_WORKERS" in os.environ else max(1, available_cores() // workers)
+
+def when_ready(server):
+    """Carregar as bibliotecas pesadas e congelar os objetos do app pré-carregado antes do
+    primeiro fork: o coletor de lixo dos workers deixa de percorrê-los, e as páginas
+    continuam compartilhadas"""
+    if preload_app:
+        from app.services.warmup import warmup
+        if warmup.enabled:
+            warmup.warm_imports()
+        gc.collect()
+        gc.freeze()
+    server.log.info(f"{workers} workers uvicorn (preload={preload_app}, max_requests={max_requests}±{max_requests_jitter}, "
+                    f"pool de PDF={pdf_pool_workers} por worker)")
+
+def post_fork(server, worker):
+    """Tamanho do pool de PDF deste worker (o pool só é criado no primeiro PDF grande)"""
+    from app.services.pdf_extractor import pdf_extractor
+    pdf_extractor.workers = pdf_pool_workers
+
+def child_exit(server, worker):
+    """Descartar as métricas em andamento de um worker encerrado"""
+    from app.services.metrics import mark_worker_dead
+    mark_worker_dead(worker.pid)
@@ -1,19 +1,40 @@
-import nltk
+"""
+Etapa de build dos recursos de NLP: baixa os dados do NLTK (quando possível),
+compila o bundle carregado pela aplicação na inicialização e guarda a
+codificação do tokenizer do prompt (tiktoken) em TOKENIZER_CACHE_DIR
+"""
 import os
+from app.config.settings import NLP_BUNDLE_PATH, TOKENIZER_CACHE_DIR
+from app.services.nlp_resources import build_nlp_bundle
+from app.services.prompt_builder import TokenCounter
 
-print("🚀 Configurando NLTK...")
+def download_nltk_resources(download_dir=None):
+    """Baixar recursos NLTK e gerar o bundle de NLP"""
+    print("🚀 Configurando NLTK...")
 
-# Tenta baixar recursos, mas não é crítico se falhar
-try:
-    nltk.download('stopwords', quiet=True)
-    print("✅ stopwords configurado")
-except:
-    print("⚠️  stopwords não disponível (usando fallback)")
+    # Não é crítico se falhar: o bundle usa os fallbacks manuais
+    bundle = build_nlp_bundle(NLP_BUNDLE_PATH, download_dir=download_dir)
 
-try:
-    nltk.download('punkt', quiet=True)
-    print("✅ punkt configurado")
-except:
-    print("⚠️  punkt não disponível (usando tokenização alternativa)")
+    if bundle["stopwords_source"] == "manual":
+        print("⚠️  stopwords não disponível (usando fallback)")
+    else:
+        print("✅ stopwords configurado")
 
-print("🎉 Configuração concluída - aplicação pode iniciar")
\ No newline at end of file
+    if bundle["punkt_available"]:
+        print("✅ punkt configurado")
+    else:
+        print("⚠️  punkt não disponível (usando tokenização alternativa)")
+
+    print(f"📦 Bundle de NLP gerado em {NLP_BUNDLE_PATH}")
+
+    # Sem a codificação, os tokens do prompt são estimados
+    os.makedirs(TOKENIZER_CACHE_DIR, exist_ok=True)
+    if TokenCounter(cache_dir=TOKENIZER_CACHE_DIR).load(download=True) is not None:
+        print(f"✅ tokenizer do prompt em {TOKENIZER_CACHE_DIR}")
+    else:
+        print("⚠️  tokenizer do prompt não disponível (estimando tokens)")
+    print("🎉 Configuração concluída - aplicação pode iniciar")
+    return bundle
+
+if __name__ == "__main__":
+    download_nltk_resources()
@@ -3,8 +3,19 @@
 Script de inicialização para o Heroku
 """
 import os
+import shutil
 import subprocess
 import sys
+import tempfile
+
+def prepare_metrics_dir():
+    """Esvaziar o diretório de métricas multiprocesso (valores de execuções anteriores)"""
+    # Os workers precisam do diretório compartilhado para que /metrics agregue todos eles
+    metrics_dir = os.environ.setdefault(
+        "PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "emailsmart_metrics")
+    )
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
 
 def main():
     print("🚀 Iniciando EmailSmart Backend...")
@@ -18,17 +29,16 @@ def main():
         print(f"⚠️  Erro no setup NLTK: {e}")
         print("⏭️  Continuando com fallbacks manuais...")
     
+    prepare_metrics_dir()
+    
     print("✅ Configuração concluída")
     print("🎯 Iniciando servidor Gunicorn...")
     
-    # Inicia o gunicorn
+    # Inicia o gunicorn (workers, preload e reciclagem em gunicorn.conf.py)
     os.execvp("gunicorn", [
-        "gunicorn", 
-        "app.main:app", 
-        "--bind", f"0.0.0.0:{os.environ.get('PORT', '8000')}",
-        "--workers", "1",
-        "--threads", "2",
-        "--timeout", "120"
+        "gunicorn",
+        "app.main:app",
+        "--config", os.path.join(os.path.dirname(os.path.abspath(__file__)), "gunicorn.conf.py")
     ])
 
 if __name__ == "__main__":